@@ -0,0 +1,91 @@
+"""
+Benchmarks fcm.cmeans against skfuzzy.cluster.cmeans.
+
+Runs on the PCA output of every condition pipeline (DataCleaned.csv) and on
+synthetic 3-D blobs with millions of rows, and reports cold vs warm-start
+iterations after a small data change.
+
+Run from the repository root:
+    python -m benchmarks.bench_fcm --sizes 1000000 2000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fcm import cmeans
+from labeling import condition_pipelines, weight_features, n_clusters
+from preprocessing import preprocess
+
+
+def pipeline_pca_outputs(source):
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import MinMaxScaler
+
+    df, _ = preprocess(pd.read_csv(source))
+    outputs = {}
+    for condition in condition_pipelines:
+        scaled = MinMaxScaler().fit_transform(weight_features(df, condition))
+        outputs[condition] = PCA(n_components=3).fit_transform(scaled)
+    return outputs
+
+
+def synthetic_blobs(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=3.0, size=(n_clusters, 3))
+    assignment = rng.integers(0, n_clusters, size=n_rows)
+    return centers[assignment] + rng.normal(size=(n_rows, 3))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def compare(name, data, seed, n_init, skip_skfuzzy=False):
+    row = {'dataset': name, 'rows': len(data)}
+    if not skip_skfuzzy:
+        import skfuzzy as fuzz
+        sk, row['skfuzzy_s'] = timed(lambda: fuzz.cluster.cmeans(data.T, c=n_clusters, m=2, error=0.005, maxiter=1000, seed=seed))
+        row['skfuzzy_iter'] = sk[5]
+    res, row['fcm64_s'] = timed(lambda: cmeans(data, n_clusters, seed=seed, n_init=n_init))
+    row['fcm64_iter'] = res.n_iter
+    res32, row['fcm32_s'] = timed(lambda: cmeans(data, n_clusters, seed=seed, n_init=n_init, dtype=np.float32))
+    row['fcm32_iter'] = res32.n_iter
+
+    # Re-cluster after changing 1% of the rows, cold vs warm-started from the previous centers
+    changed = data.copy()
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(changed), size=max(1, len(changed) // 100), replace=False)
+    changed[rows] += rng.normal(scale=0.1, size=(len(rows), changed.shape[1]))
+    cold, row['cold_s'] = timed(lambda: cmeans(changed, n_clusters, seed=seed + 1))
+    warm, row['warm_s'] = timed(lambda: cmeans(changed, n_clusters, init_centers=res.centers))
+    row['cold_iter'] = cold.n_iter
+    row['warm_iter'] = warm.n_iter
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default='DataCleaned.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 2_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--n-init', type=int, default=1)
+    parser.add_argument('--skip-skfuzzy-above', type=int, default=None,
+                        help="Only time fcm for synthetic sets larger than this many rows")
+    args = parser.parse_args()
+
+    rows = []
+    for condition, data in pipeline_pca_outputs(args.source).items():
+        rows.append(compare(f"pca:{condition}", data, args.seed, args.n_init))
+    for n_rows in args.sizes:
+        skip = args.skip_skfuzzy_above is not None and n_rows > args.skip_skfuzzy_above
+        rows.append(compare("synthetic", synthetic_blobs(n_rows, args.seed), args.seed, args.n_init, skip))
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == '__main__':
+    main()
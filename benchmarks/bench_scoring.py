@@ -0,0 +1,56 @@
+"""
+Compares the original pandas recommend_top_foods with the precomputed
+FoodScorer engine on the synthetic catalogues of benchmarks/synthetic.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_scoring
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_catalogue
+from scoring import FoodScorer, condition_weights
+
+
+def legacy_recommend_top_foods(df, condition, top_n=10):
+    weights = condition_weights[condition]
+    df_filtered = df.copy().fillna(0)
+    df_filtered['score'] = sum(df_filtered[nutrient] * weight for nutrient, weight in weights.items() if nutrient in df_filtered.columns)
+    top_foods = df_filtered.sort_values(by='score', ascending=False).head(top_n)
+    return top_foods[['food_name', 'score'] + list(weights.keys())]
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'condition':>10} {'legacy ms':>11} {'engine ms':>11} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = make_catalogue(n_rows)
+        scorer = FoodScorer(df)
+        for condition in condition_weights:
+            expected = legacy_recommend_top_foods(df, condition, args.top_n)
+            got = scorer.recommend(condition, args.top_n)
+            assert np.allclose(expected['score'].to_numpy(), got['score'].to_numpy())
+
+            legacy = best_of(lambda: legacy_recommend_top_foods(df, condition, args.top_n), args.repeat)
+            engine = best_of(lambda: scorer.recommend(condition, args.top_n), args.repeat)
+            print(f"{n_rows:>10} {condition:>10} {legacy * 1e3:>11.2f} {engine * 1e3:>11.2f} {legacy / engine:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
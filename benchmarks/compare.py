@@ -0,0 +1,55 @@
+"""
+Compares two benchmark files written by benchmarks.run.
+
+Exits with status 1 when any stage got slower than --threshold times the
+baseline, so it can gate a CI job.
+
+Run from the repository root:
+    python -m benchmarks.compare baseline.json bench.json --threshold 1.25
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report['meta'], {(r['stage'], r['rows']): r['seconds'] for r in report['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    base_meta, baseline = load(args.baseline)
+    cand_meta, candidate = load(args.candidate)
+    print(f"baseline  {base_meta.get('git_revision')}  {base_meta.get('timestamp')}")
+    print(f"candidate {cand_meta.get('git_revision')}  {cand_meta.get('timestamp')}")
+
+    regressions = 0
+    for key in sorted(set(baseline) & set(candidate), key=lambda k: (k[1], k[0])):
+        before, after = baseline[key], candidate[key]
+        if before is None or after is None:
+            continue
+        ratio = after / before if before > 0 else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            flag = 'faster'
+        stage, rows = key
+        print(f"{rows:>9} {stage:<32}{before * 1e3:>12.2f} ms {after * 1e3:>12.2f} ms {ratio:>7.2f}x  {flag}")
+
+    for key in sorted(set(candidate) - set(baseline)):
+        print(f"{key[1]:>9} {key[0]:<32} new stage")
+    print(f"{regressions} regression(s) above {args.threshold:.2f}x")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
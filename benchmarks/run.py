@@ -0,0 +1,150 @@
+"""
+Times every hot path of the pipeline and the apps on synthetic catalogues.
+
+Writes a JSON file (one record per stage and catalogue size) that can be
+compared between commits with benchmarks.compare.
+
+Run from the repository root:
+    python -m benchmarks.run --sizes 1000 10000 100000 1000000 -o bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_catalogue
+from cluster_metrics import sampled_silhouette
+from fcm import cmeans
+from labeling import n_clusters, weight_features
+from preprocessing import convert_units, find_multicollinear_features, id_columns, remove_outliers, top_20_nutrition_features
+from scoring import FoodScorer, cluster_condition_weights, label_map, recommend_top_foods, recommend_top_foods_by_cluster
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(n_rows, repeat, seed, max_silhouette_rows, skip):
+    """Yields (stage, seconds or None, note) for one catalogue size."""
+    from sklearn.decomposition import PCA
+    from sklearn.metrics import silhouette_score
+    from sklearn.preprocessing import MinMaxScaler
+
+    raw = make_catalogue(n_rows, seed, labeled=True)
+    labels = raw[list(label_map.values())]
+    raw = raw.drop(columns=list(label_map.values()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalogue.csv')
+        raw.to_csv(path, index=False)
+        seconds, _ = best_of(lambda: pd.read_csv(path), repeat)
+        yield 'read_csv', seconds, ''
+
+    seconds, converted = best_of(lambda: convert_units(raw), repeat)
+    yield 'convert_units', seconds, ''
+    nutrients = converted.drop(columns=id_columns)
+
+    seconds, kept = best_of(lambda: remove_outliers(nutrients[top_20_nutrition_features]), repeat)
+    yield 'remove_outliers', seconds, f"{len(kept)} rows kept"
+
+    weighted = weight_features(nutrients, 'diabetes')
+    seconds, _ = best_of(lambda: find_multicollinear_features(weighted.corr(), threshold=0.85), repeat)
+    yield 'find_multicollinear_features', seconds, ''
+
+    def scale_pca():
+        return PCA(n_components=3).fit_transform(MinMaxScaler().fit_transform(weighted))
+    seconds, data_array = best_of(scale_pca, repeat)
+    yield 'scale_pca', seconds, ''
+
+    if 'skfuzzy' not in skip:
+        try:
+            import skfuzzy as fuzz
+        except ImportError:
+            yield 'skfuzzy_cmeans', None, 'skfuzzy not installed'
+        else:
+            seconds, _ = best_of(lambda: fuzz.cluster.cmeans(data_array.T, c=n_clusters, m=2, error=0.005, maxiter=1000, seed=seed), repeat)
+            yield 'skfuzzy_cmeans', seconds, ''
+    seconds, result = best_of(lambda: cmeans(data_array, n_clusters, seed=seed), repeat)
+    yield 'fcm_cmeans', seconds, f"{result.n_iter} iterations"
+    cluster_labels = np.argmax(result.u, axis=0)
+
+    if n_rows <= max_silhouette_rows:
+        seconds, _ = best_of(lambda: silhouette_score(data_array, cluster_labels), repeat)
+        yield 'silhouette_score', seconds, ''
+    else:
+        yield 'silhouette_score', None, f"skipped above {max_silhouette_rows} rows"
+    seconds, _ = best_of(lambda: sampled_silhouette(data_array, cluster_labels, 2000, seed), repeat)
+    yield 'sampled_silhouette', seconds, 'sample 2000'
+
+    labeled = pd.concat([raw, labels], axis=1)
+    seconds, scorer = best_of(lambda: FoodScorer(labeled), repeat)
+    yield 'scorer_build', seconds, ''
+    seconds, _ = best_of(lambda: recommend_top_foods(scorer, 'diabetes'), repeat)
+    yield 'recommend_top_foods', seconds, ''
+
+    cluster_scorer = FoodScorer(labeled, cluster_condition_weights)
+    health_labels = labeled[label_map['diabetes']].to_numpy()
+    seconds, _ = best_of(lambda: recommend_top_foods_by_cluster(cluster_scorer, health_labels, 'diabetes'), repeat)
+    yield 'recommend_top_foods_by_cluster', seconds, ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="Best-of repeats per stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-silhouette-rows', type=int, default=20_000,
+                        help="Skip sklearn's O(n^2) silhouette_score above this size")
+    parser.add_argument('--skip', nargs='*', default=[], choices=['skfuzzy'])
+    parser.add_argument('-o', '--output', default='bench.json')
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.sizes:
+        for stage, seconds, note in bench_size(n_rows, args.repeat, args.seed, args.max_silhouette_rows, args.skip):
+            results.append({'stage': stage, 'rows': n_rows, 'seconds': seconds, 'note': note})
+            shown = f"{seconds * 1e3:>12.2f} ms" if seconds is not None else f"{'-':>15}"
+            print(f"{n_rows:>9} {stage:<32}{shown}  {note}")
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
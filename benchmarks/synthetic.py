@@ -0,0 +1,66 @@
+"""
+Synthetic food catalogues with the exact DataCleaned.csv schema.
+
+Nutrient columns are drawn from a multivariate normal fitted to log1p of the
+real DataCleaned.csv values, so the cross-nutrient correlations (energy vs
+macros, sodium vs potassium, ...) match the real data, then mapped back with
+expm1. Each column keeps its observed share of exact zeros. Text columns
+reuse the real primarysource values and generate unique codes and names.
+"""
+import numpy as np
+import pandas as pd
+
+from labeling import condition_pipelines
+
+SOURCE_PATH = 'DataCleaned.csv'
+TEXT_COLUMNS = ['food_code', 'food_name', 'primarysource']
+
+
+class CatalogueModel:
+    """Distribution fitted to a real catalogue, used to sample synthetic ones."""
+
+    def __init__(self, source_path=SOURCE_PATH):
+        real = pd.read_csv(source_path)
+        self.columns = list(real.columns)
+        self.numeric_columns = [c for c in self.columns if c not in TEXT_COLUMNS]
+        logged = np.log1p(real[self.numeric_columns].clip(lower=0).to_numpy(dtype=np.float64))
+        self.mean = logged.mean(axis=0)
+        self.cov = np.cov(logged, rowvar=False)
+        # Exactly dependent columns (energy_kj vs energy_kcal) make the covariance singular
+        self.cov += np.eye(len(self.cov)) * 1e-6 * np.trace(self.cov) / len(self.cov)
+        self.zero_share = (real[self.numeric_columns] == 0).mean().to_numpy()
+        sources = real['primarysource'].value_counts(normalize=True)
+        self.sources = sources.index.to_numpy(dtype=object)
+        self.source_share = sources.to_numpy()
+
+    def sample(self, n_rows, seed=0, labeled=False):
+        """
+        Draws n_rows foods.
+
+        Parameters:
+            labeled (bool): Also add random Health_Label_* columns (0-2), as in Labeled_Data.csv.
+        """
+        rng = np.random.default_rng(seed)
+        values = np.expm1(rng.multivariate_normal(self.mean, self.cov, size=n_rows, method='cholesky'))
+        np.maximum(values, 0, out=values)
+        values[rng.random(values.shape) < self.zero_share] = 0.0
+
+        df = pd.DataFrame(values, columns=self.numeric_columns)
+        ids = np.arange(n_rows)
+        df.insert(0, 'food_code', [f"SYN{i:07d}" for i in ids])
+        df.insert(1, 'food_name', [f"Synthetic food {i}" for i in ids])
+        df.insert(2, 'primarysource', rng.choice(self.sources, size=n_rows, p=self.source_share))
+        df = df[self.columns]
+        if labeled:
+            for config in condition_pipelines.values():
+                df[config['label_column']] = rng.integers(0, 3, size=n_rows)
+        return df
+
+
+_models = {}
+
+
+def make_catalogue(n_rows, seed=0, labeled=False, source_path=SOURCE_PATH):
+    if source_path not in _models:
+        _models[source_path] = CatalogueModel(source_path)
+    return _models[source_path].sample(n_rows, seed, labeled)
@@ -0,0 +1,69 @@
+"""
+Pre-rendered charts for the cluster view.
+
+Each chart is rendered once per (condition, data version) and then served
+from a byte-capped ChartCache, so reruns never build a figure:
+
+    - pca_scatter_png: the 3-D PCA scatter as PNG bytes, drawn on a
+      standalone matplotlib Figure (no pyplot state, nothing left to close).
+    - cluster_distribution_spec: the cluster-size bar chart as a Vega-Lite spec.
+"""
+import io
+import json
+
+import numpy as np
+
+from result_cache import ResultCache
+
+DEFAULT_CHART_CACHE_BYTES = 32 << 20
+
+
+def chart_size(value):
+    """Approximate memory of a cached chart: PNG bytes or the JSON size of a spec."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value))
+
+
+class ChartCache(ResultCache):
+    """ResultCache bounded by the total size of the rendered charts."""
+
+    def __init__(self, max_bytes=DEFAULT_CHART_CACHE_BYTES, max_entries=256):
+        super().__init__(max_entries, max_bytes, chart_size)
+
+
+def pca_scatter_png(coords, cluster_labels, figsize=(8, 6), dpi=100):
+    """
+    Renders the 3-D PCA scatter coloured by cluster.
+
+    Parameters:
+        coords (np.ndarray): (n, 3) PCA coordinates.
+        cluster_labels (np.ndarray): Cluster label per row.
+
+    Returns:
+        bytes: PNG image.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.scatter(coords[:, 0], coords[:, 1], coords[:, 2], c=cluster_labels, cmap='viridis', s=40)
+    ax.set_xlabel("PC1")
+    ax.set_ylabel("PC2")
+    ax.set_zlabel("PC3")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def cluster_distribution_spec(cluster_labels, label_column):
+    """Vega-Lite bar chart of how many foods fall in each cluster."""
+    clusters, counts = np.unique(np.asarray(cluster_labels), return_counts=True)
+    return {
+        'data': {'values': [{'cluster': str(c), 'foods': int(n)} for c, n in zip(clusters, counts)]},
+        'mark': 'bar',
+        'encoding': {
+            'x': {'field': 'cluster', 'type': 'nominal', 'title': label_column, 'axis': {'labelAngle': 0}},
+            'y': {'field': 'foods', 'type': 'quantitative', 'title': 'count'},
+        },
+    }
@@ -0,0 +1,198 @@
+import time
+
+# Import time of the first run is reported as a startup phase; sklearn and matplotlib are imported on first use
+_script_start = time.perf_counter()
+
+import os
+from functools import partial
+
+import streamlit as st
+import numpy as np
+
+from charts import ChartCache, cluster_distribution_spec, pca_scatter_png
+from food_store import FoodStore, open_store
+from instrumentation import begin_rerun, end_rerun, fragment_span, record_startup, span, streamlit_session_id
+from models import healthy_clusters
+from projections import load_projections
+from result_cache import ResultCache
+from search import load_search_index
+from scoring import FoodScorer, cluster_condition_weights, label_map, recommend_top_foods_by_cluster
+from shared_matrix import attach_shared
+from warmup import Warmup, import_charting
+
+import_seconds = time.perf_counter() - _script_start
+
+table_columns = ['food_name', 'energy_kcal', 'carb_g', 'protein_g', 'fat_g', 'fibre_g']
+
+
+# Load the labeled dataset, the shared scoring matrix, cached projections and the models' healthy clusters
+# once per data version
+@st.cache_resource(max_entries=2)
+def load_view(csv_path, store_dir, data_version):
+    with span('build.view'):
+        store = FoodStore(store_dir)
+        df = store.frame(table_columns + list(label_map.values()))
+        shared = attach_shared(csv_path, store=store)
+        scorer = FoodScorer.from_matrix(shared.nutrients, shared.nutrient_columns, shared.food_names,
+                                        cluster_condition_weights)
+        projections = load_projections(csv_path, store)
+        return df, scorer, projections, healthy_clusters()
+
+
+# Food-name search index (word prefixes and trigrams), once per data version and shared by all sessions
+@st.cache_resource(max_entries=2)
+def load_search(csv_path, store_dir, data_version):
+    with span('build.search_index'):
+        return load_search_index(csv_path, FoodStore(store_dir))
+
+
+# Recommendations and their comparison chart per condition, shared by all sessions
+@st.cache_resource
+def load_result_cache():
+    return ResultCache(max_entries=16)
+
+
+# Rendered PCA scatters and distribution specs, capped at 32 MiB per process
+@st.cache_resource
+def load_chart_cache():
+    return ChartCache()
+
+
+def build_recommendations(df, scorer, condition_key, healthy_cluster):
+    top_foods = recommend_top_foods_by_cluster(scorer, df[label_map[condition_key]].to_numpy(), condition_key,
+                                               healthy_cluster)
+    nutrient_cols = ['carb_g', 'protein_g', 'fat_g']
+    compare_df = df[df['food_name'].isin(top_foods['food_name'])][['food_name'] + nutrient_cols]
+    return top_foods, compare_df.set_index('food_name')
+
+
+def cached_recommendations(result_cache, df, scorer, healthy, condition_key, data_version):
+    healthy_cluster = healthy[label_map[condition_key]]
+    return result_cache.get_or_build(('cluster_view', condition_key, 10, healthy_cluster), data_version,
+                                     lambda: build_recommendations(df, scorer, condition_key, healthy_cluster))
+
+
+def cached_distribution(chart_cache, df, condition_key, data_version):
+    label_col = label_map[condition_key]
+    return chart_cache.get_or_build(('distribution', condition_key), data_version,
+                                    lambda: cluster_distribution_spec(df[label_col].to_numpy(), label_col))
+
+
+def cached_pca_png(chart_cache, df, projections, condition_key, data_version):
+    return chart_cache.get_or_build(
+        ('pca_scatter', condition_key), data_version,
+        lambda: pca_scatter_png(projections[condition_key]['coords'], df[label_map[condition_key]].to_numpy()))
+
+
+# Fill the caches for every condition in the background, once per data version and server process
+@st.cache_resource(max_entries=2)
+def start_warmup(csv_path, store_dir, data_version):
+    df, scorer, projections, healthy = load_view(csv_path, store_dir, data_version)
+    result_cache, chart_cache = load_result_cache(), load_chart_cache()
+    steps = [('charting_imports', import_charting),
+             ('search_index', partial(load_search, csv_path, store_dir, data_version))]
+    for condition_key in label_map:
+        steps += [
+            (f'{condition_key}.recommendations',
+             partial(cached_recommendations, result_cache, df, scorer, healthy, condition_key, data_version)),
+            (f'{condition_key}.distribution', partial(cached_distribution, chart_cache, df, condition_key, data_version)),
+            (f'{condition_key}.pca_scatter',
+             partial(cached_pca_png, chart_cache, df, projections, condition_key, data_version)),
+        ]
+    return Warmup(steps, app='cluster_app').start()
+
+
+# Searching reruns only this fragment; the index answers each query without scanning df
+@st.fragment
+def food_search_section(search_index, df, scorer):
+    with fragment_span('section.food_search', app='cluster_app'):
+        query = st.text_input("Search foods", key='food_search_query',
+                              placeholder="e.g. masala dosa (typos are fine)")
+        if query:
+            matches = search_index.search(query, k=20, scorer=scorer, labels=df[list(label_map.values())])
+            if matches.empty:
+                st.info("No foods match your search.")
+            else:
+                st.dataframe(matches, use_container_width=True, hide_index=True)
+
+
+# Cold-start phases already reported by this process
+@st.cache_resource
+def load_startup_phases():
+    return set()
+
+
+def report_startup(phase, seconds):
+    phases = load_startup_phases()
+    if phase not in phases:
+        phases.add(phase)
+        record_startup('cluster_app', phase, seconds)
+
+
+# --------------------------------------------
+# Streamlit UI starts here
+
+st.set_page_config(page_title="Health-Based Food Recommender", layout="wide")
+
+begin_rerun(streamlit_session_id(), app='cluster_app')
+with span('data.open_store'):
+    store = open_store("Labeled_Data.csv")
+with span('data.load_view'):
+    df, scorer, projections, healthy = load_view("Labeled_Data.csv", store.store_dir, store.version)
+report_startup('imports', import_seconds)
+if os.environ.get('FOOD_APP_WARMUP', '1') != '0':
+    start_warmup("Labeled_Data.csv", store.store_dir, store.version)
+
+st.title("🥗 Smart Health-Based Food Recommendation System")
+
+# User Input
+age = st.slider("Select Age", 10, 90, 25)
+gender = st.radio("Select Gender", ["Male", "Female"])
+condition = st.selectbox("Choose Health Condition", ["Diabetes", "Obesity", "High_BP", "Low_BP"])
+condition_key = condition.lower()
+result_cache, chart_cache = load_result_cache(), load_chart_cache()
+
+# Recommendation
+with span('section.recommendations'):
+    st.subheader(f"🔍 Top 10 Foods Recommended for {condition}")
+    with span('compute.recommend_top_foods_by_cluster'):
+        top_foods, compare_df = cached_recommendations(result_cache, df, scorer, healthy, condition_key, store.version)
+    st.dataframe(top_foods, use_container_width=True)
+
+# Cluster Summary
+with span('section.cluster_distribution'):
+    st.subheader("🧬 Health Cluster Distribution")
+    spec = cached_distribution(chart_cache, df, condition_key, store.version)
+    st.vega_lite_chart(spec, use_container_width=True)
+
+# 3D PCA Plot (projection precomputed per data version)
+with span('section.pca_plot'):
+    st.subheader("📊 3D PCA Clustering Visualization")
+    png = cached_pca_png(chart_cache, df, projections, condition_key, store.version)
+    st.image(png)
+
+# Silhouette Score
+with span('section.silhouette'):
+    silhouette_avg = projections[condition_key]['silhouette']
+    if np.isnan(silhouette_avg):
+        st.warning("Silhouette score could not be calculated. Check clusters.")
+    else:
+        st.metric("Silhouette Score", f"{silhouette_avg:.4f}")
+
+# Dataset Viewer
+with span('section.full_table'):
+    st.subheader("📋 Full Dataset (Explore Nutrients)")
+    food_search_section(load_search("Labeled_Data.csv", store.store_dir, store.version), df, scorer)
+    with st.expander("Click to Expand Table"):
+        st.dataframe(df[table_columns])
+
+# Nutrient Comparison Bar Chart
+with span('section.macronutrients'):
+    st.subheader("📉 Macronutrient Comparison of Recommended Foods")
+    st.bar_chart(compare_df)
+
+st.markdown("---")
+st.caption("Built using Streamlit • Dataset: Custom Nutrition Data • Clustering: Fuzzy C-Means")
+# From the first line of the first run to its last element
+report_startup('first_paint', time.perf_counter() - _script_start)
+end_rerun()
@@ -0,0 +1,212 @@
+"""
+Cluster-quality metrics that scale past the size where silhouette_score fits in memory.
+
+    - fuzzy_partition_coefficient, partition_entropy: from the memberships u.
+    - xie_beni: compactness / separation of a fuzzy partition.
+    - silhouette_values: exact per-row silhouette computed in row x block tiles,
+      so memory is O(chunk_size * block_size) instead of an n x n matrix.
+    - sampled_silhouette: mean silhouette of a random sample with a confidence
+      interval; exact when the sample covers every row.
+
+evaluate_conditions reports all of them for every Health_Label_* clustering
+in one pass, using the persisted condition models for the PCA space and
+memberships.
+
+Usage:
+    python cluster_metrics.py Labeled_Data.csv --models-dir models
+"""
+import argparse
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+SilhouetteEstimate = namedtuple('SilhouetteEstimate', ['mean', 'low', 'high', 'n_sampled', 'n_total'])
+
+DEFAULT_CHUNK_SIZE = 1024
+DEFAULT_BLOCK_SIZE = 8192
+
+
+def fuzzy_partition_coefficient(u):
+    """FPC = sum(u^2) / n, in [1/c, 1]; 1 means a crisp partition. u is (c, n)."""
+    return float(np.sum(np.square(u, dtype=np.float64)) / u.shape[1])
+
+
+def partition_entropy(u):
+    """PE = -sum(u log u) / n, in [0, log c]; lower is crisper. u is (c, n)."""
+    u = np.asarray(u, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(u > 0, u * np.log(u), 0.0)
+    return float(-terms.sum() / u.shape[1])
+
+
+def xie_beni(data, u, centers, m=2.0, chunk_size=65536):
+    """
+    Xie-Beni index: sum(u^m * ||x - v||^2) / (n * min_{i != j} ||v_i - v_j||^2). Lower is better.
+
+    Parameters:
+        data (np.ndarray): (n, p) samples.
+        u (np.ndarray): (c, n) memberships.
+        centers (np.ndarray): (c, p) cluster centers.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    compactness = 0.0
+    for start in range(0, len(data), chunk_size):
+        block = data[start:start + chunk_size]
+        d2 = ((block[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        compactness += float((u[:, start:start + chunk_size].T ** m * d2).sum())
+    center_d2 = ((centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    np.fill_diagonal(center_d2, np.inf)
+    separation = center_d2.min()
+    if not np.isfinite(separation) or separation == 0:
+        return float('inf')
+    return compactness / (len(data) * separation)
+
+
+def _silhouette_chunk(data, codes, counts, rows, block_size):
+    k = len(counts)
+    sums = np.zeros((len(rows), k))
+    x = data[rows]
+    x_sq = (x * x).sum(axis=1)[:, None]
+    for start in range(0, len(data), block_size):
+        block = data[start:start + block_size]
+        d2 = x_sq - 2.0 * (x @ block.T) + (block * block).sum(axis=1)[None, :]
+        np.maximum(d2, 0.0, out=d2)
+        dist = np.sqrt(d2)
+        onehot = np.zeros((len(block), k))
+        onehot[np.arange(len(block)), codes[start:start + block_size]] = 1.0
+        sums += dist @ onehot
+
+    own = codes[rows]
+    own_counts = counts[own] - 1
+    a = np.divide(sums[np.arange(len(rows)), own], own_counts, out=np.zeros(len(rows)), where=own_counts > 0)
+    other = sums / np.maximum(counts, 1)[None, :]
+    other[np.arange(len(rows)), own] = np.inf
+    b = other.min(axis=1)
+    s = np.where(np.maximum(a, b) > 0, (b - a) / np.maximum(a, b), 0.0)
+    # Same convention as sklearn: rows in singleton clusters score 0
+    s[own_counts == 0] = 0.0
+    return s
+
+
+def silhouette_values(data, labels, rows=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                      block_size=DEFAULT_BLOCK_SIZE, n_jobs=None):
+    """
+    Exact silhouette of the given rows (all rows by default) against the full data.
+
+    Rows are processed in chunks, each chunk compared with the data in blocks,
+    and chunks run in parallel threads. Never materialises an n x n matrix.
+
+    Returns:
+        np.ndarray: Silhouette value per requested row.
+    """
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    _, codes = np.unique(np.asarray(labels), return_inverse=True)
+    counts = np.bincount(codes)
+    if len(counts) < 2:
+        raise ValueError("Silhouette needs at least two clusters")
+    rows = np.arange(len(data)) if rows is None else np.asarray(rows)
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    def run(chunk):
+        return _silhouette_chunk(data, codes, counts, chunk, block_size)
+
+    n_jobs = n_jobs or min(len(chunks), os.cpu_count() or 1)
+    if n_jobs <= 1 or len(chunks) == 1:
+        parts = [run(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(run, chunks))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def sampled_silhouette(data, labels, sample_size=2000, seed=0, confidence=0.95, **kwargs):
+    """
+    Mean silhouette estimated from a uniform sample of rows, with a normal-approximation
+    confidence interval (finite-population corrected). Exact when sample_size >= n.
+
+    Returns:
+        SilhouetteEstimate: mean, low, high, n_sampled, n_total.
+    """
+    n = len(data)
+    if sample_size is None or sample_size >= n:
+        values = silhouette_values(data, labels, **kwargs)
+        mean = float(values.mean())
+        return SilhouetteEstimate(mean, mean, mean, n, n)
+
+    rows = np.sort(np.random.default_rng(seed).choice(n, size=sample_size, replace=False))
+    values = silhouette_values(data, labels, rows=rows, **kwargs)
+    mean = float(values.mean())
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    correction = np.sqrt((n - sample_size) / (n - 1))
+    half_width = z * values.std(ddof=1) / np.sqrt(sample_size) * correction
+    return SilhouetteEstimate(mean, float(mean - half_width), float(mean + half_width), sample_size, n)
+
+
+def evaluate_partition(data, labels, u=None, centers=None, m=2.0, sample_size=2000, seed=0, n_jobs=None):
+    """All metrics for one clustering; the fuzzy ones only when u (and centers) are given."""
+    metrics = {'n': len(data)}
+    if u is not None:
+        metrics['fpc'] = fuzzy_partition_coefficient(u)
+        metrics['partition_entropy'] = partition_entropy(u)
+        if centers is not None:
+            metrics['xie_beni'] = xie_beni(data, u, centers, m)
+    try:
+        estimate = sampled_silhouette(data, labels, sample_size, seed, n_jobs=n_jobs)
+        metrics.update({
+            'silhouette': estimate.mean,
+            'silhouette_low': estimate.low,
+            'silhouette_high': estimate.high,
+            'silhouette_n': estimate.n_sampled,
+        })
+    except ValueError:
+        metrics['silhouette'] = float('nan')
+    return metrics
+
+
+def evaluate_conditions(df, models, sample_size=2000, seed=0, n_jobs=None):
+    """
+    Scores every condition's clustering of df in one pass.
+
+    Parameters:
+        df (pd.DataFrame): Labeled foods (original units) with Health_Label_* columns.
+        models (dict): Condition -> ConditionModel, e.g. models.load_models().
+
+    Returns:
+        pd.DataFrame: One row of metrics per condition.
+    """
+    from preprocessing import convert_units
+
+    converted = convert_units(df)
+    rows = []
+    for condition, model in models.items():
+        data = model.project(converted)
+        u = model.memberships(converted)
+        labels = df[model.label_column].to_numpy() if model.label_column in df else np.argmax(u, axis=0)
+        metrics = evaluate_partition(data, labels, u, model.centers, model.m, sample_size, seed, n_jobs)
+        rows.append({'condition': condition, 'label_column': model.label_column, **metrics})
+    return pd.DataFrame(rows)
+
+
+def main():
+    from models import DEFAULT_MODELS_DIR, load_models
+
+    parser = argparse.ArgumentParser(description="Report cluster-quality metrics for every Health_Label_* clustering.")
+    parser.add_argument('csv_path', nargs='?', default='Labeled_Data.csv')
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR)
+    parser.add_argument('--sample-size', type=int, default=2000, help="Silhouette sample size (0 for exact)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv_path)
+    report = evaluate_conditions(df, load_models(args.models_dir), args.sample_size or None, args.seed, args.jobs)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == '__main__':
+    main()
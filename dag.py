@@ -0,0 +1,226 @@
+"""
+Content-addressed stage graph with an on-disk cache.
+
+A DAG is a list of named stages, each a function of earlier stages' outputs
+and JSON-serializable params. Every output is stored under a hash of what
+produced it, so rerunning the graph recomputes only stages whose inputs or
+params changed:
+
+    - 'global' stages (fits, quantiles) are cached whole under a hash of their
+      name, version, params and input keys. Their own key is the hash of the
+      value they return, so a refit that gives the same result (e.g. unchanged
+      min/max after adding a row) does not invalidate anything downstream.
+    - 'rows' stages are row-local: their first input is a Rows table whose rows
+      carry content hashes. It is cut into content-defined chunks (a chunk ends
+      after a row whose hash is 0 mod chunk_rows), and every chunk is cached
+      separately. Editing a few rows recomputes only the chunks holding them;
+      inserting or deleting rows does not shift the other chunk boundaries.
+    - 'select' stages return a row mask and are never cached (cheap glue).
+
+run() returns every output and a StageRecord per stage: hit, miss or partial
+(rows stages with some chunks recomputed), chunk counts and seconds.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+Rows = namedtuple('Rows', ['values', 'hashes'])
+StageRecord = namedtuple('StageRecord', ['stage', 'kind', 'status', 'chunks_computed', 'chunks_total', 'seconds'])
+
+DEFAULT_CHUNK_ROWS = 256
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def digest(*parts):
+    """sha256 of JSON-serializable parts and bytes."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (bytes, bytearray, memoryview)):
+            part = json.dumps(part, sort_keys=True, default=str).encode('utf-8')
+        h.update(part)
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def row_hashes(df):
+    """uint64 content hash of every row (the index is ignored, so moved rows keep their hash)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def source_rows(df):
+    return Rows(df, row_hashes(df))
+
+
+def derive_hashes(hashes, salt):
+    """Row hashes of a row-local stage's output: each input row hash mixed with the stage's identity."""
+    mixed = (hashes ^ np.uint64(int(salt[:16], 16))) * _MIX
+    return mixed ^ (mixed >> np.uint64(31))
+
+
+def content_chunks(hashes, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(start, stop) row ranges ending after rows whose hash is 0 mod chunk_rows, at most 4 * chunk_rows long."""
+    ends = np.flatnonzero(hashes % np.uint64(chunk_rows) == 0) + 1
+    chunks, start = [], 0
+    for end in list(ends) + [len(hashes)]:
+        while end - start > 4 * chunk_rows:
+            chunks.append((start, start + 4 * chunk_rows))
+            start += 4 * chunk_rows
+        if end > start:
+            chunks.append((start, int(end)))
+            start = int(end)
+    return chunks
+
+
+def _take(values, rows):
+    if isinstance(values, (pd.DataFrame, pd.Series)):
+        return values.iloc[rows]
+    return values[rows]
+
+
+def _concat(parts):
+    if isinstance(parts[0], (pd.DataFrame, pd.Series)):
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+    return np.concatenate(parts)
+
+
+class ArtifactStore:
+    """Pickled stage outputs under root/<stage>/<key>.pkl, written atomically."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, stage, key):
+        return os.path.join(self.root, stage, key + '.pkl')
+
+    def get(self, stage, key):
+        try:
+            with open(self.path(stage, key), 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def put(self, stage, key, value):
+        directory = os.path.join(self.root, stage)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.artifact-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(stage, key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class DAG:
+    """
+    Stages run in the order they were added; inputs name earlier stages or sources.
+
+    Parameters:
+        store (ArtifactStore): Where outputs are cached.
+        chunk_rows (int): Average rows per chunk of a rows stage.
+    """
+
+    def __init__(self, store, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.store = store
+        self.chunk_rows = chunk_rows
+        self.stages = OrderedDict()
+
+    def add(self, name, func, inputs=(), params=None, version=1, kind='global'):
+        """
+        Adds a stage.
+
+        Parameters:
+            func: global: func(*inputs, **params) -> value (Rows inputs arrive as their values).
+                rows: func(chunk of the first input, *other inputs, **params) -> one output row per input row.
+                select: func(*inputs) -> bool mask over the first input's rows.
+            version (int): Bump when func's behaviour changes to invalidate its cache.
+        """
+        if kind not in ('global', 'rows', 'select'):
+            raise ValueError(f"Unknown stage kind {kind!r}")
+        self.stages[name] = (func, list(inputs), dict(params or {}), version, kind)
+        return self
+
+    def run(self, sources):
+        """
+        Runs every stage.
+
+        Parameters:
+            sources (dict): Name -> Rows (see source_rows) or any picklable value.
+
+        Returns:
+            tuple: ({name: output; rows and select stages give Rows}, [StageRecord])
+        """
+        outputs, keys, report = dict(sources), {}, []
+        for name, value in sources.items():
+            keys[name] = digest('rows', value.hashes.tobytes()) if isinstance(value, Rows) \
+                else digest(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+        for name, (func, inputs, params, version, kind) in self.stages.items():
+            start = time.perf_counter()
+            identity = digest(name, version, params, [keys[i] for i in inputs])
+            values = [outputs[i].values if isinstance(outputs[i], Rows) else outputs[i] for i in inputs]
+
+            if kind == 'global':
+                found, cached = self.store.get(name, identity)
+                if found:
+                    keys[name], outputs[name] = cached
+                    status, computed, total = 'hit', 0, 1
+                else:
+                    value = func(*values, **params)
+                    keys[name] = digest(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                    outputs[name] = value
+                    self.store.put(name, identity, (keys[name], value))
+                    status, computed, total = 'miss', 1, 1
+
+            elif kind == 'select':
+                rows = outputs[inputs[0]]
+                mask = np.asarray(func(*values), dtype=bool)
+                outputs[name] = Rows(_take(rows.values, mask), rows.hashes[mask])
+                keys[name] = digest('rows', outputs[name].hashes.tobytes())
+                status, computed, total = 'run', 0, 0
+
+            else:
+                rows = outputs[inputs[0]]
+                # The chunk key leaves out the first input's key: only the chunk's own rows matter
+                salt = digest(name, version, params, [keys[i] for i in inputs[1:]])
+                parts, computed = [], 0
+                chunks = content_chunks(rows.hashes, self.chunk_rows)
+                for begin, end in chunks:
+                    chunk_key = digest(salt, rows.hashes[begin:end].tobytes())
+                    chunk = _take(rows.values, slice(begin, end))
+                    found, part = self.store.get(name, chunk_key)
+                    if not found:
+                        part = func(chunk, *values[1:], **params)
+                        self.store.put(name, chunk_key, part)
+                        computed += 1
+                    if isinstance(part, (pd.DataFrame, pd.Series)):
+                        part = part.set_axis(chunk.index, axis=0)
+                    parts.append(part)
+                total = len(chunks)
+                if not parts:
+                    parts = [func(_take(rows.values, slice(0, 0)), *values[1:], **params)]
+                outputs[name] = Rows(_concat(parts), derive_hashes(rows.hashes, salt))
+                keys[name] = digest('rows', outputs[name].hashes.tobytes())
+                status = 'hit' if computed == 0 else 'miss' if computed == total else 'partial'
+
+            report.append(StageRecord(name, kind, status, computed, total, time.perf_counter() - start))
+        return outputs, report
+
+
+def format_report(report):
+    lines = [f"{'stage':<28} {'kind':<7} {'status':<8} {'chunks':>9} {'ms':>9}"]
+    for record in report:
+        chunks = f"{record.chunks_computed}/{record.chunks_total}" if record.kind == 'rows' else ''
+        lines.append(f"{record.stage:<28} {record.kind:<7} {record.status:<8} {chunks:>9} {record.seconds * 1e3:>9.1f}")
+    counts = {status: sum(r.status == status for r in report) for status in ('hit', 'partial', 'miss')}
+    lines.append(f"{counts['hit']} hits, {counts['partial']} partial, {counts['miss']} misses")
+    return '\n'.join(lines)
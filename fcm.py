@@ -0,0 +1,147 @@
+"""
+Vectorized fuzzy c-means.
+
+Drop-in replacement for skfuzzy.cluster.cmeans as used by the labeling
+pipeline, with:
+    - rows processed in chunks sized to a fixed per-iteration memory budget,
+    - float32 or float64 arithmetic,
+    - seeded, reproducible initialisation,
+    - several random restarts run in parallel threads (NumPy releases the GIL),
+    - warm starts from previously fitted centers.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+FCMResult = namedtuple('FCMResult', ['centers', 'u', 'n_iter', 'objective', 'fpc', 'converged'])
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of temporaries per iteration
+
+# Temporaries per (row, cluster) cell in one chunk: distances, powers, memberships, u**m
+_CELLS_PER_ENTRY = 5
+
+
+def chunk_rows(n_features, c, dtype, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Number of rows processed at once so the per-iteration temporaries fit in memory_budget."""
+    itemsize = np.dtype(dtype).itemsize
+    per_row = itemsize * (_CELLS_PER_ENTRY * c + 2 * n_features)
+    return max(1, int(memory_budget // per_row))
+
+
+def memberships(data, centers, m=2.0, chunk_size=None, out=None):
+    """
+    Computes the fuzzy membership of every row to every center.
+
+    Parameters:
+        data (np.ndarray): (n_samples, n_features) array.
+        centers (np.ndarray): (c, n_features) array.
+        m (float): Fuzzifier, > 1.
+
+    Returns:
+        np.ndarray: (c, n_samples) memberships, same layout as skfuzzy's u.
+    """
+    n = data.shape[0]
+    c = centers.shape[0]
+    chunk_size = chunk_size or chunk_rows(data.shape[1], c, data.dtype)
+    u = out if out is not None else np.empty((c, n), dtype=data.dtype)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        u[:, start:stop] = _chunk_memberships(data[start:stop], centers, m)[0].T
+    return u
+
+
+def _chunk_memberships(block, centers, m):
+    # Squared distances via |x|^2 - 2x.c + |c|^2, floored to avoid division by zero
+    d2 = (block * block).sum(axis=1)[:, None] - 2.0 * (block @ centers.T) + (centers * centers).sum(axis=1)[None, :]
+    np.maximum(d2, np.finfo(block.dtype).eps, out=d2)
+    inv = d2 ** (-1.0 / (m - 1.0))
+    u = inv / inv.sum(axis=1, keepdims=True)
+    return u, d2
+
+
+def _initial_centers(data, c, rng):
+    rows = rng.choice(data.shape[0], size=c, replace=False)
+    return data[rows].copy()
+
+
+def _fit_once(data, c, m, error, maxiter, centers, chunk_size):
+    n, p = data.shape
+    u = np.empty((c, n), dtype=data.dtype)
+    n_iter = 0
+    converged = False
+    objective = np.inf
+
+    for n_iter in range(1, maxiter + 1):
+        numerator = np.zeros((c, p), dtype=np.float64)
+        denominator = np.zeros(c, dtype=np.float64)
+        objective = 0.0
+        change = 0.0
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            block = data[start:stop]
+            u_block, d2 = _chunk_memberships(block, centers, m)
+            if n_iter > 1:
+                change += float(((u_block.T - u[:, start:stop]) ** 2).sum())
+            u[:, start:stop] = u_block.T
+            um = u_block ** m
+            numerator += um.T @ block
+            denominator += um.sum(axis=0)
+            objective += float((um * d2).sum())
+
+        centers = (numerator / np.maximum(denominator, np.finfo(np.float64).tiny)[:, None]).astype(data.dtype)
+        if n_iter > 1 and np.sqrt(change) < error:
+            converged = True
+            break
+
+    return centers, u, n_iter, objective, converged
+
+
+def cmeans(data, c, m=2.0, error=0.005, maxiter=1000, init_centers=None, seed=None,
+           n_init=1, n_jobs=None, dtype=np.float64, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Fits fuzzy c-means.
+
+    Parameters:
+        data (np.ndarray): (n_samples, n_features) array. Note: unlike skfuzzy this is not transposed.
+        c (int): Number of clusters.
+        m (float): Fuzzifier.
+        error (float): Stop when the Frobenius norm of the membership change falls below this.
+        maxiter (int): Maximum number of iterations per run.
+        init_centers (np.ndarray): (c, n_features) warm-start centers; disables random restarts.
+        seed (int): Seed for the random initialisation of every restart.
+        n_init (int): Number of random restarts; the run with the lowest objective is kept.
+        n_jobs (int): Threads used for the restarts (default: min(n_init, CPU count)).
+        dtype: np.float32 or np.float64.
+        memory_budget (int): Bytes of per-iteration temporaries; sets the row chunk size.
+
+    Returns:
+        FCMResult: centers (c, n_features), u (c, n_samples), n_iter, objective, fpc, converged.
+    """
+    data = np.ascontiguousarray(data, dtype=dtype)
+    if data.ndim != 2:
+        raise ValueError("data must be a 2-D (n_samples, n_features) array")
+    if c > data.shape[0]:
+        raise ValueError(f"Cannot fit {c} clusters to {data.shape[0]} samples")
+    chunk_size = chunk_rows(data.shape[1], c, dtype, memory_budget)
+
+    if init_centers is not None:
+        starts = [np.array(init_centers, dtype=dtype)]
+    else:
+        generators = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_init)]
+        starts = [_initial_centers(data, c, rng) for rng in generators]
+
+    def run(centers):
+        return _fit_once(data, c, m, error, maxiter, centers, chunk_size)
+
+    n_jobs = n_jobs or min(len(starts), os.cpu_count() or 1)
+    if len(starts) == 1 or n_jobs == 1:
+        runs = [run(centers) for centers in starts]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            runs = list(pool.map(run, starts))
+
+    centers, u, n_iter, objective, converged = min(runs, key=lambda r: r[3])
+    fpc = float((u.astype(np.float64) ** 2).sum() / u.shape[1])
+    return FCMResult(centers, u, n_iter, objective, fpc, converged)
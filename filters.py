@@ -0,0 +1,232 @@
+"""
+Hard nutrient and health-label constraints on recommendations.
+
+A FilterIndex is built once per data version from the shared food matrix:
+
+    - every filterable nutrient column is argsorted, so a range predicate
+      (sodium_mg < 120) is a contiguous slice of row ids found by one or two
+      binary searches;
+    - every Health_Label_* value has a packed bitmap, so a label predicate
+      (Health_Label_HighBP == healthy) is a bit test per row.
+
+rows() resolves a conjunction without a pass over the full table: the most
+selective predicate (its size is known from the binary searches alone)
+supplies the candidate row ids, and the other predicates are only checked on
+those rows. The ranking then scores just the surviving rows.
+
+Missing nutrient values are 0 in the shared matrix, so they pass "<" limits.
+
+Usage:
+    python filters.py Labeled_Data.csv diabetes "sodium_mg < 120" "fibre_g >= 5" "Health_Label_HighBP == healthy"
+"""
+import argparse
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+
+Predicate = namedtuple('Predicate', ['column', 'op', 'value'])
+
+numeric_ops = ('<', '<=', '>', '>=', '==')
+label_ops = ('==', '!=')
+
+_PREDICATE = re.compile(r'^\s*(\w+)\s*(<=|>=|==|!=|<|>|=)\s*(\S+)\s*$')
+
+_compare = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+
+def parse_predicate(text, healthy_clusters=None):
+    """
+    Parses "column op value", e.g. "sodium_mg < 120" or "Health_Label_HighBP == healthy".
+
+    Parameters:
+        healthy_clusters (dict): Health_Label_* column -> healthy cluster label,
+            used for the value 'healthy' (models.healthy_clusters).
+    """
+    match = _PREDICATE.match(text)
+    if not match:
+        raise ValueError(f"Cannot parse filter {text!r}; expected e.g. 'sodium_mg < 120'")
+    column, op, value = match.groups()
+    op = '==' if op == '=' else op
+    is_label = column.startswith('Health_Label_')
+    if value.lower() == 'healthy':
+        if not is_label:
+            raise ValueError(f"'healthy' only applies to Health_Label_* columns ({text!r})")
+        if healthy_clusters is None:
+            raise ValueError(f"'healthy' needs the models' healthy clusters ({text!r})")
+        try:
+            return Predicate(column, op, int(healthy_clusters[column]))
+        except KeyError:
+            raise ValueError(f"No healthy cluster recorded for {column} ({text!r})") from None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"Filter value {value!r} is not a number") from None
+    if is_label:
+        if not number.is_integer():
+            raise ValueError(f"{column} values are cluster numbers, not {value!r}")
+        return Predicate(column, op, int(number))
+    return Predicate(column, op, number)
+
+
+def parse_filters(text, healthy_clusters=None):
+    """Comma- or newline-separated predicates; blank input gives no predicates."""
+    parts = [part for part in re.split(r'[,\n]', text or '') if part.strip()]
+    return tuple(parse_predicate(part, healthy_clusters) for part in parts)
+
+
+class FilterIndex:
+    """
+    Sorted nutrient columns and label bitmaps over a NaN-free food matrix.
+
+    Parameters:
+        matrix (np.ndarray): (n_foods, n_nutrients), e.g. SharedMatrix.nutrients.
+        nutrients (list): Column names of matrix.
+        labels (dict): Health_Label_* column -> (n_foods,) cluster labels.
+        columns (list): Nutrients to index (default all); only these can be filtered on.
+    """
+
+    def __init__(self, matrix, nutrients, labels=None, columns=None):
+        self.matrix = matrix
+        self.n = len(matrix)
+        self.column_index = {column: j for j, column in enumerate(nutrients)}
+        self.sorted_rows = {}
+        self.sorted_values = {}
+        for column in (nutrients if columns is None else columns):
+            if column not in self.column_index:
+                continue
+            values = np.asarray(matrix[:, self.column_index[column]], dtype=np.float64)
+            order = np.argsort(values, kind='stable').astype(np.int32)
+            self.sorted_rows[column] = order
+            self.sorted_values[column] = values[order]
+
+        self.bitmaps = {}
+        self.bitmap_counts = {}
+        for column, values in (labels or {}).items():
+            values = np.asarray(values)
+            for label in np.unique(values):
+                bits = values == label
+                self.bitmaps[column, int(label)] = np.packbits(bits)
+                self.bitmap_counts[column, int(label)] = int(bits.sum())
+        self.label_columns = sorted({column for column, _ in self.bitmaps})
+
+    @property
+    def columns(self):
+        return list(self.sorted_rows) + self.label_columns
+
+    def _check(self, predicate):
+        column, op, _ = predicate
+        if column in self.sorted_rows:
+            if op not in numeric_ops:
+                raise ValueError(f"{column} supports {', '.join(numeric_ops)}, not {op!r}")
+        elif column in self.label_columns:
+            if op not in label_ops:
+                raise ValueError(f"{column} supports {', '.join(label_ops)}, not {op!r}")
+            if not float(predicate.value).is_integer():
+                raise ValueError(f"{column} values are cluster numbers, not {predicate.value!r}")
+        else:
+            raise ValueError(f"Cannot filter on {column!r}; indexed columns: {', '.join(self.columns)}")
+
+    def _span(self, predicate):
+        """[lo, hi) of the predicate's rows in the column's sorted order."""
+        column, op, value = predicate
+        values = self.sorted_values[column]
+        if op == '<':
+            return 0, int(np.searchsorted(values, value, 'left'))
+        if op == '<=':
+            return 0, int(np.searchsorted(values, value, 'right'))
+        if op == '>':
+            return int(np.searchsorted(values, value, 'right')), self.n
+        if op == '>=':
+            return int(np.searchsorted(values, value, 'left')), self.n
+        return int(np.searchsorted(values, value, 'left')), int(np.searchsorted(values, value, 'right'))
+
+    def count(self, predicate):
+        """Rows matching one predicate, from the index alone."""
+        self._check(predicate)
+        column, op, value = predicate
+        if column in self.sorted_rows:
+            lo, hi = self._span(predicate)
+            return hi - lo
+        matching = self.bitmap_counts.get((column, int(value)), 0)
+        return matching if op == '==' else self.n - matching
+
+    def _bits(self, column, label, rows):
+        bitmap = self.bitmaps.get((column, int(label)))
+        if bitmap is None:
+            return np.zeros(len(rows), dtype=bool)
+        return ((bitmap[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+    def _materialize(self, predicate):
+        column, op, value = predicate
+        if column in self.sorted_rows:
+            lo, hi = self._span(predicate)
+            return np.sort(self.sorted_rows[column][lo:hi]).astype(np.intp)
+        bitmap = self.bitmaps.get((column, int(value)))
+        bits = np.unpackbits(bitmap, count=self.n).astype(bool) if bitmap is not None \
+            else np.zeros(self.n, dtype=bool)
+        return np.flatnonzero(bits if op == '==' else ~bits)
+
+    def _keep(self, predicate, rows):
+        column, op, value = predicate
+        if column in self.sorted_rows:
+            values = np.asarray(self.matrix[rows, self.column_index[column]], dtype=np.float64)
+            return _compare[op](values, value)
+        bits = self._bits(column, value, rows)
+        return bits if op == '==' else ~bits
+
+    def rows(self, predicates):
+        """
+        Row positions (ascending) matching every predicate; all rows when there are none.
+
+        Raises:
+            ValueError: For a column that is not indexed or an operator it does not support.
+        """
+        if not predicates:
+            return np.arange(self.n)
+        by_size = sorted(predicates, key=self.count)
+        rows = self._materialize(by_size[0])
+        for predicate in by_size[1:]:
+            if not len(rows):
+                break
+            rows = rows[self._keep(predicate, rows)]
+        return rows
+
+
+def main():
+    from food_store import open_store
+    from models import healthy_clusters
+    from scoring import FoodScorer, scoring_columns
+    from shared_matrix import attach_shared
+
+    parser = argparse.ArgumentParser(description="Top foods for a condition among foods meeting hard limits.")
+    parser.add_argument('csv_path')
+    parser.add_argument('condition')
+    parser.add_argument('filters', nargs='*', help="Predicates such as 'sodium_mg < 120'")
+    parser.add_argument('--top-n', type=int, default=10)
+    args = parser.parse_args()
+
+    store = open_store(args.csv_path)
+    shared = attach_shared(args.csv_path, store=store)
+    scorer = FoodScorer.from_matrix(shared.nutrients, shared.nutrient_columns, shared.food_names)
+    index = FilterIndex(shared.nutrients, shared.nutrient_columns, shared.labels, columns=scoring_columns()[1:])
+    predicates = tuple(parse_predicate(text, healthy_clusters()) for text in args.filters)
+
+    start = time.perf_counter()
+    rows = index.rows(predicates)
+    frame = scorer.recommend(args.condition, args.top_n, rows=rows)
+    elapsed = time.perf_counter() - start
+    print(frame.to_string())
+    print(f"{len(rows)} of {index.n} foods match; filtered and ranked in {elapsed * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
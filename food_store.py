@@ -0,0 +1,325 @@
+"""
+Binary columnar store for the food tables.
+
+`convert_csv` turns a CSV (Labeled_Data.csv, DataCleaned.csv) into a directory
+with one raw .npy file per numeric column and a code array plus string table
+per text column. `open_store` memory-maps it, rebuilding only when the source
+CSV has changed, so a Streamlit rerun never re-parses the CSV.
+
+Every conversion writes its own version directory and then flips the
+CURRENT pointer with os.replace, as shared_matrix.py does:
+
+    Labeled_Data.store/
+        CURRENT                  name of the live version
+        <version>/manifest.json  columns, row count and source signature
+        <version>/c0000.npy ...
+
+Readers always find a complete store without locking. Conversions take the
+store's LOCK file, so when several server processes find the same stale CSV,
+one converts and the others reuse its result. Only the newest KEEP_VERSIONS
+versions are kept; a FoodStore maps or reads all of its version's files when
+it is opened, so a long-lived view keeps working after its version is removed.
+
+Usage:
+    python food_store.py Labeled_Data.csv DataCleaned.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+LOCK = 'LOCK'
+KEEP_VERSIONS = 2
+STRING_SEPARATOR = '\x00'
+
+
+def default_store_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + '.store'
+
+
+def version_name(source_sha256):
+    return f"v{FORMAT_VERSION}-{source_sha256[:16]}"
+
+
+def current_dir(store_dir):
+    """The live version directory of store_dir (store_dir itself if it holds no CURRENT pointer)."""
+    try:
+        with open(os.path.join(store_dir, CURRENT)) as f:
+            return os.path.join(store_dir, f.read().strip())
+    except OSError:
+        return store_dir
+
+
+@contextmanager
+def conversion_lock(store_dir):
+    """Exclusive lock on store_dir/LOCK, held while a new version is written and published."""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK), 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ten seconds
+                    pass
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_string_column(store_dir, file_stem, values):
+    codes, categories = pd.factorize(values, use_na_sentinel=True)
+    for category in categories:
+        if STRING_SEPARATOR in str(category):
+            raise ValueError(f"String value contains the table separator: {category!r}")
+    np.save(os.path.join(store_dir, file_stem + '.codes.npy'), codes.astype(np.int32))
+    with open(os.path.join(store_dir, file_stem + '.table'), 'wb') as f:
+        f.write(STRING_SEPARATOR.join(str(c) for c in categories).encode('utf-8'))
+    return len(categories)
+
+
+def convert_csv(csv_path, store_dir=None, force=True):
+    """
+    Converts a CSV file to the binary columnar store.
+
+    Parameters:
+        csv_path (str): Source CSV file.
+        store_dir (str): Output directory, defaults to '<csv stem>.store'.
+        force (bool): Convert even if another process brought the store up to
+            date while this one waited for the lock.
+
+    Returns:
+        str: The store directory.
+    """
+    store_dir = store_dir or default_store_dir(csv_path)
+    with conversion_lock(store_dir):
+        if force or not is_fresh(csv_path, store_dir):
+            _convert_locked(csv_path, store_dir)
+    return store_dir
+
+
+def _convert_locked(csv_path, store_dir):
+    signature = source_signature(csv_path)
+    source_sha256 = file_sha256(csv_path)
+    df = pd.read_csv(csv_path)
+
+    # Unique per conversion, so a reconversion of the same data never overwrites a version in use
+    name = f"{version_name(source_sha256)}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = tempfile.mkdtemp(prefix='.version-', dir=store_dir)
+    try:
+        columns = {}
+        for i, column in enumerate(df.columns):
+            file_stem = f"c{i:04d}"
+            series = df[column]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                np.save(os.path.join(tmp_dir, file_stem + '.npy'), series.to_numpy())
+                columns[column] = {'kind': 'numeric', 'file': file_stem, 'dtype': str(series.dtype)}
+            else:
+                n_categories = _write_string_column(tmp_dir, file_stem, series.to_numpy(dtype=object))
+                columns[column] = {'kind': 'string', 'file': file_stem, 'categories': n_categories}
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'source': os.path.abspath(csv_path),
+            'source_size': signature['size'],
+            'source_mtime_ns': signature['mtime_ns'],
+            'source_sha256': source_sha256,
+            'n_rows': len(df),
+            'columns': columns,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp_dir, os.path.join(store_dir, name))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Publish by flipping the pointer, so readers never see a partial or missing store
+    pointer_tmp = os.path.join(store_dir, f".{CURRENT}.{name}")
+    with open(pointer_tmp, 'w') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(store_dir, CURRENT))
+    _prune(store_dir, name)
+
+
+def _prune(store_dir, live):
+    """
+    Removes all but the newest KEEP_VERSIONS versions. Open FoodStores already
+    hold their files (see FoodStore), so they stay readable; where mapped files
+    cannot be removed (Windows) the version is left for a later prune.
+    """
+    others = [entry for entry in os.scandir(store_dir)
+              if entry.is_dir() and not entry.name.startswith('.') and entry.name != live]
+    others.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in others[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path, store_dir):
+    """
+    Checks whether the store still matches its source CSV.
+
+    A matching size and mtime is trusted as-is. If only the mtime moved
+    (e.g. the file was touched or re-checked-out) the content hash decides,
+    and the manifest is updated so the next check is cheap again.
+    """
+    store_dir = current_dir(store_dir)
+    manifest = _read_manifest(store_dir)
+    if manifest is None or manifest.get('format_version') != FORMAT_VERSION:
+        return False
+    signature = source_signature(csv_path)
+    if signature['size'] != manifest['source_size']:
+        return False
+    if signature['mtime_ns'] == manifest['source_mtime_ns']:
+        return True
+    if file_sha256(csv_path) != manifest['source_sha256']:
+        return False
+    manifest['source_mtime_ns'] = signature['mtime_ns']
+    tmp_path = os.path.join(store_dir, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST))
+    return True
+
+
+class FoodStore:
+    """
+    Read-only view over a converted store. Numeric columns and string codes
+    are memory-mapped and string tables read when the view is opened, so the
+    view does not depend on its version's files staying on disk; text columns
+    are decoded on first access. store_dir may be the store or one of its
+    versions; store_dir is then the version that was live when the view was
+    opened, which never changes.
+    """
+
+    def __init__(self, store_dir):
+        for attempt in range(3):
+            self.store_dir = current_dir(store_dir)
+            self.manifest = _read_manifest(self.store_dir)
+            try:
+                if self.manifest is None:
+                    raise FileNotFoundError(f"No food store at {store_dir}")
+                self._open_files()
+                break
+            except FileNotFoundError:
+                # A version pruned between reading CURRENT and opening its files; CURRENT has moved on
+                if attempt == 2 or self.store_dir == store_dir:
+                    raise
+        self.n_rows = self.manifest['n_rows']
+        self._strings = {}
+
+    def _open_files(self):
+        self._arrays = {}
+        self._tables = {}
+        for name, info in self.manifest['columns'].items():
+            if info['kind'] == 'numeric':
+                self._arrays[name] = np.load(self._path(name, '.npy'), mmap_mode='r')
+            else:
+                self._arrays[name] = np.load(self._path(name, '.codes.npy'), mmap_mode='r')
+                with open(self._path(name, '.table'), 'rb') as f:
+                    self._tables[name] = f.read()
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'].keys())
+
+    @property
+    def version(self):
+        """Content hash of the source CSV; changes whenever the data changes."""
+        return self.manifest['source_sha256']
+
+    def _path(self, name, suffix):
+        return os.path.join(self.store_dir, self.manifest['columns'][name]['file'] + suffix)
+
+    def column(self, name):
+        info = self.manifest['columns'][name]
+        if info['kind'] == 'numeric':
+            return self._arrays[name]
+        if name not in self._strings:
+            raw = self._tables[name].decode('utf-8')
+            table = np.array(raw.split(STRING_SEPARATOR) if info['categories'] else [], dtype=object)
+            # Code -1 marks a missing value; the appended None keeps it addressable
+            table = np.append(table, None)
+            self._strings[name] = table[self._arrays[name]]
+        return self._strings[name]
+
+    def frame(self, columns=None):
+        """
+        Returns a DataFrame with only the requested columns (all by default).
+        Numeric columns keep referencing the memory-mapped files.
+        """
+        columns = self.columns if columns is None else [c for c in columns if c in self.manifest['columns']]
+        return pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
+
+
+def open_store(csv_path, store_dir=None):
+    """
+    Opens the store for csv_path, converting the CSV first if the store is
+    missing or stale.
+    """
+    store_dir = store_dir or default_store_dir(csv_path)
+    if not is_fresh(csv_path, store_dir):
+        convert_csv(csv_path, store_dir, force=False)
+    return FoodStore(store_dir)
+
+
+def load_frame(csv_path, columns=None):
+    return open_store(csv_path).frame(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert food CSV files to the binary columnar store.")
+    parser.add_argument('csv_paths', nargs='+')
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the store is up to date")
+    args = parser.parse_args()
+
+    for csv_path in args.csv_paths:
+        store_dir = default_store_dir(csv_path)
+        if args.force or not is_fresh(csv_path, store_dir):
+            convert_csv(csv_path, store_dir)
+            print(f"Converted {csv_path} -> {store_dir}")
+        else:
+            print(f"{store_dir} is up to date")
+
+
+if __name__ == '__main__':
+    main()
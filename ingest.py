@@ -0,0 +1,215 @@
+"""
+Chunked streaming version of the notebook's cleaning step (convert_units -> remove_outliers).
+
+The source is read in chunks twice and never held in memory:
+
+    1. Convert each chunk to mg and feed the outlier features into one
+       mergeable quantile sketch (KLL) per column, then derive the IQR bounds.
+    2. Convert each chunk again, drop rows outside the bounds and append the
+       survivors to the output CSV.
+
+Peak memory is one chunk plus the sketches (a few thousand floats per column),
+so catalogues far larger than RAM can be cleaned. While a column has fewer
+values than the sketch size the quantiles are exact, so small tables give the
+same rows as preprocessing.preprocess. Several shards can be cleaned as one
+table; their sketches are merged before the second pass.
+
+Usage:
+    python ingest.py DataCleaned.csv -o Cleaned.csv --chunksize 100000
+"""
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import convert_units, top_20_nutrition_features, unit_mapping
+
+IngestResult = namedtuple('IngestResult', ['rows_read', 'rows_kept', 'lower', 'upper', 'seconds'])
+
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_SKETCH_SIZE = 4096
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: a stack of compactors where level h holds items of weight 2**h.
+
+    When a level overflows it is sorted and every other item (random offset) is
+    promoted, halving its size. Memory is O(k) items and the rank error is
+    about O(1/k); with at most k values nothing is compacted and quantiles are exact.
+
+    Parameters:
+        k (int): Capacity of the top compactor; larger is more accurate.
+        seed (int): Seed for the compaction offsets.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(8, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                odd = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                promoted = items[self.rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = odd
+            level += 1
+
+    def update(self, values):
+        """Adds a batch of values; NaNs are skipped like pandas' quantile does."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Folds another sketch (e.g. from another shard) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile(s) with pandas' linear interpolation, exact while nothing was compacted.
+        """
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        cumulative = np.cumsum(weights)
+        # Item i covers ranks [cumulative - weight, cumulative); its midpoint stands for rank position i
+        return np.interp(np.asarray(q) * (cumulative[-1] - 1) + 0.5, cumulative - weights / 2, values)
+
+
+def outlier_columns(header, unit_mapping=unit_mapping, features=top_20_nutrition_features):
+    """Maps the source columns needed for the outlier test to their converted names."""
+    converted = convert_units(pd.DataFrame(columns=header), unit_mapping).columns
+    return {raw: name for raw, name in zip(header, converted) if name in features}
+
+
+def read_chunks(source, chunksize, usecols=None):
+    return pd.read_csv(source, chunksize=chunksize, usecols=usecols)
+
+
+def sketch_source(source, chunksize=DEFAULT_CHUNKSIZE, k=DEFAULT_SKETCH_SIZE, seed=0):
+    """
+    First pass: one quantile sketch per outlier feature.
+
+    Returns:
+        tuple: ({feature: QuantileSketch}, rows read)
+    """
+    header = list(pd.read_csv(source, nrows=0).columns)
+    columns = outlier_columns(header)
+    sketches = {name: QuantileSketch(k, seed) for name in columns.values()}
+    rows = 0
+    for chunk in read_chunks(source, chunksize, usecols=list(columns)):
+        rows += len(chunk)
+        for raw, name in columns.items():
+            factor = next((f for unit, f in unit_mapping.items() if raw.endswith(unit)), 1)
+            sketches[name].update(chunk[raw].to_numpy(dtype=np.float64) * factor)
+    return sketches, rows
+
+
+def iqr_bounds(sketches, whisker=1.5):
+    """Tukey fences from the sketches, as pd.Series (lower, upper) indexed by feature."""
+    quartiles = {name: sketch.quantile([0.25, 0.75]) for name, sketch in sketches.items()}
+    q1 = pd.Series({name: q[0] for name, q in quartiles.items()})
+    q3 = pd.Series({name: q[1] for name, q in quartiles.items()})
+    iqr = q3 - q1
+    return q1 - whisker * iqr, q3 + whisker * iqr
+
+
+def stream_preprocess(sources, output, chunksize=DEFAULT_CHUNKSIZE, k=DEFAULT_SKETCH_SIZE, seed=0):
+    """
+    Cleans one or more source CSVs (same schema) into a single converted, outlier-free CSV.
+
+    The output has convert_units' columns (ids included) and is written to a
+    temporary file that replaces output only when complete.
+
+    Parameters:
+        sources (str or list): Raw DataCleaned.csv-style table(s).
+        output (str): Destination CSV.
+        chunksize (int): Rows per chunk; bounds peak memory.
+        k (int): Sketch size per feature; tables with at most k rows get exact quartiles.
+
+    Returns:
+        IngestResult: rows read and kept, the bounds used, seconds.
+    """
+    start = time.perf_counter()
+    sources = [sources] if isinstance(sources, str) else list(sources)
+    sketches, rows_read = None, 0
+    for source in sources:
+        source_sketches, rows = sketch_source(source, chunksize, k, seed)
+        rows_read += rows
+        if sketches is None:
+            sketches = source_sketches
+        else:
+            for name, sketch in source_sketches.items():
+                sketches[name].merge(sketch)
+    lower, upper = iqr_bounds(sketches)
+    features = list(lower.index)
+
+    tmp_path = output + '.tmp'
+    rows_kept = 0
+    try:
+        with open(tmp_path, 'w', newline='') as f:
+            header = True
+            for source in sources:
+                for chunk in read_chunks(source, chunksize):
+                    converted = convert_units(chunk)
+                    values = converted[features]
+                    keep = ~((values < lower) | (values > upper)).any(axis=1)
+                    kept = converted[keep]
+                    kept.to_csv(f, index=False, header=header)
+                    header = False
+                    rows_kept += len(kept)
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return IngestResult(rows_read, rows_kept, lower, upper, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert units and remove IQR outliers from food tables in bounded memory.")
+    parser.add_argument('sources', nargs='+', help="One or more CSVs with the DataCleaned.csv schema")
+    parser.add_argument('-o', '--output', default='Cleaned.csv')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--sketch-size', type=int, default=DEFAULT_SKETCH_SIZE,
+                        help="Values kept per feature; tables up to this size get exact quartiles")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = stream_preprocess(args.sources, args.output, args.chunksize, args.sketch_size, args.seed)
+    print(f"Kept {result.rows_kept} of {result.rows_read} rows in {result.seconds:.2f} s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
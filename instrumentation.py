@@ -0,0 +1,403 @@
+"""
+Timing spans, per-session rerun counters and a Prometheus endpoint for the Streamlit apps.
+
+Each script rerun is bracketed by begin_rerun / end_rerun and its hot paths
+by `with span(name):`. Finished reruns are aggregated into in-memory
+histograms and, when enabled, appended to a JSONL log (one line per rerun
+with every span, the wall time and the process RSS change) and served as
+Prometheus text on a local port.
+
+Environment variables:
+    FOOD_APP_INSTRUMENT=0            disable everything (spans become no-ops)
+    FOOD_APP_METRICS_PORT=9464       serve Prometheus text on http://127.0.0.1:<port>/metrics
+                                     (default 0 = off)
+    FOOD_APP_METRICS_LOG=app_metrics.jsonl
+                                     append the JSONL rerun log (default '' = off)
+    FOOD_APP_METRICS_LOG_MAX_BYTES=10485760
+                                     roll the log over to <log>.1 past this size
+    FOOD_APP_PROFILE=1               profile the next rerun with cProfile and tracemalloc
+                                     ('cprofile' or 'tracemalloc' for just one of them)
+    FOOD_APP_PROFILE_DIR=profiles    where the .prof / .tracemalloc.txt files go
+
+The profile switch is one-shot per process; GET /profile on the metrics port
+arms it again without a restart. Read a saved profile with
+`python -m pstats profiles/<file>.prof`.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SESSIONS = 500
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+PROFILE_MODES = {'1': ('cprofile', 'tracemalloc'), 'all': ('cprofile', 'tracemalloc'),
+                 'cprofile': ('cprofile',), 'tracemalloc': ('tracemalloc',)}
+
+
+def enabled():
+    return os.environ.get('FOOD_APP_INSTRUMENT', '1') != '0'
+
+
+def process_rss_bytes():
+    """Current resident set size; falls back to the peak where /proc is unavailable, 0 without either."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=SPAN_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Rerun:
+    """Spans and memory for one script run of one session."""
+
+    def __init__(self, session_id, app, profile=()):
+        self.session_id = session_id
+        self.app = app
+        self.spans = []
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.rss_start = process_rss_bytes()
+        self.profile = profile
+        self.profiler = None
+        if 'cprofile' in profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if 'tracemalloc' in profile:
+            import tracemalloc
+            tracemalloc.start(10)
+
+
+class Metrics:
+    """
+    Process-wide registry shared by every session (Streamlit keeps imported modules across reruns).
+
+    Parameters:
+        log_path (str): JSONL file for finished reruns, None to disable.
+        profile_dir (str): Directory for one-shot profiles.
+        log_max_bytes (int): Size past which the log is moved to <log_path>.1 and restarted.
+    """
+
+    def __init__(self, log_path=None, profile_dir='profiles', log_max_bytes=DEFAULT_LOG_MAX_BYTES):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.profile_dir = profile_dir
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = {}
+        self.reruns = {}
+        self.sessions = OrderedDict()
+        self.interrupted = 0
+        self.startup = {}
+        self.profile_armed = PROFILE_MODES.get(os.environ.get('FOOD_APP_PROFILE', '').lower(), ())
+        self.server = None
+
+    def arm_profile(self, mode='1'):
+        with self.lock:
+            self.profile_armed = PROFILE_MODES[mode]
+
+    def begin_rerun(self, session_id, app='streamlit_app'):
+        """Starts timing a rerun on this thread, closing a previous one that never reached end_rerun."""
+        previous = getattr(self.local, 'rerun', None)
+        if previous is not None:
+            self.end_rerun(status='interrupted')
+        with self.lock:
+            profile, self.profile_armed = self.profile_armed, ()
+        self.local.rerun = Rerun(session_id, app, profile)
+
+    def end_rerun(self, status='ok'):
+        rerun = getattr(self.local, 'rerun', None)
+        if rerun is None:
+            return None
+        self.local.rerun = None
+        seconds = time.perf_counter() - rerun.start
+        rss = process_rss_bytes()
+        profile_files = self._save_profile(rerun) if rerun.profile else []
+
+        with self.lock:
+            key = (rerun.app, status)
+            self.reruns.setdefault(key, Histogram()).observe(seconds)
+            if status == 'interrupted':
+                self.interrupted += 1
+            session = self.sessions.pop(rerun.session_id, None) or {'app': rerun.app, 'reruns': 0, 'seconds': 0.0}
+            session['reruns'] += 1
+            session['seconds'] += seconds
+            session['last_seconds'] = seconds
+            session['last_rss_delta'] = rss - rerun.rss_start
+            session['last_seen'] = time.time()
+            self.sessions[rerun.session_id] = session
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+            reruns = session['reruns']
+
+        record = {
+            'ts': rerun.started,
+            'app': rerun.app,
+            'session': rerun.session_id,
+            'rerun': reruns,
+            'status': status,
+            'seconds': seconds,
+            'rss_bytes': rss,
+            'rss_delta_bytes': rss - rerun.rss_start,
+            'spans': rerun.spans,
+        }
+        if profile_files:
+            record['profile'] = profile_files
+        self._log(record)
+        return record
+
+    def record_startup(self, app, phase, seconds):
+        """Records a one-off cold-start duration (imports, first paint, warm-up) as a gauge and a log line."""
+        with self.lock:
+            self.startup[(app, phase)] = seconds
+        self._log({'ts': time.time(), 'app': app, 'startup': phase, 'seconds': seconds})
+
+    @contextmanager
+    def span(self, name):
+        """Times a block; recorded in the histograms and in the current rerun's log line."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            rerun = getattr(self.local, 'rerun', None)
+            app = rerun.app if rerun is not None else ''
+            with self.lock:
+                self.spans.setdefault((app, name), Histogram()).observe(seconds)
+            if rerun is not None:
+                rerun.spans.append({'name': name, 'seconds': seconds})
+
+    def _log(self, record):
+        if not self.log_path:
+            return
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                size = 0
+            # Keep at most one rolled-over log, so the files stay bounded
+            if size and size + len(line) > self.log_max_bytes:
+                os.replace(self.log_path, self.log_path + '.1')
+            with open(self.log_path, 'a') as f:
+                f.write(line)
+
+    def _save_profile(self, rerun):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stem = os.path.join(self.profile_dir, f"{rerun.app}-{time.strftime('%Y%m%d-%H%M%S')}-{rerun.session_id[:8].replace(' ', '_')}")
+        files = []
+        if rerun.profiler is not None:
+            rerun.profiler.disable()
+            rerun.profiler.dump_stats(stem + '.prof')
+            files.append(stem + '.prof')
+        if 'tracemalloc' in rerun.profile:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(stem + '.tracemalloc.txt', 'w') as f:
+                f.write(f"current {current} bytes, peak {peak} bytes\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    f.write(f"{stat}\n")
+            files.append(stem + '.tracemalloc.txt')
+        return files
+
+    def prometheus_text(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(metric, help_text, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, hist in series:
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        with self.lock:
+            histogram('food_app_span_seconds', "Time spent in an instrumented block.",
+                      [(f'app="{app}",span="{name}"', hist) for (app, name), hist in sorted(self.spans.items())])
+            histogram('food_app_rerun_seconds', "Wall time of a full script rerun.",
+                      [(f'app="{app}",status="{status}"', hist) for (app, status), hist in sorted(self.reruns.items())])
+            sessions = list(self.sessions.items())
+            interrupted = self.interrupted
+            startup = sorted(self.startup.items())
+
+        lines.append("# HELP food_app_session_reruns_total Reruns per browser session.")
+        lines.append("# TYPE food_app_session_reruns_total counter")
+        for session_id, session in sessions:
+            lines.append(f'food_app_session_reruns_total{{app="{session["app"]}",session="{session_id}"}} {session["reruns"]}')
+        lines.append("# HELP food_app_session_last_rerun_seconds Duration of the session's latest rerun.")
+        lines.append("# TYPE food_app_session_last_rerun_seconds gauge")
+        for session_id, session in sessions:
+            lines.append(f'food_app_session_last_rerun_seconds{{app="{session["app"]}",session="{session_id}"}} '
+                         f'{session["last_seconds"]:.6f}')
+        lines.append("# HELP food_app_session_rss_delta_bytes Process RSS change during the session's latest rerun.")
+        lines.append("# TYPE food_app_session_rss_delta_bytes gauge")
+        for session_id, session in sessions:
+            lines.append(f'food_app_session_rss_delta_bytes{{app="{session["app"]}",session="{session_id}"}} '
+                         f'{session["last_rss_delta"]}')
+        lines.append("# HELP food_app_sessions Sessions currently tracked (least recently active dropped past MAX_SESSIONS).")
+        lines.append("# TYPE food_app_sessions gauge")
+        lines.append(f"food_app_sessions {len(sessions)}")
+        lines.append("# HELP food_app_interrupted_reruns_total Reruns that stopped before end_rerun.")
+        lines.append("# TYPE food_app_interrupted_reruns_total counter")
+        lines.append(f"food_app_interrupted_reruns_total {interrupted}")
+        lines.append("# HELP food_app_startup_seconds Cold-start phases of this process (imports, first paint, warm-up).")
+        lines.append("# TYPE food_app_startup_seconds gauge")
+        for (app, phase), seconds in startup:
+            lines.append(f'food_app_startup_seconds{{app="{app}",phase="{phase}"}} {seconds:.6f}')
+        lines.append("# HELP food_app_process_rss_bytes Resident set size of the server process.")
+        lines.append("# TYPE food_app_process_rss_bytes gauge")
+        lines.append(f"food_app_process_rss_bytes {process_rss_bytes()}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Starts the metrics endpoint in a daemon thread; returns False if the port is taken."""
+        if self.server is not None or not port:
+            return self.server is not None
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    status, body = 200, metrics.prometheus_text().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/profile':
+                    metrics.arm_profile()
+                    status, body, content_type = 200, b"Next rerun will be profiled\n", 'text/plain'
+                else:
+                    status, body, content_type = 404, b"Not found\n", 'text/plain'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:
+            return False
+        threading.Thread(target=self.server.serve_forever, name='food-app-metrics', daemon=True).start()
+        return True
+
+
+class _NullMetrics:
+    def begin_rerun(self, session_id, app='streamlit_app'):
+        pass
+
+    def end_rerun(self, status='ok'):
+        return None
+
+    def record_startup(self, app, phase, seconds):
+        pass
+
+    @contextmanager
+    def span(self, name):
+        yield
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """The process-wide registry, created (and its endpoint started) on first use."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            if not enabled():
+                _metrics = _NullMetrics()
+            else:
+                _metrics = Metrics(os.environ.get('FOOD_APP_METRICS_LOG', '') or None,
+                                   os.environ.get('FOOD_APP_PROFILE_DIR', 'profiles'),
+                                   int(os.environ.get('FOOD_APP_METRICS_LOG_MAX_BYTES', DEFAULT_LOG_MAX_BYTES)))
+                _metrics.serve(int(os.environ.get('FOOD_APP_METRICS_PORT', '0')))
+        return _metrics
+
+
+def span(name):
+    return get_metrics().span(name)
+
+
+def begin_rerun(session_id, app='streamlit_app'):
+    get_metrics().begin_rerun(session_id, app)
+
+
+def end_rerun(status='ok'):
+    return get_metrics().end_rerun(status)
+
+
+def record_startup(app, phase, seconds):
+    get_metrics().record_startup(app, phase, seconds)
+
+
+@contextmanager
+def fragment_span(name, app='streamlit_app'):
+    """
+    Span around a Streamlit fragment. During a full rerun it is an ordinary
+    span; a fragment-only rerun is logged as its own rerun with status 'fragment'.
+    """
+    if not streamlit_fragment_rerun():
+        with span(name):
+            yield
+        return
+    begin_rerun(streamlit_session_id(), app)
+    try:
+        with span(name):
+            yield
+    finally:
+        end_rerun(status='fragment')
+
+
+def streamlit_fragment_rerun():
+    """True while Streamlit is rerunning only fragments."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def streamlit_session_id():
+    """Current Streamlit session id ('local' outside a script run)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx is not None else 'local'
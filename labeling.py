@@ -0,0 +1,579 @@
+"""
+Headless batch labeling pipeline, built from the notebook cells.
+
+Runs convert_units -> remove_outliers once, then the four condition
+pipelines (weighting -> MinMaxScaler -> PCA -> fuzzy c-means from fcm.py) concurrently
+in a process pool. The preprocessed matrix is published once in shared
+memory and every worker attaches to it instead of re-reading the CSV.
+
+With --cache-dir the same steps run as a content-addressed DAG (dag.py)
+whose stage outputs are cached on disk. After an edit to a few foods or to
+one condition's weights, only the affected chunks and branches are recomputed.
+
+Fuzzy c-means is warm-started from the centers of the models saved by the
+previous run when their settings match, so relabeling after a small data
+change converges in a few iterations and keeps cluster numbers stable.
+
+Usage:
+    python labeling.py DataCleaned.csv -o Labeled_Data.csv --workers 4
+    python labeling.py DataCleaned.csv -o Labeled_Data.csv --cache-dir .pipeline_cache
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from dag import DEFAULT_CHUNK_ROWS, DAG, ArtifactStore, format_report, source_rows
+from fcm import cmeans, memberships
+from models import DEFAULT_MODELS_DIR, ConditionModel, healthy_cluster, model_path, save_models
+from preprocessing import convert_units, id_columns, preprocess, read_food_table, top_20_nutrition_features
+from projections import load_projections
+
+diabetes_feature_weights = {
+    "carb_mg": -1.5,           # High carbs can spike blood sugar
+    "freesugar_mg": -3.0,      # Free sugars cause rapid glucose spikes
+    "fibre_mg": 2.5,           # Fiber helps regulate blood sugar
+    "energy_kcal": -1.0,      # Excess energy intake contributes to obesity and insulin resistance
+    "energy_kj": -1.0,        # Same as kcal, included for consistency
+    "protein_mg": 1.0,         # Moderate protein helps with satiety and glucose control
+    "sfa_mg": -2.0,           # Saturated fats can contribute to insulin resistance
+    "mufa_mg": 1.5,           # Monounsaturated fats improve insulin sensitivity
+    "pufa_mg": 1.5,           # Polyunsaturated fats support metabolic health
+    "cholesterol_mg": -0.5,   # High cholesterol is linked to cardiovascular risk
+    "sodium_mg": -1.0,        # High sodium can lead to hypertension, a diabetes risk factor
+    "potassium_mg": 1.5,      # Potassium supports insulin function
+    "magnesium_mg": 2.0,      # Essential for insulin sensitivity
+    "zinc_mg": 1.0,           # Supports insulin production
+    "chromium_mg": 2.0,       # Involved in carbohydrate metabolism
+    "vitd2_mg": 1.0,          # Vitamin D improves glucose metabolism
+    "vitd3_mg": 1.0,          # Same as above
+    "vitb3_mg": 0.5,          # Niacin impacts glucose regulation
+    "vitb6_mg": 0.5,          # Involved in glucose metabolism
+    "vitc_mg": 1.0,           # Antioxidant effects help with insulin function
+    "carotenoids_mg": 1.0     # Antioxidants that support metabolic health
+}
+
+obesity_nutrition_weights = {
+    'energy_kcal': 0.15,       # Critical to control for weight loss
+    'freesugar_mg': 0.12,      # Reduce to avoid excess calories
+    'fat_mg': 0.08,            # Total fat control
+    'sfa_mg': 0.08,            # Limit saturated fat
+    'fibre_mg': 0.12,          # High fiber promotes satiety
+    'protein_mg': 0.10,        # Maintain lean mass
+    'carb_mg': 0.05,           # Manage refined carbs
+    'sodium_mg': 0.07,         # Often co-managed in obesity/hypertension
+    'potassium_mg': 0.04,      # Balance sodium, support heart health
+    'vitc_mg': 0.03,           # Antioxidant and metabolic support
+    'vitb6_mg': 0.02,          # Supports metabolism
+    'vitb3_mg': 0.02,          # Same here
+    'folate_mg': 0.02,         # DNA synthesis, general health
+    'vite_mg': 0.02,           # Antioxidant
+    'calcium_mg': 0.03,        # Bone health during weight loss
+    'iron_mg': 0.02,           # Avoid deficiencies
+    'zinc_mg': 0.02,           # Metabolic function
+    'magnesium_mg': 0.02,      # Cardiovascular and insulin sensitivity
+    'vitd3_mg': 0.02,          # Often deficient in obesity
+    'carotenoids_mg': 0.01     # Antioxidant marker
+}
+
+high_bp_counter_weights = {
+    'sodium_mg': -0.18,           # Strongly limit
+    'freesugar_mg': -0.06,        # Limit added sugars
+    'sfa_mg': -0.07,              # Limit saturated fat
+    'cholesterol_mg': -0.05,      # Limit cholesterol
+    'fat_mg': -0.04,              # Moderate fat
+
+    'potassium_mg': 0.12,         # Increase potassium
+    'magnesium_mg': 0.08,         # Support blood vessel relaxation
+    'calcium_mg': 0.08,           # Improve blood pressure control
+    'fibre_mg': 0.08,             # Cardiovascular benefits
+    'protein_mg': 0.04,           # Helps balance meals
+
+    'carb_mg': 0.03,              # Prefer complex carbs
+    'vite_mg': 0.02,              # Antioxidant support
+    'vitc_mg': 0.02,              # Vessel protection
+    'folate_mg': 0.02,            # Lowers homocysteine
+    'vitb6_mg': 0.02,             # Works with folate
+    'zinc_mg': 0.02,              # General support
+    'vitk1_mg': 0.01,             # Supports vascular function
+    'vitd3_mg': 0.02,             # Often deficient
+    'carotenoids_mg': 0.02,       # Antioxidant benefits
+    'iron_mg': 0.02               # Balanced intake
+}
+
+low_bp_counter_weights = {
+    'sodium_mg': 0.15,            # Increase sodium intake
+    'iron_mg': 0.10,              # Prevent anemia-related hypotension
+    'protein_mg': 0.08,           # Support blood volume
+    'fibre_mg': -0.05,            # Too much may lower BP further
+    'carb_mg': 0.05,              # Helps prevent drops post-meal
+
+    'fat_mg': 0.04,               # Maintain energy
+    'cholesterol_mg': 0.03,       # Less concern here
+    'potassium_mg': -0.06,        # Excess can worsen hypotension
+    'magnesium_mg': 0.05,         # Supports vascular tone
+    'calcium_mg': 0.05,           # Balances vascular activity
+
+    'folate_mg': 0.05,            # Prevents folate-deficiency anemia
+    'vitb1_mg': 0.04,             # Deficiency linked to low BP
+    'vitb6_mg': 0.04,             # Circulation support
+    'vitc_mg': 0.02,              # General support
+    'vite_mg': 0.02,              # Antioxidant
+    'vitk1_mg': 0.01,             # Blood clotting
+    'zinc_mg': 0.02,              # General balance
+    'carotenoids_mg': 0.03,       # Antioxidant
+    'freesugar_mg': 0.02          # Can help with acute hypotension
+}
+
+# Per-condition settings. drop_columns are the collinear features removed in
+# the notebook after inspecting find_multicollinear_features(threshold=0.85).
+condition_pipelines = {
+    'diabetes': {
+        'weights': diabetes_feature_weights,
+        'drop_columns': ['energy_kcal', 'energy_kj', 'zinc_mg', 'sfa_mg'],
+        'label_column': 'Health_Label_Diabetes',
+    },
+    'obesity': {
+        'weights': obesity_nutrition_weights,
+        'drop_columns': ['fat_mg'],
+        'label_column': 'Health_Label_Obesity',
+    },
+    'high_bp': {
+        'weights': high_bp_counter_weights,
+        'drop_columns': ['sfa_mg'],
+        'label_column': 'Health_Label_HighBP',
+    },
+    'low_bp': {
+        'weights': low_bp_counter_weights,
+        'drop_columns': [],
+        'label_column': 'Health_Label_LowBP',
+    },
+}
+
+n_clusters = 3
+
+DEFAULT_CACHE_DIR = '.pipeline_cache'
+
+# Clustering settings used unless a condition is given its own (see sweep.py)
+default_config = {'c': n_clusters, 'm': 2.0, 'n_components': 3}
+
+
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def weight_features(df, condition):
+    """Selects the condition's features, applies its weights and drops collinear columns."""
+    config = condition_pipelines[condition]
+    return apply_weights(df, config['weights'], config['drop_columns'])
+
+
+def apply_weights(df, weights, drop_columns):
+    df_selected = df[list(weights.keys())].mul(pd.Series(weights), axis=1)
+    return df_selected.drop(columns=drop_columns)
+
+
+def project_features(df, condition, n_components=3):
+    """
+    Weighting -> MinMaxScaler -> PCA for one condition.
+
+    Returns:
+        tuple: (weighted features, fitted MinMaxScaler, scaled array, fitted PCA, PCA coordinates)
+    """
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import MinMaxScaler
+
+    df_selected = weight_features(df, condition)
+    scaler = MinMaxScaler()
+    scaled = scaler.fit_transform(df_selected)
+    pca = PCA(n_components=n_components)
+    return df_selected, scaler, scaled, pca, pca.fit_transform(scaled)
+
+
+def load_warm_starts(models_dir, conditions, configs=None):
+    """
+    Condition -> saved ConditionModel whose features, weights and c / m /
+    n_components match this run, to warm-start its clustering. Conditions
+    without a matching model are left out and start cold.
+    """
+    warm_starts = {}
+    if not models_dir or not os.path.isdir(models_dir):
+        return warm_starts
+    configs = configs or {}
+    for condition in conditions:
+        path = model_path(models_dir, condition)
+        if not os.path.exists(path):
+            continue
+        model = ConditionModel.load(path)
+        pipeline = condition_pipelines[condition]
+        config = {**default_config, **configs.get(condition, {})}
+        if (model.feature_weights == pipeline['weights'] and model.drop_columns == list(pipeline['drop_columns'])
+                and model.centers.shape == (int(config['c']), int(config['n_components']))
+                and model.m == float(config['m'])):
+            warm_starts[condition] = model
+    return warm_starts
+
+
+def label_condition(df, condition, seed=0, n_init=1, config=None, warm_start=None):
+    """
+    Runs weighting -> MinMaxScaler -> PCA -> fuzzy c-means for one condition.
+
+    Parameters:
+        df (pd.DataFrame): Preprocessed nutrients (mg units, outliers removed).
+        condition (str): Key of condition_pipelines.
+        seed (int): Seed for the clustering initialisation, so labels are reproducible.
+        n_init (int): Number of random clustering restarts.
+        config (dict): 'c', 'm' and 'n_components' (default_config for missing keys);
+            extra keys such as sweep scores are stored in the model as they are.
+        warm_start (ConditionModel): Previous model with the same settings (see
+            load_warm_starts); its centers seed the clustering instead of random restarts.
+
+    Returns:
+        tuple: (cluster labels in row order, {stage name: seconds}, fitted ConditionModel)
+    """
+    config = {**default_config, **(config or {}), 'seed': seed, 'n_init': n_init}
+    c, m = int(config['c']), float(config['m'])
+    timings = {}
+    with stage(timings, 'project'):
+        df_selected, scaler, scaled, pca, data_array = project_features(df, condition, int(config['n_components']))
+    with stage(timings, 'cmeans'):
+        init_centers = None if warm_start is None else \
+            warm_start.transfer_centers(scaler.min_, scaler.scale_, pca.mean_, pca.components_)
+        result = cmeans(data_array, c=c, m=m, error=0.005, maxiter=1000, init_centers=init_centers, seed=seed,
+                        n_init=n_init)
+        # Label from the final centers so predict_labels() reproduces these labels exactly
+        cluster_labels = np.argmax(memberships(data_array, result.centers, m), axis=0)
+
+    assert len(cluster_labels) == len(df), "Mismatch in label assignment!"
+    pipeline = condition_pipelines[condition]
+    weights = np.array([pipeline['weights'][f] for f in df_selected.columns])
+    model = ConditionModel(condition, pipeline['label_column'], pipeline['weights'], pipeline['drop_columns'],
+                           scaler.min_, scaler.scale_, pca.mean_, pca.components_, result.centers, m=m,
+                           healthy_cluster=healthy_cluster(scaled, weights, cluster_labels, c), config=config)
+    return cluster_labels, timings, model
+
+
+# Worker-side view of the shared preprocessed matrix
+_worker_state = {}
+
+
+def _attach_shared_frame(shm_name, shape, dtype, columns):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    matrix.flags.writeable = False
+    _worker_state['shm'] = shm
+    _worker_state['frame'] = pd.DataFrame(matrix, columns=columns, copy=False)
+
+
+def _label_shared(condition, config=None, warm_start=None, seed=0, n_init=1):
+    return condition, *label_condition(_worker_state['frame'], condition, seed, n_init, config, warm_start)
+
+
+def write_csv_atomic(df, path):
+    """Writes to a temporary file in the target directory and renames it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.labeling-', suffix='.csv', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            df.to_csv(f, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def run_pipeline(source, output, workers=None, conditions=None, seed=0, n_init=1, models_dir=DEFAULT_MODELS_DIR,
+                 compact=True, configs=None, warm_start=True):
+    """
+    Labels every food in source, writes the Health_Label_* table to output
+    and saves one model artifact per condition to models_dir. With compact=True
+    the table is held as float32 with categorical text columns; clustering
+    still runs in float64 after weighting, and the output's nutrient values
+    are written from the source at full precision (see full_precision_rows). configs maps a condition to its
+    clustering settings (see label_condition); other conditions use default_config.
+    With warm_start, conditions whose saved model in models_dir has matching
+    settings are clustered from its centers (see load_warm_starts).
+
+    Returns:
+        dict: Wall-clock seconds per stage, including per-condition stages.
+    """
+    conditions = conditions or list(condition_pipelines)
+    configs = configs or {}
+    workers = workers or min(len(conditions), os.cpu_count() or 1)
+    warm_starts = load_warm_starts(models_dir, conditions, configs) if warm_start else {}
+    timings = {}
+
+    with stage(timings, 'read_csv'):
+        data = read_food_table(source, compact)
+    with stage(timings, 'preprocess'):
+        df, df_with_food_names = preprocess(data)
+        df_with_food_names = df_with_food_names.copy()
+
+    with stage(timings, 'label_total'):
+        if workers == 1:
+            results = [(condition, *label_condition(df, condition, seed, n_init, configs.get(condition),
+                                                    warm_starts.get(condition)))
+                       for condition in conditions]
+        else:
+            matrix = np.ascontiguousarray(df.to_numpy())
+            shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+            try:
+                np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[:] = matrix
+                initargs = (shm.name, matrix.shape, matrix.dtype.str, list(df.columns))
+                with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_frame, initargs=initargs) as pool:
+                    results = list(pool.map(partial(_label_shared, seed=seed, n_init=n_init), conditions,
+                                            [configs.get(condition) for condition in conditions],
+                                            [warm_starts.get(condition) for condition in conditions]))
+            finally:
+                shm.close()
+                shm.unlink()
+
+    models = {}
+    for condition, cluster_labels, condition_timings, model in results:
+        df_with_food_names[condition_pipelines[condition]['label_column']] = cluster_labels
+        models[condition] = model
+        for name, seconds in condition_timings.items():
+            timings[f"{condition}.{name}"] = seconds
+
+    write_outputs(df_with_food_names, models, output, models_dir, timings, source if compact else None)
+    return timings
+
+
+def full_precision_rows(source, df_with_food_names):
+    """
+    The rows of df_with_food_names re-read from source in its own dtypes, with
+    the label columns carried over, so a compact (float32) run publishes the
+    same nutrient values as a float64 one.
+    """
+    full = pd.read_csv(source).loc[df_with_food_names.index]
+    for column in df_with_food_names.columns:
+        if column not in full.columns:
+            full[column] = df_with_food_names[column].to_numpy()
+    return full
+
+
+def merge_existing_labels(df_with_food_names, output, label_columns):
+    """
+    Carries the Health_Label_* columns that were not relabeled over from the
+    existing output, so relabeling a few conditions (--conditions) keeps the rest.
+
+    Raises:
+        ValueError: The existing output holds different foods, so its labels cannot be kept.
+    """
+    other_columns = [config['label_column'] for config in condition_pipelines.values()
+                     if config['label_column'] not in label_columns]
+    if not other_columns or not os.path.exists(output):
+        return df_with_food_names
+    existing = pd.read_csv(output)
+    other_columns = [column for column in other_columns if column in existing.columns]
+    if not other_columns:
+        return df_with_food_names
+    new_codes = df_with_food_names['food_code'].astype(str).to_numpy()
+    if len(existing) != len(new_codes) or (existing['food_code'].astype(str).to_numpy() != new_codes).any():
+        raise ValueError(f"{output} holds different foods than the relabeled table; "
+                         "relabel every condition instead of a subset")
+    merged = df_with_food_names.copy()
+    for column in other_columns:
+        merged[column] = existing[column].to_numpy()
+    # Label columns in the same order as a full run
+    all_labels = [config['label_column'] for config in condition_pipelines.values()]
+    return merged[[c for c in merged.columns if c not in all_labels] + [c for c in all_labels if c in merged.columns]]
+
+
+def write_outputs(df_with_food_names, models, output, models_dir, timings, compact_source=None):
+    """compact_source: the source CSV of a compact run, re-read for full-precision nutrients."""
+    with stage(timings, 'write'):
+        if compact_source is not None:
+            df_with_food_names = full_precision_rows(compact_source, df_with_food_names)
+        label_columns = [model.label_column for model in models.values()]
+        write_csv_atomic(merge_existing_labels(df_with_food_names, output, label_columns), output)
+        if models_dir:
+            save_models(models, models_dir)
+    with stage(timings, 'projections'):
+        # Refresh the binary store and the cluster view's cached projections for the new labels
+        load_projections(output)
+
+
+# Stage functions of the incremental pipeline (see build_dag); rows stages get one chunk of rows at a time
+
+def _convert_rows(chunk):
+    converted = convert_units(chunk)
+    return converted.drop(columns=[col for col in id_columns if col in converted.columns])
+
+
+def _outlier_bounds(df):
+    features = df[top_20_nutrition_features]
+    q1, q3 = features.quantile(0.25), features.quantile(0.75)
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def _outlier_mask(chunk, bounds):
+    lower, upper = bounds
+    features = chunk[top_20_nutrition_features]
+    return (~((features < lower) | (features > upper)).any(axis=1)).to_numpy()
+
+
+def _keep_rows(df, mask):
+    return mask
+
+
+def _fit_scaler(df_selected):
+    # Plain arrays, so cache hits never import sklearn
+    from sklearn.preprocessing import MinMaxScaler
+    scaler = MinMaxScaler().fit(df_selected)
+    return {'min': scaler.min_, 'scale': scaler.scale_}
+
+
+def _scale_rows(chunk, scaler):
+    # Same arithmetic as MinMaxScaler.transform
+    scaled = chunk.to_numpy(dtype=np.float64)
+    scaled *= scaler['scale']
+    scaled += scaler['min']
+    return scaled
+
+
+def _fit_pca(scaled, n_components):
+    from sklearn.decomposition import PCA
+    pca = PCA(n_components=n_components)
+    coords = pca.fit_transform(scaled)
+    return {'mean': pca.mean_, 'components': pca.components_, 'coords': coords}
+
+
+def _fit_cmeans(projected, scaler, c, m, seed, n_init, warm_start=None):
+    data_array = projected['coords']
+    init_centers = None if warm_start is None else \
+        warm_start.transfer_centers(scaler['min'], scaler['scale'], projected['mean'], projected['components'])
+    result = cmeans(data_array, c=c, m=m, error=0.005, maxiter=1000, init_centers=init_centers, seed=seed,
+                    n_init=n_init)
+    return result.centers, np.argmax(memberships(data_array, result.centers, m), axis=0)
+
+
+def _build_model(scaler, projected, clusters, scaled, condition, label_column, weights, drop_columns, config):
+    centers, cluster_labels = clusters
+    model = ConditionModel(condition, label_column, weights, drop_columns, scaler['min'], scaler['scale'],
+                           projected['mean'], projected['components'], centers, m=config['m'], config=config)
+    feature_weights = np.array([weights[f] for f in model.features])
+    model.healthy_cluster = healthy_cluster(scaled, feature_weights, cluster_labels, config['c'])
+    return model
+
+
+def build_dag(store, conditions=None, seed=0, n_init=1, configs=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+              warm_starts=None):
+    """
+    The labeling pipeline as a content-addressed DAG over the source rows ('table').
+
+    Row-local stages (unit conversion, outlier test, weighting, scaling) are
+    cached per chunk of rows; quantiles, scaler, PCA and c-means are global fits
+    cached under their inputs. Each condition is its own branch, so changing one
+    condition's weights or settings only reruns that branch. warm_starts
+    (see load_warm_starts) seed c-means when it has to rerun; they are not
+    part of its cache key, so unchanged inputs still hit the cache.
+    """
+    conditions = conditions or list(condition_pipelines)
+    configs = configs or {}
+    warm_starts = warm_starts or {}
+    dag = DAG(store, chunk_rows)
+    dag.add('convert_units', _convert_rows, ['table'], kind='rows')
+    dag.add('outlier_bounds', _outlier_bounds, ['convert_units'])
+    dag.add('outlier_mask', _outlier_mask, ['convert_units', 'outlier_bounds'], kind='rows')
+    dag.add('clean', _keep_rows, ['convert_units', 'outlier_mask'], kind='select')
+    for condition in conditions:
+        pipeline = condition_pipelines[condition]
+        config = {**default_config, **configs.get(condition, {}), 'seed': seed, 'n_init': n_init}
+        dag.add(f'{condition}.weight', apply_weights, ['clean'],
+                {'weights': pipeline['weights'], 'drop_columns': pipeline['drop_columns']}, kind='rows')
+        dag.add(f'{condition}.scaler', _fit_scaler, [f'{condition}.weight'])
+        dag.add(f'{condition}.scale', _scale_rows, [f'{condition}.weight', f'{condition}.scaler'], kind='rows')
+        dag.add(f'{condition}.pca', _fit_pca, [f'{condition}.scale'], {'n_components': int(config['n_components'])})
+        dag.add(f'{condition}.cmeans', partial(_fit_cmeans, warm_start=warm_starts.get(condition)),
+                [f'{condition}.pca', f'{condition}.scaler'],
+                {'c': int(config['c']), 'm': float(config['m']), 'seed': seed, 'n_init': n_init})
+        dag.add(f'{condition}.model', _build_model,
+                [f'{condition}.scaler', f'{condition}.pca', f'{condition}.cmeans', f'{condition}.scale'],
+                {'condition': condition, 'label_column': pipeline['label_column'], 'weights': pipeline['weights'],
+                 'drop_columns': pipeline['drop_columns'], 'config': config})
+    return dag
+
+
+def run_incremental(source, output, cache_dir=DEFAULT_CACHE_DIR, conditions=None, seed=0, n_init=1,
+                    models_dir=DEFAULT_MODELS_DIR, compact=True, configs=None, warm_start=True):
+    """
+    run_pipeline through the cached DAG: only stages whose inputs changed are recomputed.
+    Produces the same table and models as run_pipeline.
+
+    Returns:
+        tuple: ({stage name: seconds}, [dag.StageRecord] with hit / partial / miss per stage)
+    """
+    conditions = conditions or list(condition_pipelines)
+    warm_starts = load_warm_starts(models_dir, conditions, configs) if warm_start else {}
+    timings = {}
+    with stage(timings, 'read_csv'):
+        data = read_food_table(source, compact)
+    with stage(timings, 'dag'):
+        dag = build_dag(ArtifactStore(cache_dir), conditions, seed, n_init, configs, warm_starts=warm_starts)
+        outputs, report = dag.run({'table': source_rows(data)})
+
+    df_with_food_names = data.loc[outputs['clean'].values.index].copy()
+    models = {}
+    for condition in conditions:
+        model = outputs[f'{condition}.model']
+        df_with_food_names[model.label_column] = outputs[f'{condition}.cmeans'][1]
+        models[condition] = model
+    write_outputs(df_with_food_names, models, output, models_dir, timings, source if compact else None)
+    return timings, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label foods with per-condition fuzzy c-means clusters.")
+    parser.add_argument('source', nargs='?', default='DataCleaned.csv')
+    parser.add_argument('-o', '--output', default='Labeled_Data.csv')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: one per condition, capped at CPU count); "
+                             "not supported with --cache-dir, which runs its stages in this process")
+    parser.add_argument('--conditions', nargs='+', choices=list(condition_pipelines), default=None,
+                        help="Relabel only these conditions; the other labels are kept from the existing output")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Clustering seed for cold starts; the same seed reproduces the same labels")
+    parser.add_argument('--n-init', type=int, default=1, help="Random clustering restarts per condition")
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR, help="Where to save the per-condition model artifacts")
+    parser.add_argument('--cold-start', action='store_true',
+                        help="Ignore the saved models' centers and cluster from random starts")
+    parser.add_argument('--float64', action='store_true',
+                        help="Cluster from a float64 table instead of float32 (the output is written at full precision either way)")
+    parser.add_argument('--cache-dir', default=None,
+                        help=f"Run incrementally, caching every stage here (e.g. {DEFAULT_CACHE_DIR}); "
+                             "only stages whose inputs changed are recomputed")
+    args = parser.parse_args()
+    if args.cache_dir and args.workers is not None:
+        parser.error("--workers cannot be combined with --cache-dir; the incremental run uses one process")
+
+    start = time.perf_counter()
+    if args.cache_dir:
+        timings, report = run_incremental(args.source, args.output, args.cache_dir, args.conditions, args.seed,
+                                          args.n_init, args.models_dir, compact=not args.float64,
+                                          warm_start=not args.cold_start)
+        print(format_report(report))
+    else:
+        timings = run_pipeline(args.source, args.output, args.workers, args.conditions, args.seed, args.n_init,
+                               args.models_dir, compact=not args.float64, warm_start=not args.cold_start)
+    for name, seconds in timings.items():
+        print(f"{name:<24} {seconds * 1e3:>10.1f} ms")
+    print(f"{'total':<24} {(time.perf_counter() - start) * 1e3:>10.1f} ms")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Local load generator for service.py.
+
+Opens `--concurrency` keep-alive connections and sends a mix of /recommend,
+/similar and /labels requests, then reports throughput and latency
+percentiles (p50/p95/p99).
+
+Usage:
+    python service.py &
+    python loadgen.py --requests 20000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+CONDITIONS = ['diabetes', 'obesity', 'high_bp', 'low_bp']
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode('latin-1'))
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def make_paths(food_names, n_requests, mix, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(n_requests):
+        kind = rng.choice(mix)
+        condition = rng.choice(CONDITIONS)
+        if kind == 'recommend':
+            paths.append(f"/recommend?condition={condition}&top_n={rng.choice([5, 10, 20])}"
+                         f"&healthy_only={rng.choice([0, 1])}")
+        elif kind == 'similar':
+            paths.append(f"/similar?condition={condition}&food={quote(rng.choice(food_names))}&k=5")
+        else:
+            paths.append(f"/labels?food={quote(rng.choice(food_names))}")
+    return paths
+
+
+async def run(url, n_requests, concurrency, mix, seed):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    # Harvest food names from the service itself so requests hit real foods
+    probe = Connection(host, port)
+    food_names = []
+    for condition in CONDITIONS:
+        _, body = await probe.request(f"/recommend?condition={condition}&top_n=50")
+        food_names.extend(food['food_name'] for food in json.loads(body)['foods'])
+    probe.close()
+
+    queue = asyncio.Queue()
+    for path in make_paths(sorted(set(food_names)), n_requests, mix, seed):
+        queue.put_nowait(path)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(host, port)
+        try:
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                status, _ = await connection.request(path)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput and tail latency of service.py.")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--requests', type=int, default=10_000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', nargs='+', default=['recommend', 'recommend', 'similar', 'labels'],
+                        choices=['recommend', 'similar', 'labels'], help="Request kinds, repeated to weight them")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    latencies, errors, elapsed = asyncio.run(run(args.url, args.requests, args.concurrency, args.mix, args.seed))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(f"requests    {len(latencies)} ({errors} errors) in {elapsed:.2f} s")
+    print(f"throughput  {len(latencies) / elapsed:.0f} req/s")
+    print(f"latency ms  p50={p50:.2f} p95={p95:.2f} p99={p99:.2f} max={latencies.max() * 1e3:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Daily meal-plan optimizer.
+
+Picks foods and portions (nutrient values are per 100 g) that land close to
+age- and gender-specific daily targets while maximizing the condition score
+from condition_weights. Candidates are first pruned in one vectorized pass to
+the condition's top-scoring foods inside its healthy cluster, then a small
+linear program (scipy HiGHS) chooses the portions, so a plan takes a few
+milliseconds even for catalogues with tens of thousands of foods.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from models import healthy_clusters as saved_healthy_clusters
+from scoring import FoodScorer, label_map, top_k_indices
+
+MealPlan = namedtuple('MealPlan', ['foods', 'totals', 'status', 'seconds'])
+
+target_nutrients = ['energy_kcal', 'protein_g', 'carb_g', 'fat_g', 'fibre_g', 'freesugar_g', 'sodium_mg', 'potassium_mg']
+
+# Approximate daily reference intakes: (min_age, max_age) -> {gender: {nutrient: value}}
+energy_targets = {
+    (10, 13): {'Male': 2200, 'Female': 2000},
+    (14, 18): {'Male': 2700, 'Female': 2200},
+    (19, 50): {'Male': 2500, 'Female': 2000},
+    (51, 120): {'Male': 2200, 'Female': 1800},
+}
+protein_targets = {
+    (10, 13): {'Male': 34, 'Female': 34},
+    (14, 18): {'Male': 52, 'Female': 46},
+    (19, 120): {'Male': 56, 'Female': 46},
+}
+fibre_targets = {
+    (10, 13): {'Male': 31, 'Female': 26},
+    (14, 50): {'Male': 38, 'Female': 25},
+    (51, 120): {'Male': 30, 'Female': 21},
+}
+potassium_targets = {
+    (10, 13): {'Male': 2500, 'Female': 2300},
+    (14, 18): {'Male': 3000, 'Female': 2300},
+    (19, 120): {'Male': 3400, 'Female': 2600},
+}
+
+# Per-condition sodium ceilings (mg/day)
+sodium_limits = {'high_bp': 1500, 'low_bp': 3500}
+DEFAULT_SODIUM_LIMIT = 2300
+
+# How strongly each relative deviation from a target is penalised
+deviation_penalties = {
+    'energy_kcal': 4.0,
+    'protein_g': 2.0,
+    'carb_g': 1.0,
+    'fat_g': 1.0,
+    'fibre_g': 1.0,
+    'freesugar_g': 2.0,
+    'sodium_mg': 3.0,
+    'potassium_mg': 0.5,
+}
+
+
+def _lookup(table, age, gender):
+    for (low, high), values in table.items():
+        if low <= age <= high:
+            return values[gender]
+    raise ValueError(f"No reference intake for age {age}")
+
+
+def daily_targets(age, gender, condition):
+    """
+    Returns {nutrient: (kind, value)} with kind 'target' (two-sided),
+    'min' (at least) or 'max' (at most).
+    """
+    energy = _lookup(energy_targets, age, gender)
+    return {
+        'energy_kcal': ('target', energy),
+        'protein_g': ('min', _lookup(protein_targets, age, gender)),
+        'carb_g': ('target', energy * 0.55 / 4),      # ~55% of energy from carbohydrate
+        'fat_g': ('max', energy * 0.30 / 9),          # <= 30% of energy from fat
+        'fibre_g': ('min', _lookup(fibre_targets, age, gender)),
+        'freesugar_g': ('max', energy * 0.10 / 4),    # <= 10% of energy from free sugars
+        'sodium_mg': ('max', sodium_limits.get(condition, DEFAULT_SODIUM_LIMIT)),
+        'potassium_mg': ('min', _lookup(potassium_targets, age, gender)),
+    }
+
+
+def meal_plan_columns():
+    return ['food_name', *target_nutrients, *label_map.values()]
+
+
+class MealPlanner:
+    """
+    Precomputed nutrient matrix, condition scores and cluster labels for planning.
+
+    Parameters:
+        df (pd.DataFrame): Labeled foods with the target nutrients and Health_Label_* columns.
+        scorer (FoodScorer): Scorer providing the condition scores (built from df if omitted).
+        healthy_clusters (dict): Health_Label_* column -> healthy cluster label
+            (models.healthy_clusters() if omitted), as used by the recommendations.
+    """
+
+    def __init__(self, df, scorer=None, healthy_clusters=None):
+        scorer = scorer or FoodScorer(df)
+        self.healthy_clusters = saved_healthy_clusters() if healthy_clusters is None else healthy_clusters
+        self.food_names = df['food_name'].to_numpy()
+        self.nutrients = np.nan_to_num(df[target_nutrients].to_numpy(dtype=np.float64), nan=0.0)
+        self.scores = dict(zip(scorer.conditions, scorer.all_scores().T))
+        self.labels = {condition: df[column].to_numpy() for condition, column in label_map.items() if column in df}
+
+    def candidates(self, condition, n_candidates=150, healthy_cluster_label=None):
+        """
+        Vectorized pruning: the condition's top-scoring foods in its healthy cluster
+        (all foods if the cluster is empty), skipping foods with no energy.
+        healthy_cluster_label overrides the cluster from self.healthy_clusters.
+        """
+        if healthy_cluster_label is None:
+            healthy_cluster_label = self.healthy_clusters[label_map[condition]]
+        mask = self.nutrients[:, 0] > 0
+        labels = self.labels.get(condition)
+        if labels is not None and (mask & (labels == healthy_cluster_label)).any():
+            mask &= labels == healthy_cluster_label
+        rows = np.flatnonzero(mask)
+        return rows[top_k_indices(self.scores[condition][rows], n_candidates)]
+
+    def plan(self, age, gender, condition, n_candidates=150, max_portion=2.0, max_total=15.0, portion_step=0.25,
+             score_weight=0.5, healthy_cluster_label=None):
+        """
+        Builds a daily plan.
+
+        Parameters:
+            age (int), gender (str): Select the reference intakes.
+            condition (str): Condition key, e.g. 'diabetes'.
+            n_candidates (int): Foods kept after pruning.
+            max_portion (float): Largest portion of one food, in units of 100 g.
+            max_total (float): Largest total food weight for the day, in units of 100 g.
+            portion_step (float): Portions are rounded to this step (0.25 = 25 g).
+            score_weight (float): Weight of the condition score against target deviations.
+            healthy_cluster_label (int): Overrides the condition's healthy cluster (see candidates).
+
+        Returns:
+            MealPlan: foods (food_name, grams, score and nutrients), totals vs targets, solver status, seconds.
+        """
+        from scipy.optimize import linprog
+
+        start = time.perf_counter()
+        targets = daily_targets(age, gender, condition)
+        rows = self.candidates(condition, n_candidates, healthy_cluster_label)
+        nutrients = self.nutrients[rows]
+        scores = self.scores[condition][rows]
+        k = len(rows)
+        spread = scores.max() - scores.min() if k else 0.0
+        normalized = (scores - scores.min()) / spread if spread > 0 else np.ones(k)
+
+        # Variables: portions x (k), then one under- and one over-slack per nutrient
+        n_targets = len(target_nutrients)
+        cost = np.concatenate([-score_weight * normalized / max_portion, np.zeros(2 * n_targets)])
+        a_eq, b_eq = [], []
+        bounds = [(0, max_portion)] * k
+        for j, nutrient in enumerate(target_nutrients):
+            kind, value = targets[nutrient]
+            penalty = deviation_penalties[nutrient] / value
+            under, over = k + j, k + n_targets + j
+            cost[under] = penalty if kind in ('target', 'min') else 0.0
+            cost[over] = penalty if kind in ('target', 'max') else 0.0
+            row = np.zeros(k + 2 * n_targets)
+            row[:k] = nutrients[:, j]
+            row[under] = 1.0
+            row[over] = -1.0
+            a_eq.append(row)
+            b_eq.append(value)
+        bounds += [(0, None)] * (2 * n_targets)
+        a_ub = np.concatenate([np.ones(k), np.zeros(2 * n_targets)])[None, :]
+
+        result = linprog(cost, A_ub=a_ub, b_ub=[max_total], A_eq=np.array(a_eq), b_eq=np.array(b_eq),
+                         bounds=bounds, method='highs')
+        portions = result.x[:k] if result.status == 0 else np.zeros(k)
+        portions = np.round(portions / portion_step) * portion_step
+        chosen = np.flatnonzero(portions > 0)
+        chosen = chosen[np.argsort(-portions[chosen], kind='stable')]
+
+        foods = pd.DataFrame({
+            'food_name': self.food_names[rows[chosen]],
+            'grams': portions[chosen] * 100,
+            'score': scores[chosen],
+        })
+        for j, nutrient in enumerate(target_nutrients):
+            foods[nutrient] = nutrients[chosen, j] * portions[chosen]
+
+        totals = pd.DataFrame({
+            'nutrient': target_nutrients,
+            'planned': [foods[nutrient].sum() for nutrient in target_nutrients],
+            'goal': [targets[nutrient][1] for nutrient in target_nutrients],
+            'kind': [targets[nutrient][0] for nutrient in target_nutrients],
+        })
+        return MealPlan(foods, totals, result.message, time.perf_counter() - start)
@@ -0,0 +1,201 @@
+"""
+Persisted per-condition labeling models.
+
+The labeling pipeline saves one compact .npz artifact per condition holding
+everything needed to label new foods without refitting: feature weights,
+dropped collinear columns, MinMaxScaler min/scale, PCA mean/components and
+the fuzzy c-means centers, plus the clustering settings and which cluster is
+the healthy one. `predict_labels` applies them to new rows in one
+vectorized pass per condition; existing foods keep their labels because
+nothing is refit.
+
+Usage:
+    python models.py new_foods.csv -o new_foods_labeled.csv
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from fcm import memberships
+from preprocessing import convert_units
+
+DEFAULT_MODELS_DIR = 'models'
+
+
+class ConditionModel:
+    """
+    Fitted weighting -> scaling -> PCA -> FCM chain for one condition.
+
+    Parameters:
+        condition (str): Condition key, e.g. 'diabetes'.
+        label_column (str): Output column, e.g. 'Health_Label_Diabetes'.
+        feature_weights (dict): Feature (mg units) -> weight, before dropping.
+        drop_columns (list): Collinear features removed after weighting.
+        scale_min (np.ndarray): MinMaxScaler.min_ for the kept features.
+        scale (np.ndarray): MinMaxScaler.scale_ for the kept features.
+        pca_mean (np.ndarray): PCA.mean_.
+        pca_components (np.ndarray): PCA.components_, (n_components, n_features).
+        centers (np.ndarray): FCM centers in PCA space, (c, n_components).
+        m (float): FCM fuzzifier.
+        healthy_cluster (int): Cluster whose foods score best on the condition's weights.
+        config (dict): Clustering settings (c, m, n_components, seed, n_init) and any sweep scores.
+    """
+
+    def __init__(self, condition, label_column, feature_weights, drop_columns,
+                 scale_min, scale, pca_mean, pca_components, centers, m=2.0, healthy_cluster=None, config=None):
+        self.condition = condition
+        self.label_column = label_column
+        self.feature_weights = dict(feature_weights)
+        self.drop_columns = list(drop_columns)
+        self.scale_min = np.asarray(scale_min, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.pca_mean = np.asarray(pca_mean, dtype=np.float64)
+        self.pca_components = np.asarray(pca_components, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.m = float(m)
+        self.healthy_cluster = None if healthy_cluster is None else int(healthy_cluster)
+        self.config = dict(config or {})
+
+    @property
+    def features(self):
+        return [f for f in self.feature_weights if f not in self.drop_columns]
+
+    def scaled(self, df):
+        """Weighted and min-max scaled features of df (mg units), as the pipeline's df_selected_scaled_*."""
+        features = self.features
+        weights = np.array([self.feature_weights[f] for f in features])
+        return df[features].to_numpy(dtype=np.float64) * weights * self.scale + self.scale_min
+
+    def project(self, df):
+        """Coordinates of df's rows in the fitted PCA space."""
+        return (self.scaled(df) - self.pca_mean) @ self.pca_components.T
+
+    def memberships(self, df):
+        """Fuzzy memberships, (c, n_rows), in the same layout as cmeans' u."""
+        return memberships(self.project(df), self.centers, self.m)
+
+    def predict(self, df):
+        return np.argmax(self.memberships(df), axis=0)
+
+    def transfer_centers(self, scale_min, scale, pca_mean, pca_components):
+        """
+        This model's centers in the PCA space of another fit of the same features,
+        e.g. a refit after a small data change, to warm-start fuzzy c-means there.
+        """
+        weighted = (self.centers @ self.pca_components + self.pca_mean - self.scale_min) / self.scale
+        return (weighted * scale + scale_min - pca_mean) @ np.asarray(pca_components).T
+
+    def save(self, path):
+        meta = {
+            'condition': self.condition,
+            'label_column': self.label_column,
+            'feature_weights': self.feature_weights,
+            'drop_columns': self.drop_columns,
+            'm': self.m,
+            'healthy_cluster': self.healthy_cluster,
+            'config': self.config,
+        }
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), scale_min=self.scale_min, scale=self.scale,
+                 pca_mean=self.pca_mean, pca_components=self.pca_components, centers=self.centers)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as artifact:
+            meta = json.loads(str(artifact['meta']))
+            return cls(meta['condition'], meta['label_column'], meta['feature_weights'], meta['drop_columns'],
+                       artifact['scale_min'], artifact['scale'], artifact['pca_mean'],
+                       artifact['pca_components'], artifact['centers'], meta['m'],
+                       meta.get('healthy_cluster'), meta.get('config'))
+
+
+def healthy_cluster(scaled, weights, labels, c):
+    """
+    The cluster whose members have the highest mean health score.
+
+    Min-max scaling the weighted features keeps each weight's direction but
+    not its size, so the score of a row is its scaled features weighted by |weight|.
+
+    Parameters:
+        scaled (np.ndarray): (n, p) min-max scaled weighted features.
+        weights (np.ndarray): (p,) feature weights in the same column order.
+        labels (np.ndarray): (n,) cluster labels in [0, c).
+    """
+    scores = np.asarray(scaled, dtype=np.float64) @ np.abs(np.asarray(weights, dtype=np.float64))
+    counts = np.bincount(labels, minlength=c)
+    means = np.bincount(labels, weights=scores, minlength=c) / np.maximum(counts, 1)
+    means[counts == 0] = -np.inf
+    return int(np.argmax(means))
+
+
+def healthy_clusters(models_dir=DEFAULT_MODELS_DIR, default=0):
+    """Label column -> healthy cluster from the saved models; default for anything not recorded."""
+    clusters = {}
+    if os.path.isdir(models_dir):
+        for model in load_models(models_dir).values():
+            if model.healthy_cluster is not None:
+                clusters[model.label_column] = model.healthy_cluster
+    return defaultdict(lambda: default, clusters)
+
+
+def model_path(models_dir, condition):
+    return os.path.join(models_dir, f"{condition}.npz")
+
+
+def save_models(models, models_dir=DEFAULT_MODELS_DIR):
+    os.makedirs(models_dir, exist_ok=True)
+    for model in models.values():
+        model.save(model_path(models_dir, model.condition))
+
+
+def load_models(models_dir=DEFAULT_MODELS_DIR, conditions=None):
+    """Loads every condition artifact found in models_dir (or only the given conditions)."""
+    if conditions is None:
+        conditions = sorted(os.path.splitext(name)[0] for name in os.listdir(models_dir) if name.endswith('.npz'))
+    return {condition: ConditionModel.load(model_path(models_dir, condition)) for condition in conditions}
+
+
+def predict_labels(df, models, with_memberships=False):
+    """
+    Labels new foods with the persisted models.
+
+    Parameters:
+        df (pd.DataFrame): New rows in the DataCleaned.csv schema (original units).
+        models (dict): Condition -> ConditionModel, e.g. from load_models().
+        with_memberships (bool): Also return one membership column per cluster.
+
+    Returns:
+        pd.DataFrame: Health_Label_* columns (and memberships) aligned with df's index.
+    """
+    converted = convert_units(df)
+    result = {}
+    for condition, model in models.items():
+        u = model.memberships(converted)
+        result[model.label_column] = np.argmax(u, axis=0)
+        if with_memberships:
+            for cluster in range(u.shape[0]):
+                result[f"{model.label_column}_u{cluster}"] = u[cluster]
+    return pd.DataFrame(result, index=df.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label new foods with the persisted condition models.")
+    parser.add_argument('source', help="CSV in the DataCleaned.csv schema")
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR)
+    parser.add_argument('--memberships', action='store_true', help="Also write the fuzzy memberships")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.source)
+    labels = predict_labels(df, load_models(args.models_dir), args.memberships)
+    df.join(labels).to_csv(args.output, index=False)
+    print(f"Labeled {len(df)} foods -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Declared dependencies between the inputs and sections of streamlit_app.py.
+
+Every section of the page names the widgets it reads and the fragment it
+runs in (None = the main script body). A fragment is the `<name>_section`
+function of the app decorated with `@st.fragment`. Streamlit decides what a
+widget change re-executes from where the widget is rendered:
+
+    - a widget rendered inside a fragment reruns just that fragment;
+    - a widget rendered in the main body reruns the whole app.
+
+validate() rejects graphs where a section could show stale output (a widget
+rendered inside one fragment but read by another section, which a fragment
+rerun would not reach), undeclared widgets and widgets nothing reads.
+
+Usage:
+    python page_graph.py
+"""
+import sys
+
+# Widget key -> fragment that renders it (None = main script body)
+widgets = {
+    'conditions': None,
+    'combine': None,
+    'nutrient_filters': None,
+    'healthy_only': None,
+    'current_foods': 'alternatives',
+    'age': 'meal_plan',
+    'gender': 'meal_plan',
+    'meal_plan': 'meal_plan',
+}
+
+# Section -> (fragment it runs in, widgets it reads)
+sections = {
+    'summary': (None, {'conditions'}),
+    'recommended_foods': (None, {'conditions', 'combine', 'nutrient_filters', 'healthy_only'}),
+    'macronutrients': (None, {'conditions', 'combine', 'nutrient_filters', 'healthy_only'}),
+    'nutrient_tips': (None, {'conditions'}),
+    'foods_to_avoid': (None, {'conditions'}),
+    'download': (None, {'conditions', 'combine', 'nutrient_filters', 'healthy_only'}),
+    'full_table': (None, {'conditions', 'combine', 'nutrient_filters', 'healthy_only'}),
+    'alternatives': ('alternatives', {'conditions', 'current_foods'}),
+    'meal_plan': ('meal_plan', {'conditions', 'age', 'gender', 'meal_plan'}),
+}
+
+
+def dependents(widget, sections=sections):
+    """Sections that read widget."""
+    return [name for name, (_, inputs) in sections.items() if widget in inputs]
+
+
+def rerun_targets(widget, widgets=widgets):
+    """
+    What a change of widget re-executes.
+
+    Returns:
+        str or list: 'app', or the fragment that renders the widget.
+    """
+    owner = widgets[widget]
+    return 'app' if owner is None else [owner]
+
+
+def validate(widgets=widgets, sections=sections):
+    """
+    Checks the graph; returns a list of problems (empty when valid).
+    """
+    problems = []
+    fragments = {fragment for fragment, _ in sections.values() if fragment is not None}
+    for widget, owner in widgets.items():
+        if owner is not None and owner not in fragments:
+            problems.append(f"widget {widget!r} is rendered in unknown fragment {owner!r}")
+    for name, (fragment, inputs) in sections.items():
+        for widget in sorted(inputs):
+            if widget not in widgets:
+                problems.append(f"section {name!r} reads undeclared widget {widget!r}")
+                continue
+            owner = widgets[widget]
+            if owner is not None and owner != fragment:
+                # A widget inside a fragment only reruns that fragment by default
+                problems.append(f"section {name!r} reads {widget!r}, which only reruns fragment {owner!r}")
+    for widget in widgets:
+        if not dependents(widget, sections):
+            problems.append(f"widget {widget!r} is not read by any section")
+    return problems
+
+
+def main():
+    for widget, owner in widgets.items():
+        targets = rerun_targets(widget)
+        scope = 'whole app' if targets == 'app' else 'fragments ' + ', '.join(targets)
+        print(f"{widget:<16} ({owner or 'main body'}) -> {scope}")
+    problems = validate()
+    for problem in problems:
+        print(f"error: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
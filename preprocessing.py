@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Define conversion factors
+unit_mapping = {
+    "_g": 1000,   # Convert grams to mg
+    "_ug": 0.001  # Convert micrograms to mg
+}
+
+# Identifier and text columns that are not nutrients
+id_columns = ['food_code', 'food_name', 'primarysource']
+
+# Text columns with few distinct values, stored as pandas categoricals
+categorical_columns = ['food_name', 'primarysource']
+
+top_20_nutrition_features = [
+    'energy_kcal',     # Total energy is a key dietary measure
+    'carb_mg',          # Major macronutrient
+    'protein_mg',       # Essential macronutrient for body functions
+    'fat_mg',           # Macronutrient, affects energy and health
+    'freesugar_mg',     # High relevance for metabolic and dental health
+    'fibre_mg',         # Important for gut health and satiety
+    'sfa_mg',          # Saturated fat – linked to heart health
+    'cholesterol_mg',  # Cardiovascular risk factor
+    'sodium_mg',       # Blood pressure and heart health
+    'potassium_mg',    # Balances sodium, essential for muscle and nerve function
+    'calcium_mg',      # Bone health
+    'iron_mg',         # Oxygen transport in blood
+    'zinc_mg',         # Immunity and cellular metabolism
+    'vita_mg',         # Vitamin A – vision and immune function
+    'vite_mg',         # Vitamin E – antioxidant
+    'vitd3_mg',        # Vitamin D3 – bone and immune health
+    'vitk1_mg',        # Blood clotting and bone health
+    'folate_mg',       # DNA synthesis and pregnancy nutrition
+    'vitc_mg'          # Immune function and antioxidant
+]
+
+
+def unit_conversion_plan(columns, unit_mapping=unit_mapping):
+    """
+    Resolves the unit suffixes once for a header.
+
+    Returns:
+        tuple: (columns to convert, their conversion factors as np.ndarray,
+                {old name: new name} for every converted column)
+    """
+    matched, factors, renames = [], [], {}
+    for col in columns:
+        for unit, factor in unit_mapping.items():
+            if col.endswith(unit):
+                matched.append(col)
+                factors.append(factor)
+                renames[col] = col.replace(unit, "_mg")
+                break
+    return matched, np.array(factors, dtype=np.float64), renames
+
+
+def convert_units(df, unit_mapping=unit_mapping, dtype=None):
+    """
+    Converts units in a DataFrame based on the provided mapping.
+
+    The converted columns are scaled in one broadcast multiply and renamed in
+    one pass; other columns are passed through without copying.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing the columns to convert.
+        unit_mapping (dict): Dictionary mapping column suffixes (e.g., '_g', '_ug') to conversion factors.
+        dtype: Float dtype of the converted columns; default keeps float32 input as float32, otherwise float64.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with updated values and column names.
+    """
+    matched, factors, renames = unit_conversion_plan(df.columns, unit_mapping)
+    columns = {col: df[col] for col in df.columns}
+    if matched:
+        block = df[matched].to_numpy()
+        if dtype is None:
+            dtype = np.result_type(block.dtype, np.float32)
+        block = block.astype(dtype, copy=False) * factors.astype(dtype)
+        for k, col in enumerate(matched):
+            columns[col] = pd.Series(block[:, k], index=df.index, name=col, copy=False)
+    df_converted = pd.DataFrame(columns, copy=False)
+    df_converted.columns = [renames.get(col, col) for col in df.columns]
+    return df_converted
+
+
+def compact_dtypes(df):
+    """
+    float32 nutrients and categorical food_name/primarysource, roughly halving
+    the memory of a food table. Other columns are left as they are.
+    """
+    dtypes = {col: np.float32 for col in df.columns if pd.api.types.is_float_dtype(df[col])}
+    dtypes.update({col: 'category' for col in categorical_columns if col in df.columns})
+    return df.astype(dtypes)
+
+
+def read_food_table(path, compact=True, **kwargs):
+    """read_csv for DataCleaned.csv-style tables, parsing straight into compact dtypes."""
+    if not compact:
+        return pd.read_csv(path, **kwargs)
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: np.float32 for col in header if col not in id_columns}
+    dtypes.update({col: 'category' for col in categorical_columns if col in header})
+    return pd.read_csv(path, dtype=dtypes, **kwargs)
+
+
+def remove_outliers(df):
+    Q1 = df.quantile(0.25)
+    Q3 = df.quantile(0.75)
+    IQR = Q3 - Q1
+    lower_bound = Q1 - 1.5 * IQR
+    upper_bound = Q3 + 1.5 * IQR
+    return df[~((df < lower_bound) | (df > upper_bound)).any(axis=1)]
+
+
+def find_multicollinear_features(corr_matrix, threshold=0.8):
+    """
+    Identify highly correlated (multicollinear) features based on a correlation matrix.
+
+    Parameters:
+        corr_matrix (pd.DataFrame): Correlation matrix of the dataset (df.corr()).
+        threshold (float): Correlation coefficient threshold for considering features as collinear.
+
+    Returns:
+        list: A list of tuples with highly correlated feature pairs.
+    """
+    values = corr_matrix.to_numpy()
+    cols = corr_matrix.columns
+    # Upper triangle without the diagonal: each pair once, no self-correlation
+    rows, others = np.nonzero(np.triu(np.abs(values) > threshold, k=1))
+    return [(cols[i], cols[j], values[i, j]) for i, j in zip(rows, others)]
+
+
+def preprocess(data):
+    """
+    Runs the notebook's cleaning steps on the raw DataCleaned.csv table.
+
+    Parameters:
+        data (pd.DataFrame): Raw food table, original units.
+
+    Returns:
+        tuple: (nutrients converted to mg with outlier rows removed,
+                the matching rows of the raw table with food names)
+    """
+    df = convert_units(data)
+    df = df.drop(columns=[col for col in id_columns if col in df.columns])
+    df_copy = remove_outliers(df[top_20_nutrition_features])
+    indexes = df_copy.index
+    return df.loc[indexes], data.loc[indexes]
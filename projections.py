@@ -0,0 +1,134 @@
+"""
+Precomputed 3-D PCA projections and silhouette scores for the cluster view.
+
+The cluster view used to fit a PCA and compute silhouette_score (O(n^2)) on
+every rerun. Here both are computed once per condition and saved next to the
+labeled data (Labeled_Data.projections.npz), tagged with the data version and
+the weights they were computed from. The file is recomputed automatically
+when either changes, so the UI only reads cached coordinates and scalars.
+
+Usage:
+    python projections.py Labeled_Data.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from cluster_metrics import sampled_silhouette
+from food_store import open_store
+from scoring import cluster_condition_weights, label_map
+
+PROJECTIONS_VERSION = 2
+SILHOUETTE_SAMPLE_SIZE = 5000
+
+
+def default_projections_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.projections.npz'
+
+
+def weights_fingerprint(weights):
+    return hashlib.sha256(json.dumps(weights, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def projection_columns(weights=cluster_condition_weights):
+    columns = []
+    for condition, condition_map in weights.items():
+        for name in [label_map[condition], *condition_map]:
+            if name not in columns:
+                columns.append(name)
+    return columns
+
+
+def compute_projections(df, weights=cluster_condition_weights, silhouette_sample_size=SILHOUETTE_SAMPLE_SIZE):
+    """
+    Fits a 3-component PCA on each condition's features and scores its clustering.
+
+    Parameters:
+        df (pd.DataFrame): Labeled food table.
+        weights (dict): Condition -> {nutrient: weight}; the nutrients are the PCA inputs.
+
+    Returns:
+        dict: condition -> {'coords': (n, 3) float32, 'silhouette': float (NaN if undefined)}
+    """
+    from sklearn.decomposition import PCA
+
+    projections = {}
+    for condition, condition_map in weights.items():
+        df_clean = df[list(condition_map.keys())].fillna(0)
+        coords = PCA(n_components=3).fit_transform(df_clean)
+        cluster_labels = df[label_map[condition]].to_numpy()
+        try:
+            # Exact up to silhouette_sample_size rows, sampled (bounded memory) beyond that
+            silhouette = sampled_silhouette(coords, cluster_labels, silhouette_sample_size).mean
+        except ValueError:
+            # Fewer than two clusters present
+            silhouette = float('nan')
+        projections[condition] = {'coords': coords.astype(np.float32), 'silhouette': silhouette}
+    return projections
+
+
+def save_projections(path, projections, data_version, weights=cluster_condition_weights):
+    meta = {
+        'version': PROJECTIONS_VERSION,
+        'data_version': data_version,
+        'weights': weights_fingerprint(weights),
+        'conditions': list(projections),
+    }
+    arrays = {'meta': np.array(json.dumps(meta))}
+    for condition, projection in projections.items():
+        arrays[f"{condition}__coords"] = projection['coords']
+        arrays[f"{condition}__silhouette"] = np.array(projection['silhouette'])
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_projections(path, data_version, weights=cluster_condition_weights):
+    """Returns the cached projections, or None if missing or computed from other data/weights."""
+    try:
+        artifact = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    with artifact:
+        meta = json.loads(str(artifact['meta']))
+        if (meta.get('version') != PROJECTIONS_VERSION or meta.get('data_version') != data_version
+                or meta.get('weights') != weights_fingerprint(weights)):
+            return None
+        return {
+            condition: {
+                'coords': artifact[f"{condition}__coords"],
+                'silhouette': float(artifact[f"{condition}__silhouette"]),
+            }
+            for condition in meta['conditions']
+        }
+
+
+def load_projections(csv_path, store=None, weights=cluster_condition_weights):
+    """
+    Returns the projections for csv_path, computing and saving them on first use.
+    """
+    store = store or open_store(csv_path)
+    path = default_projections_path(csv_path)
+    projections = read_projections(path, store.version, weights)
+    if projections is None:
+        projections = compute_projections(store.frame(projection_columns(weights)), weights)
+        save_projections(path, projections, store.version, weights)
+    return projections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute PCA projections and silhouette scores for the cluster view.")
+    parser.add_argument('csv_path', nargs='?', default='Labeled_Data.csv')
+    args = parser.parse_args()
+
+    projections = load_projections(args.csv_path)
+    for condition, projection in projections.items():
+        print(f"{condition:<10} silhouette={projection['silhouette']:.4f}")
+    print(f"Saved {default_projections_path(args.csv_path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+UI-free batch recommendations.
+
+`recommend_batch` scores a whole table of user profiles (each with one or
+more conditions) against the food matrix: profiles are reduced to their
+distinct condition combinations, every combination is scored with one
+matrix multiply, and each row gets a partial top-k selection. The CLI
+streams a profiles CSV in chunks so nightly runs over hundreds of thousands
+of users never hold more than one chunk of results in memory.
+
+Profiles need a `conditions` (or `condition`) column, e.g. "diabetes;high_bp";
+any other columns (user_id, age, gender, ...) are carried through. A profile
+with no conditions or an unknown one gets a single row explaining why in the
+`error` column instead of stopping the run.
+
+Usage:
+    python recommend.py profiles.csv -o recommendations.csv --top-n 10
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+from scoring import FoodScorer, scoring_columns, top_k_rows
+
+CONDITION_SEPARATORS = re.compile(r'[;,|+]')
+
+
+def parse_conditions(value):
+    """'Diabetes; High_BP' -> ('diabetes', 'high_bp')"""
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, str):
+        items = CONDITION_SEPARATORS.split(value)
+    else:
+        items = []
+    return tuple(sorted({item.strip().lower() for item in items if str(item).strip()}))
+
+
+def condition_set_error(scorer, conditions):
+    """Why a profile's conditions cannot be scored, or '' if they can."""
+    if not conditions:
+        return "no conditions"
+    unknown = [condition for condition in conditions if condition not in scorer.conditions]
+    if unknown:
+        return f"unknown condition {unknown[0]!r}; expected one of {scorer.conditions}"
+    return ''
+
+
+def profile_weight_matrix(scorer, condition_sets):
+    """
+    Sums the condition weight rows for each profile's conditions.
+
+    Returns:
+        np.ndarray: (len(condition_sets), n_nutrients) weights.
+    """
+    index = {condition: row for row, condition in enumerate(scorer.conditions)}
+    weights = np.zeros((len(condition_sets), scorer.weight_matrix.shape[1]))
+    for i, conditions in enumerate(condition_sets):
+        for condition in conditions:
+            if condition not in index:
+                raise ValueError(f"Unknown condition {condition!r}; expected one of {scorer.conditions}")
+            weights[i] += scorer.weight_matrix[index[condition]]
+    return weights
+
+
+def recommend_batch(profiles, top_n=10, scorer=None):
+    """
+    Recommends top_n foods for every profile.
+
+    Parameters:
+        profiles (pd.DataFrame): One row per user with a 'conditions' or 'condition' column.
+        top_n (int): Foods per user.
+        scorer (FoodScorer): Scoring matrices; loaded from Labeled_Data.csv if omitted.
+
+    Returns:
+        pd.DataFrame: Long format, one row per (profile, rank): the profile's
+        other columns, rank (1-based), food_name, score and an empty error.
+        A profile whose conditions are empty or unknown gets one row with
+        only its error set (see condition_set_error).
+    """
+    scorer = scorer or load_scorer()
+    column = 'conditions' if 'conditions' in profiles.columns else 'condition'
+
+    # Only a handful of distinct condition combinations exist, so parse and score each once
+    raw_codes, raw_values = pd.factorize(profiles[column], use_na_sentinel=False)
+    parsed = [parse_conditions(value) for value in raw_values]
+    unique_sets = sorted(set(parsed))
+    set_index = {conditions: i for i, conditions in enumerate(unique_sets)}
+    inverse = np.array([set_index[conditions] for conditions in parsed], dtype=np.intp)[raw_codes]
+
+    errors = np.array([condition_set_error(scorer, conditions) for conditions in unique_sets], dtype=object)
+    valid = np.flatnonzero(errors == '')
+    weights = profile_weight_matrix(scorer, [unique_sets[i] for i in valid])
+    score_matrix = weights @ scorer.matrix.T
+    top_rows = top_k_rows(score_matrix, top_n)
+    top_scores = np.take_along_axis(score_matrix, top_rows, axis=1)
+
+    # k rows per scorable profile, one error row for each of the others
+    k = top_rows.shape[1]
+    scored_set = np.full(len(unique_sets), -1, dtype=np.intp)
+    scored_set[valid] = np.arange(len(valid))
+    profile_set = scored_set[inverse]
+    ok = profile_set >= 0
+    counts = np.where(ok, k, 1)
+    repeat = np.repeat(np.arange(len(profiles)), counts)
+    within = np.arange(len(repeat)) - np.repeat(np.cumsum(counts) - counts, counts)
+    row_ok = ok[repeat]
+    row_set, row_within = profile_set[repeat][row_ok], within[row_ok]
+
+    passthrough = profiles.drop(columns=[column]).reset_index(drop=True)
+    result = passthrough.loc[repeat].reset_index(drop=True)
+    labels = np.array(['; '.join(conditions) for conditions in unique_sets], dtype=object)
+    result[column] = labels[inverse][repeat]
+    result['rank'] = pd.array(within + 1, dtype='Int64')
+    result.loc[~row_ok, 'rank'] = pd.NA
+    food_names = np.full(len(repeat), None, dtype=object)
+    food_names[row_ok] = scorer.food_names[top_rows[row_set, row_within]]
+    result['food_name'] = food_names
+    scores = np.full(len(repeat), np.nan)
+    scores[row_ok] = top_scores[row_set, row_within]
+    result['score'] = scores
+    result['error'] = errors[inverse][repeat]
+    return result
+
+
+def load_scorer(csv_path='Labeled_Data.csv'):
+    return FoodScorer(open_store(csv_path).frame(scoring_columns()))
+
+
+def run_batch(profiles_path, output_path, top_n=10, chunk_size=50_000, csv_path='Labeled_Data.csv'):
+    """
+    Streams profiles_path in chunks and writes recommendations to output_path atomically.
+
+    Returns:
+        tuple: (profiles processed, profiles rejected with an error, seconds)
+    """
+    start = time.perf_counter()
+    scorer = load_scorer(csv_path)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.recommend-', suffix='.csv', dir=directory)
+    n_profiles = n_rejected = 0
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            for chunk in pd.read_csv(profiles_path, chunksize=chunk_size):
+                result = recommend_batch(chunk, top_n, scorer)
+                result.to_csv(f, index=False, header=n_profiles == 0)
+                n_profiles += len(chunk)
+                n_rejected += int((result['error'] != '').sum())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return n_profiles, n_rejected, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute recommendations for a CSV of user profiles.")
+    parser.add_argument('profiles')
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="Profiles read and scored per chunk")
+    parser.add_argument('--data', default='Labeled_Data.csv', help="Labeled food table")
+    args = parser.parse_args()
+
+    n_profiles, n_rejected, seconds = run_batch(args.profiles, args.output, args.top_n, args.chunk_size, args.data)
+    print(f"Recommended for {n_profiles - n_rejected} profiles in {seconds:.2f} s -> {args.output}")
+    if n_rejected:
+        print(f"{n_rejected} profiles had no or unknown conditions; see the error column")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Versioned cache for recommendation results.
+
+A rerun that only moved the age slider asks for the same
+(condition, top_n, healthy_cluster_label) as before. ResultCache keeps the
+finished RecommendationResult for each input tuple: the ranked frame, the
+encoded CSV for the download button and the chart data. Everything is built
+together on a miss. Entries are tied to the data version (the
+Labeled_Data.csv content hash). The first lookup with a new version drops
+all entries built from the old data. With four conditions the working set is
+tiny, so after warm-up practically every rerun is a hit.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+RecommendationResult = namedtuple('RecommendationResult', ['frame', 'csv', 'chart'])
+
+chart_nutrients = ['carb_g', 'protein_g', 'fat_g']
+
+
+class LRUCache:
+    """
+    Size-bounded least-recently-used cache with hit/miss counters.
+
+    Bounded by entry count and, when sizeof is given, by the total size of the
+    values (max_bytes); a single value larger than max_bytes is not cached.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _evict(self, key):
+        del self._entries[key]
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        if key in self._entries:
+            self._evict(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of computed results for one data version at a time.
+
+    Shared by all sessions of a server process (Streamlit runs each session in
+    its own thread). A miss builds outside the lock, so a slow build never
+    blocks hits for other keys.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=None, sizeof=None):
+        self.entries = LRUCache(max_entries, max_bytes, sizeof)
+        self.data_version = None
+        self.lock = threading.Lock()
+
+    def get_or_build(self, key, data_version, build):
+        with self.lock:
+            if data_version != self.data_version:
+                self.entries.clear()
+                self.data_version = data_version
+            value = self.entries.get(key)
+        if value is None:
+            value = build()
+            with self.lock:
+                if data_version == self.data_version:
+                    self.entries.put(key, value)
+        return value
+
+    def recommendation(self, scorer, condition, data_version, top_n=10, cluster_labels=None,
+                       healthy_cluster_label=None, rows=None, filters=()):
+        """
+        Cached build_recommendation for (condition, top_n, healthy_cluster_label, filters).
+
+        filters identifies rows in the key, e.g. the filters.Predicate tuple they were selected by.
+        """
+        key = ('recommendation', condition, top_n, healthy_cluster_label, tuple(filters))
+        return self.get_or_build(key, data_version, lambda: build_recommendation(
+            scorer, condition, top_n, cluster_labels, healthy_cluster_label, rows))
+
+    def combined_recommendation(self, scorer, conditions, data_version, top_n=10, mode='pareto', mask=None,
+                                healthy_clusters=None, filters=()):
+        """
+        Cached build_combined_recommendation for (conditions, mode, top_n, healthy_clusters, filters).
+
+        healthy_clusters and filters identify the mask in the key, e.g. the tuple of
+        (label column, healthy cluster) pairs and the filters.Predicate tuple it was built from.
+        """
+        key = ('combined', tuple(conditions), mode, top_n, healthy_clusters, tuple(filters))
+        return self.get_or_build(key, data_version, lambda: build_combined_recommendation(
+            scorer, conditions, top_n, mode, mask))
+
+
+def build_recommendation(scorer, condition, top_n=10, cluster_labels=None, healthy_cluster_label=None, rows=None):
+    """
+    Ranks the foods once and prepares every view of the result.
+
+    Parameters:
+        scorer (FoodScorer): Scorer for the app's weights.
+        condition (str): Condition key, e.g. 'diabetes'.
+        cluster_labels (np.ndarray): The condition's Health_Label_* column; with
+            healthy_cluster_label set, only that cluster is ranked (all foods if it is empty).
+        rows (np.ndarray): If given, only these ascending row positions are ranked (filters.FilterIndex.rows).
+
+    Returns:
+        RecommendationResult: frame (food_name, score and the condition's nutrients),
+        csv (UTF-8 bytes of the frame) and chart (macronutrients indexed by food_name).
+    """
+    mask = None
+    if cluster_labels is not None and healthy_cluster_label is not None:
+        mask = np.asarray(cluster_labels) == healthy_cluster_label
+        if not mask.any():
+            mask = None
+    frame = scorer.recommend(condition, top_n, mask, rows)
+    csv = frame.to_csv(index=False).encode("utf-8")
+    chart = frame.set_index('food_name')[[col for col in chart_nutrients if col in frame.columns]]
+    return RecommendationResult(frame, csv, chart)
+
+
+def build_combined_recommendation(scorer, conditions, top_n=10, mode='pareto', mask=None):
+    """
+    Multi-condition counterpart of build_recommendation (see FoodScorer.recommend_multi).
+
+    Parameters:
+        mask (np.ndarray): Rows to rank, e.g. scoring.healthy_cluster_mask; None ranks all foods.
+    """
+    frame = scorer.recommend_multi(conditions, top_n, mask, mode)
+    csv = frame.to_csv(index=False).encode("utf-8")
+    chart = frame.set_index('food_name')[[col for col in chart_nutrients if col in frame.columns]]
+    return RecommendationResult(frame, csv, chart)
@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+
+from skyline import blend_scores, pareto_top_k
+
+# Disease-condition mapping
+condition_weights = {
+    'diabetes': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.15, 'carb_g': -0.12, 'fat_g': -0.08},
+    'obesity': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.12, 'fat_g': -0.10, 'carb_g': -0.08},
+    'high_bp': {'sodium_mg': -0.18, 'potassium_mg': 0.12, 'magnesium_mg': 0.08, 'calcium_mg': 0.08},
+    'low_bp': {'sodium_mg': 0.15, 'iron_mg': 0.10, 'protein_g': 0.08, 'fibre_g': -0.05}
+}
+
+# Wider weight sets used by the cluster view
+cluster_condition_weights = {
+    'diabetes': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.15, 'carb_g': -0.12, 'fat_g': -0.08, 'sfa_mg': -0.06,
+                 'magnesium_mg': 0.06, 'chromium_mg': 0.05, 'vitc_mg': 0.05, 'vitb6_mg': 0.04, 'folate_ug': 0.04,
+                 'zinc_mg': 0.03, 'potassium_mg': 0.03, 'vitb1_mg': 0.03, 'vitd3_ug': 0.02, 'carotenoids_ug': 0.02},
+    'obesity': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.12, 'fat_g': -0.10, 'carb_g': -0.08,
+                'energy_kcal': -0.08, 'sfa_mg': -0.06, 'vitc_mg': 0.05, 'potassium_mg': 0.05, 'zinc_mg': 0.03,
+                'vitb6_mg': 0.02, 'folate_ug': 0.02, 'carotenoids_ug': 0.02, 'magnesium_mg': 0.02},
+    'high_bp': {'sodium_mg': -0.18, 'potassium_mg': 0.12, 'magnesium_mg': 0.08, 'calcium_mg': 0.08, 'fibre_g': 0.08,
+                'sfa_mg': -0.07, 'freesugar_g': -0.06, 'cholesterol_mg': -0.05, 'fat_g': -0.04, 'protein_g': 0.04,
+                'vite_mg': 0.02, 'vitc_mg': 0.02, 'folate_ug': 0.02, 'vitb6_mg': 0.02, 'zinc_mg': 0.02,
+                'vitk1_ug': 0.01, 'vitd3_ug': 0.02, 'carotenoids_ug': 0.02},
+    'low_bp': {'sodium_mg': 0.15, 'iron_mg': 0.10, 'protein_g': 0.08, 'fibre_g': -0.05, 'carb_g': 0.05, 'fat_g': 0.04,
+               'cholesterol_mg': 0.03, 'potassium_mg': -0.06, 'magnesium_mg': 0.05, 'calcium_mg': 0.05,
+               'folate_ug': 0.05, 'vitb1_mg': 0.04, 'vitb6_mg': 0.04, 'vitc_mg': 0.02, 'vite_mg': 0.02,
+               'vitk1_ug': 0.01, 'zinc_mg': 0.02, 'carotenoids_ug': 0.03, 'freesugar_g': 0.02}
+}
+
+# Map condition to health label column
+label_map = {
+    'diabetes': 'Health_Label_Diabetes',
+    'obesity': 'Health_Label_Obesity',
+    'high_bp': 'Health_Label_HighBP',
+    'low_bp': 'Health_Label_LowBP'
+}
+
+
+def scoring_columns(weights=condition_weights):
+    """Returns the columns a FoodScorer needs, so loaders can skip the rest."""
+    columns = ['food_name']
+    for condition_map in weights.values():
+        for nutrient in condition_map:
+            if nutrient not in columns:
+                columns.append(nutrient)
+    return columns
+
+
+def top_k_indices(scores, top_n):
+    """
+    Returns the positions of the top_n highest scores, best first.
+
+    Uses a partial selection (argpartition) so only the selected rows are sorted.
+    Ties are broken by row position to keep the ranking deterministic.
+    """
+    n = len(scores)
+    top_n = min(top_n, n)
+    if top_n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_n < n:
+        candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def top_k_rows(score_matrix, top_n):
+    """
+    Row-wise version of top_k_indices for an (n_queries, n_foods) score matrix.
+
+    Returns:
+        np.ndarray: (n_queries, top_n) food positions, best first.
+    """
+    n = score_matrix.shape[1]
+    top_n = min(top_n, n)
+    if top_n <= 0:
+        return np.empty((score_matrix.shape[0], 0), dtype=np.intp)
+    if top_n < n:
+        candidates = np.argpartition(-score_matrix, top_n - 1, axis=1)[:, :top_n]
+    else:
+        candidates = np.broadcast_to(np.arange(n), score_matrix.shape)
+    # Order by position first so the stable sort on score breaks ties by position
+    candidates = np.sort(candidates, axis=1)
+    order = np.argsort(-np.take_along_axis(score_matrix, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class FoodScorer:
+    """
+    Holds a NaN-free nutrient matrix and a condition x nutrient weight matrix
+    so a recommendation is one matrix-vector product plus a top-k selection.
+
+    Parameters:
+        df (pd.DataFrame): Labeled food table with a 'food_name' column.
+        weights (dict): Condition -> {nutrient: weight} mapping.
+    """
+
+    def __init__(self, df, weights=condition_weights):
+        nutrients = []
+        for condition_map in weights.values():
+            for nutrient in condition_map:
+                if nutrient in df.columns and nutrient not in nutrients:
+                    nutrients.append(nutrient)
+        matrix = np.nan_to_num(df[nutrients].to_numpy(dtype=np.float64), nan=0.0)
+        self._setup(matrix, nutrients, df['food_name'].to_numpy(), weights, df.index)
+        self.df = df
+
+    @classmethod
+    def from_matrix(cls, matrix, nutrients, food_names, weights=condition_weights):
+        """
+        Wraps an existing NaN-free (n_foods, n_nutrients) matrix without copying it,
+        e.g. the memory-mapped matrix from shared_matrix. Nutrients without a
+        weight simply get weight 0.
+        """
+        scorer = cls.__new__(cls)
+        scorer._setup(matrix, list(nutrients), food_names, weights, pd.RangeIndex(len(matrix)))
+        scorer.df = None
+        return scorer
+
+    def _setup(self, matrix, nutrients, food_names, weights, index):
+        self.weights = weights
+        self.conditions = list(weights.keys())
+        self.nutrients = nutrients
+        self.nutrient_index = {nutrient: i for i, nutrient in enumerate(nutrients)}
+        self.matrix = matrix
+        self.food_names = food_names
+        self.index = index
+
+        self.weight_matrix = np.zeros((len(self.conditions), len(nutrients)))
+        for row, condition in enumerate(self.conditions):
+            for nutrient, weight in weights[condition].items():
+                if nutrient in self.nutrient_index:
+                    self.weight_matrix[row, self.nutrient_index[nutrient]] = weight
+
+    def __len__(self):
+        return len(self.food_names)
+
+    def scores(self, condition):
+        """Returns the score of every food for one condition."""
+        return self.matrix @ self.weight_matrix[self.conditions.index(condition)]
+
+    def all_scores(self):
+        """Returns an (n_foods, n_conditions) score matrix in self.conditions order."""
+        return self.matrix @ self.weight_matrix.T
+
+    def top_indices(self, condition, top_n=10):
+        return top_k_indices(self.scores(condition), top_n)
+
+    def result_frame(self, rows, scores, condition):
+        """
+        Builds the recommendation table for the given row positions.
+
+        Columns match the original recommend_top_foods output:
+        food_name, score and the condition's nutrients (NaN filled with 0).
+        """
+        return self._frame(rows, scores[rows], condition)
+
+    def _frame(self, rows, row_scores, condition):
+        data = {'food_name': self.food_names[rows], 'score': row_scores}
+        for nutrient in self.weights[condition]:
+            if nutrient in self.nutrient_index:
+                data[nutrient] = self.matrix[rows, self.nutrient_index[nutrient]]
+        return pd.DataFrame(data, index=self.index[rows])
+
+    def recommend(self, condition, top_n=10, mask=None, rows=None):
+        """
+        Returns the top_n foods for a condition, optionally only among rows where mask is True
+        and/or among the given ascending row positions (e.g. filters.FilterIndex.rows).
+        A small set of rows is scored on its own instead of scoring every food.
+        """
+        if rows is not None:
+            candidates = np.asarray(rows, dtype=np.intp)
+            if mask is not None:
+                candidates = candidates[np.asarray(mask)[candidates]]
+            if len(candidates) * 8 < len(self):
+                weights = self.weight_matrix[self.conditions.index(condition)]
+                candidate_scores = np.asarray(self.matrix[candidates]) @ weights
+            else:
+                candidate_scores = self.scores(condition)[candidates]
+            best = top_k_indices(candidate_scores, top_n)
+            return self._frame(candidates[best], candidate_scores[best], condition)
+        scores = self.scores(condition)
+        if mask is None:
+            rows = top_k_indices(scores, top_n)
+        else:
+            candidates = np.flatnonzero(mask)
+            rows = candidates[top_k_indices(scores[candidates], top_n)]
+        return self.result_frame(rows, scores, condition)
+
+    def condition_scores(self, conditions):
+        """Returns an (n_foods, len(conditions)) score matrix from a single matrix product."""
+        rows = [self.conditions.index(condition) for condition in conditions]
+        return self.matrix @ self.weight_matrix[rows].T
+
+    def recommend_multi(self, conditions, top_n=10, mask=None, mode='pareto', weights=None):
+        """
+        Returns the top_n foods for several conditions at once.
+
+        Parameters:
+            mode (str): 'pareto' ranks by Pareto layer (foods no other food beats on
+                every condition come first) and by the blended score within a layer;
+                'blend' ranks by the blended score alone.
+            weights (list): Per-condition weight of the blend (default equal). Each
+                condition's scores are min-max scaled over the candidates first.
+
+        Returns:
+            pd.DataFrame: food_name, score (the blend), score_<condition> per
+            condition, pareto_rank ('pareto' mode) and every selected condition's nutrients.
+        """
+        if mode not in ('pareto', 'blend'):
+            raise ValueError(f"Unknown mode {mode!r}")
+        scores = self.condition_scores(conditions)
+        candidates = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        points = scores[candidates]
+        blend = blend_scores(points, weights)
+        if mode == 'pareto':
+            positions, ranks = pareto_top_k(points, top_n, blend=blend)
+        else:
+            positions, ranks = top_k_indices(blend, top_n), None
+        rows = candidates[positions]
+
+        data = {'food_name': self.food_names[rows], 'score': blend[positions]}
+        for j, condition in enumerate(conditions):
+            data[f'score_{condition}'] = scores[rows, j]
+        if ranks is not None:
+            data['pareto_rank'] = ranks
+        for condition in conditions:
+            for nutrient in self.weights[condition]:
+                if nutrient in self.nutrient_index and nutrient not in data:
+                    data[nutrient] = self.matrix[rows, self.nutrient_index[nutrient]]
+        return pd.DataFrame(data, index=self.index[rows])
+
+
+def healthy_cluster_mask(labels, conditions, healthy_clusters):
+    """
+    Rows that fall in the healthy cluster of every condition, or None when no
+    food does (callers then rank all foods, as recommend_top_foods_by_cluster does).
+
+    Parameters:
+        labels (dict): Health_Label_* column -> (n,) cluster labels, e.g. SharedMatrix.labels.
+        healthy_clusters (dict): Health_Label_* column -> healthy cluster label (models.healthy_clusters).
+    """
+    mask = None
+    for condition in conditions:
+        column = label_map[condition]
+        if column not in labels:
+            continue
+        in_cluster = np.asarray(labels[column]) == healthy_clusters[column]
+        mask = in_cluster if mask is None else mask & in_cluster
+    if mask is None or not mask.any():
+        return None
+    return mask
+
+
+def recommend_top_foods(scorer, condition, top_n=10):
+    return scorer.recommend(condition, top_n)
+
+
+def recommend_top_foods_by_cluster(scorer, cluster_labels, condition, healthy_cluster_label=0, top_n=10):
+    """
+    Ranks only the foods in the condition's healthy cluster, falling back to
+    all foods when that cluster is empty.
+
+    Parameters:
+        scorer (FoodScorer): Scorer built with the cluster view's weights.
+        cluster_labels (np.ndarray): The condition's Health_Label_* column.
+    """
+    condition = condition.lower()
+    mask = np.asarray(cluster_labels) == healthy_cluster_label
+    top_foods = scorer.recommend(condition, top_n, mask if mask.any() else None)
+    return top_foods[['food_name', 'score']]
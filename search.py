@@ -0,0 +1,283 @@
+"""
+Instant food-name search with typo tolerance.
+
+SearchIndex is built once per data version from the food names (saved next
+to the labeled data as Labeled_Data.search.pkl) and answers a query without
+scanning the food table:
+
+    - Names are split into lower-case, accent-free words. The distinct words
+      form a prefix trie flattened into a sorted array: the words below a trie
+      node (sharing a prefix) are a contiguous range found by two binary
+      searches, and their foods are one contiguous slice of the postings.
+    - Foods are numbered by rank (shorter names first, then alphabetically)
+      and the postings hold those numbers. A query marks the foods having a
+      word that starts with each query word, so the best matches are the
+      first marked positions and only the start of the mask is scanned.
+      Foods whose name starts with the first query word come first.
+    - When that finds fewer than k foods, a character-trigram index over the
+      vocabulary supplies words similar to each query word (Dice coefficient
+      of their trigrams), so typos such as "masla dosa" still match.
+
+Usage:
+    python search.py Labeled_Data.csv "masla dosa" -k 10
+"""
+import argparse
+import os
+import pickle
+import re
+import time
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+
+SEARCH_VERSION = 1
+FUZZY_MIN_SIMILARITY = 0.5
+SCAN_BLOCK = 65536
+
+Matches = namedtuple('Matches', ['rows', 'kinds', 'similarity'])
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Lower-case form without accents, used for names and queries alike."""
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text):
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word):
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _group(keys, values, n_keys):
+    """Values grouped by integer key: (offsets, values sorted by key then value)."""
+    order = np.lexsort((values, keys))
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets, values[order]
+
+
+def _first_marked(mask, k):
+    """Positions of the first k True entries, scanning only as far as needed."""
+    found, count = [], 0
+    for start in range(0, len(mask), SCAN_BLOCK):
+        if count >= k:
+            break
+        hits = np.flatnonzero(mask[start:start + SCAN_BLOCK])[:k - count]
+        found.append(hits + start)
+        count += len(hits)
+    return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+
+class SearchIndex:
+    """
+    Word-prefix and trigram index over food names.
+
+    Parameters:
+        food_names (array-like): Names in row order (the store's row order).
+    """
+
+    def __init__(self, food_names):
+        self.food_names = np.asarray(food_names, dtype=object)
+        normalized = pd.Series(self.food_names).fillna('').map(normalize)
+        n = len(normalized)
+
+        # Rank -> row and row -> rank; postings hold ranks so lower means a better match
+        self.order = pd.DataFrame({'length': normalized.str.len(), 'name': normalized}) \
+            .sort_values(['length', 'name'], kind='stable').index.to_numpy()
+        ranks = np.empty(n, dtype=np.int32)
+        ranks[self.order] = np.arange(n, dtype=np.int32)
+
+        words = normalized.str.findall(_WORD).explode().dropna()
+        rows = words.index.to_numpy()
+        first = words.groupby(level=0).cumcount().to_numpy() == 0
+        # Hash the words first and sort only the (much smaller) vocabulary
+        codes, vocabulary = pd.factorize(words.to_numpy(dtype=object))
+        vocabulary = np.asarray(vocabulary, dtype=str)
+        order = np.argsort(vocabulary, kind='stable')
+        self.terms = vocabulary[order]
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        term_ids = position[codes]
+
+        # A word repeated within a name is posted once
+        pairs = np.unique(term_ids * n + ranks[rows])
+        self.offsets, self.postings = _group(pairs // n, (pairs % n).astype(np.int32), len(self.terms))
+        self.first_offsets, self.first_postings = _group(term_ids[first], ranks[rows[first]], len(self.terms))
+
+        gram_pairs = [(gram, term) for term, word in enumerate(self.terms) for gram in trigrams(word)]
+        self.grams, gram_ids = np.unique(np.array([gram for gram, _ in gram_pairs], dtype=str), return_inverse=True)
+        gram_terms = np.array([term for _, term in gram_pairs], dtype=np.int32)
+        self.gram_offsets, self.gram_terms = _group(gram_ids.astype(np.int64), gram_terms, len(self.grams))
+        self.term_grams = np.bincount(gram_terms, minlength=len(self.terms))
+
+    def __len__(self):
+        return len(self.food_names)
+
+    def prefix_range(self, word):
+        """Vocabulary range [lo, hi) of the words starting with word."""
+        if not word or len(word) > self.terms.dtype.itemsize // 4:
+            return 0, 0
+        successor = word[:-1] + chr(ord(word[-1]) + 1)
+        return int(np.searchsorted(self.terms, word)), int(np.searchsorted(self.terms, successor))
+
+    def _mark(self, offsets, postings, lo, hi):
+        mask = np.zeros(len(self), dtype=bool)
+        mask[postings[offsets[lo]:offsets[hi]]] = True
+        return mask
+
+    def similar_words(self, word):
+        """Vocabulary ids and Dice similarity of the words sharing enough trigrams with word."""
+        grams = trigrams(word)
+        found = []
+        for gram in grams:
+            i = np.searchsorted(self.grams, gram)
+            if i < len(self.grams) and self.grams[i] == gram:
+                found.append(self.gram_terms[self.gram_offsets[i]:self.gram_offsets[i + 1]])
+        if not found:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        terms, shared = np.unique(np.concatenate(found), return_counts=True)
+        dice = 2 * shared / (len(grams) + self.term_grams[terms])
+        keep = dice >= FUZZY_MIN_SIMILARITY
+        return terms[keep], dice[keep]
+
+    def _prefix_matches(self, words, k):
+        ranges = [self.prefix_range(word) for word in words]
+        if any(lo == hi for lo, hi in ranges):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        matched = None
+        for lo, hi in sorted(ranges, key=lambda r: self.offsets[r[1]] - self.offsets[r[0]]):
+            mask = self._mark(self.offsets, self.postings, lo, hi)
+            matched = mask if matched is None else matched & mask
+        leading = self._mark(self.first_offsets, self.first_postings, *ranges[0]) & matched
+        name_hits = _first_marked(leading, k)
+        matched[name_hits] = False
+        return name_hits, _first_marked(matched, k - len(name_hits))
+
+    def _fuzzy_matches(self, words, k, exclude):
+        total = np.zeros(len(self), dtype=np.float32)
+        for word in words:
+            best = np.zeros(len(self), dtype=np.float32)
+            terms, similarity = self.similar_words(word)
+            # Ascending, so a food keeps the similarity of its closest word
+            for i in np.argsort(similarity, kind='stable'):
+                best[self.postings[self.offsets[terms[i]]:self.offsets[terms[i] + 1]]] = similarity[i]
+            lo, hi = self.prefix_range(word)
+            best[self.postings[self.offsets[lo]:self.offsets[hi]]] = 1.0
+            total += best
+        total /= len(words)
+        total[exclude] = 0
+        candidates = np.flatnonzero(total >= FUZZY_MIN_SIMILARITY)
+        candidates = candidates[np.argsort(-total[candidates], kind='stable')[:k]]
+        return candidates, total[candidates]
+
+    def lookup(self, query, k=10):
+        """
+        Best k matches for query: foods whose name starts with the first query
+        word, then foods with a word starting with every query word, then
+        typo-tolerant matches.
+
+        Returns:
+            Matches: rows (positions in food_names), kinds ('name', 'word' or
+            'fuzzy') and similarity (1.0 unless fuzzy).
+        """
+        words = tokenize(query)
+        if not words or k <= 0:
+            return Matches(np.empty(0, dtype=np.intp), np.empty(0, dtype=object), np.empty(0))
+        name_hits, word_hits = self._prefix_matches(words, k)
+        found = np.concatenate([name_hits, word_hits]).astype(np.intp)
+        fuzzy_hits, fuzzy_similarity = self._fuzzy_matches(words, k - len(found), found) \
+            if len(found) < k else (np.empty(0, dtype=np.intp), np.empty(0))
+        ranks = np.concatenate([found, fuzzy_hits]).astype(np.intp)
+        kinds = np.array(['name'] * len(name_hits) + ['word'] * len(word_hits) + ['fuzzy'] * len(fuzzy_hits),
+                         dtype=object)
+        similarity = np.concatenate([np.ones(len(found)), fuzzy_similarity])
+        return Matches(self.order[ranks], kinds, similarity)
+
+    def search(self, query, k=10, scorer=None, labels=None):
+        """
+        Ranked matches for query with their condition scores and health labels.
+
+        Parameters:
+            scorer (FoodScorer): Adds score_<condition> for each of its conditions;
+                must share the index's row order (e.g. built from the same store).
+            labels (mapping): Health_Label_* column -> values in row order, e.g. SharedMatrix.labels.
+
+        Returns:
+            pd.DataFrame: food_name, match, similarity, the scores and label columns; indexed by row.
+        """
+        matches = self.lookup(query, k)
+        rows = matches.rows
+        data = {'food_name': self.food_names[rows], 'match': matches.kinds, 'similarity': matches.similarity}
+        if scorer is not None:
+            scores = np.asarray(scorer.matrix[rows]) @ scorer.weight_matrix.T
+            for j, condition in enumerate(scorer.conditions):
+                data[f'score_{condition}'] = scores[:, j]
+        for column in (labels if labels is not None else ()):
+            data[column] = np.asarray(labels[column])[rows]
+        return pd.DataFrame(data, index=rows)
+
+
+def default_search_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.search.pkl'
+
+
+def save_search_index(path, index, data_version):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': SEARCH_VERSION, 'data_version': data_version, 'index': index}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_search_index(csv_path, store=None):
+    """Returns the saved index for csv_path, rebuilding it when the data has changed."""
+    store = store or open_store(csv_path)
+    path = default_search_path(csv_path)
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == SEARCH_VERSION and saved.get('data_version') == store.version:
+            return saved['index']
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    index = SearchIndex(store.column('food_name'))
+    save_search_index(path, index, store.version)
+    return index
+
+
+def main():
+    from scoring import FoodScorer
+    from shared_matrix import attach_shared
+
+    parser = argparse.ArgumentParser(description="Search foods by name, tolerating typos.")
+    parser.add_argument('csv_path')
+    parser.add_argument('query')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    store = open_store(args.csv_path)
+    index = load_search_index(args.csv_path, store)
+    shared = attach_shared(args.csv_path, store=store)
+    scorer = FoodScorer.from_matrix(shared.nutrients, shared.nutrient_columns, shared.food_names)
+    start = time.perf_counter()
+    result = index.search(args.query, args.k, scorer, shared.labels)
+    elapsed = time.perf_counter() - start
+    print(result.to_string())
+    print(f"{len(result)} matches in {elapsed * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Local JSON recommendation service.
+
+A small asyncio HTTP/1.1 server (standard library only) serving the
+recommender from the shared memory-mapped food matrix (shared_matrix.py):
+
+    GET  /recommend?condition=diabetes&top_n=10[&healthy_only=1[&cluster=0]]
+    GET  /labels?food=Idli&food=Naan
+    POST /labels            JSON list of rows in the DataCleaned.csv schema (needs models/)
+    GET  /similar?condition=high_bp&food=Idli&k=5
+    GET  /stats
+
+CPU-bound scoring runs in a thread pool (NumPy releases the GIL) and encoded
+responses are kept in an LRU cache keyed by (endpoint, condition, top_n,
+filters). Connections are kept alive, so `loadgen.py` can measure
+throughput and tail latency from one machine.
+
+Usage:
+    python service.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+from models import healthy_clusters
+from result_cache import LRUCache
+from scoring import FoodScorer, label_map
+from shared_matrix import attach_shared
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+MAX_TOP_N = 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class RecommendationService:
+    """
+    Shared food matrix plus the endpoint implementations (no HTTP here).
+
+    Parameters:
+        csv_path (str): Labeled food table.
+        models_dir (str): Persisted condition models for POST /labels and the healthy clusters.
+    """
+
+    def __init__(self, csv_path='Labeled_Data.csv', models_dir='models'):
+        self.csv_path = csv_path
+        self.models_dir = models_dir
+        self.store = open_store(csv_path)
+        shared = attach_shared(csv_path, store=self.store)
+        self.scorer = FoodScorer.from_matrix(shared.nutrients, shared.nutrient_columns, shared.food_names)
+        self.labels = {condition: shared.labels[column] for condition, column in label_map.items()
+                       if column in shared.labels}
+        self.healthy_clusters = healthy_clusters(models_dir)
+        self.name_to_row = {name: row for row, name in enumerate(self.scorer.food_names)}
+        self._similarity = None
+        self._models = None
+
+    @property
+    def data_version(self):
+        return self.store.version
+
+    def condition(self, value):
+        condition = (value or '').lower()
+        if condition not in self.scorer.conditions:
+            raise BadRequest(f"condition must be one of {self.scorer.conditions}")
+        return condition
+
+    def recommend(self, condition, top_n=10, healthy_only=False, cluster=None):
+        """healthy_only ranks the condition's healthy cluster from the models; cluster overrides it."""
+        mask = None
+        if healthy_only and condition in self.labels:
+            if cluster is None:
+                cluster = self.healthy_clusters[label_map[condition]]
+            mask = self.labels[condition] == cluster
+            if not mask.any():
+                mask = None
+        top_foods = self.scorer.recommend(condition, top_n, mask)
+        return {'condition': condition, 'top_n': top_n, 'foods': top_foods.to_dict(orient='records')}
+
+    def food_labels(self, foods):
+        result = []
+        for food in foods:
+            row = self.name_to_row.get(food)
+            if row is None:
+                result.append({'food_name': food, 'found': False})
+                continue
+            entry = {'food_name': food, 'found': True}
+            for condition, labels in self.labels.items():
+                entry[label_map[condition]] = int(labels[row])
+            result.append(entry)
+        return {'foods': result}
+
+    def predict(self, rows):
+        from models import load_models, predict_labels
+
+        if self._models is None:
+            if not os.path.isdir(self.models_dir):
+                raise BadRequest(f"No models in {self.models_dir}; run labeling.py first")
+            self._models = load_models(self.models_dir)
+        df = pd.DataFrame(rows)
+        return {'labels': predict_labels(df, self._models).to_dict(orient='records')}
+
+    def similar(self, condition, food, k=5):
+        from similarity import load_similarity_index
+
+        if self._similarity is None:
+            self._similarity = load_similarity_index(self.csv_path, self.store)
+        try:
+            alternatives = self._similarity.alternatives(condition, [food], k)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        return {'condition': condition, 'food': food, 'alternatives': alternatives.to_dict(orient='records')}
+
+
+def _int_param(query, name, default, low, high):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if not low <= value <= high:
+        raise BadRequest(f"{name} must be between {low} and {high}")
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    return json.dumps(payload, default=_json_default).encode('utf-8')
+
+
+class ServiceApp:
+    """Routes requests, caches encoded responses and offloads work to a thread pool."""
+
+    def __init__(self, service, workers=None, cache_size=1024):
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.cache = LRUCache(cache_size)
+        self.requests = 0
+        self.started = time.time()
+
+    async def _cached(self, key, func, *args):
+        body = self.cache.get(key)
+        if body is None:
+            loop = asyncio.get_running_loop()
+            body = encode(await loop.run_in_executor(self.pool, func, *args))
+            self.cache.put(key, body)
+        return body
+
+    async def dispatch(self, method, target, body):
+        self.requests += 1
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            if url.path == '/recommend' and method == 'GET':
+                condition = self.service.condition(query.get('condition', [''])[0])
+                top_n = _int_param(query, 'top_n', 10, 1, MAX_TOP_N)
+                healthy_only = query.get('healthy_only', ['0'])[0].lower() in ('1', 'true', 'yes')
+                cluster = _int_param(query, 'cluster', 0, 0, 100) if 'cluster' in query else None
+                key = ('recommend', condition, top_n, healthy_only, cluster)
+                return 200, await self._cached(key, self.service.recommend, condition, top_n, healthy_only, cluster)
+            if url.path == '/similar' and method == 'GET':
+                condition = self.service.condition(query.get('condition', [''])[0])
+                food = query.get('food', [''])[0]
+                k = _int_param(query, 'k', 5, 1, 100)
+                return 200, await self._cached(('similar', condition, food, k), self.service.similar, condition, food, k)
+            if url.path == '/labels' and method == 'GET':
+                foods = tuple(query.get('food', []))
+                return 200, await self._cached(('labels', foods), self.service.food_labels, foods)
+            if url.path == '/labels' and method == 'POST':
+                try:
+                    rows = json.loads(body or b'[]')
+                except ValueError:
+                    raise BadRequest("Body must be a JSON list of rows")
+                loop = asyncio.get_running_loop()
+                return 200, encode(await loop.run_in_executor(self.pool, self.service.predict, rows))
+            if url.path == '/stats' and method == 'GET':
+                return 200, encode({
+                    'data_version': self.service.data_version,
+                    'requests': self.requests,
+                    'cache_entries': len(self.cache),
+                    'cache_hits': self.cache.hits,
+                    'cache_misses': self.cache.misses,
+                    'uptime_s': time.time() - self.started,
+                })
+            if url.path in ('/recommend', '/similar', '/labels', '/stats'):
+                return 405, encode({'error': f"{method} not allowed on {url.path}"})
+            return 404, encode({'error': f"Unknown path {url.path}"})
+        except BadRequest as e:
+            return 400, encode({'error': str(e)})
+        except KeyError as e:
+            return 400, encode({'error': f"Missing column {e}"})
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as e:  # Keep serving other requests
+                    status, payload = 500, encode({'error': repr(e)})
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(app, host='127.0.0.1', port=8765):
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    print(f"Serving data version {app.service.data_version[:12]} on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recommendations as JSON over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="Threads for CPU-bound scoring")
+    parser.add_argument('--cache-size', type=int, default=1024, help="Cached responses (LRU)")
+    parser.add_argument('--data', default='Labeled_Data.csv')
+    parser.add_argument('--models-dir', default='models')
+    args = parser.parse_args()
+
+    app = ServiceApp(RecommendationService(args.data, args.models_dir), args.workers, args.cache_size)
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Read-only food matrix shared by every Streamlit / service process on a host.
+
+`publish` writes one immutable segment per data version:
+
+    Labeled_Data.shared/
+        CURRENT                  name of the live segment
+        <version>/nutrients.npy  (n, p) float64, NaN -> 0, C order
+        <version>/labels.npy     (n, l) Health_Label_* columns
+        <version>/names.npy      UTF-8 bytes of every food name, concatenated
+        <version>/offsets.npy    (n + 1,) int64 start of each name in names.npy
+        <version>/missing.npy    (n,) bool, food names that were empty in the CSV
+        <version>/meta.json      columns, row count and data version
+
+Processes attach with np.load(mmap_mode='r'), so all of them (and all their
+sessions) map the same page-cache pages instead of holding their own pandas
+copy; per-process memory stays flat as workers are added. A relabel
+publishes a new segment and flips CURRENT with os.replace. Processes that
+still map the old segment keep a valid view until they reattach, because
+unlinked files stay alive while mapped.
+
+Usage:
+    python shared_matrix.py Labeled_Data.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+
+SHARED_FORMAT_VERSION = 1
+CURRENT = 'CURRENT'
+KEEP_SEGMENTS = 2
+
+
+def default_shared_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + '.shared'
+
+
+def segment_name(data_version):
+    return f"v{SHARED_FORMAT_VERSION}-{data_version[:16]}"
+
+
+class StringTable:
+    """
+    Memory-mapped strings that are only decoded for the rows asked for.
+
+    Indexing with an int returns a str (None for a missing value); indexing
+    with a slice, mask or index array returns an object array.
+    """
+
+    def __init__(self, blob, offsets, missing):
+        self.blob = blob
+        self.offsets = offsets
+        self.missing = missing
+
+    def __len__(self):
+        return len(self.missing)
+
+    def _decode(self, row):
+        if self.missing[row]:
+            return None
+        return bytes(self.blob[self.offsets[row]:self.offsets[row + 1]]).decode('utf-8')
+
+    def __getitem__(self, rows):
+        if np.isscalar(rows):
+            return self._decode(int(rows))
+        rows = np.arange(len(self))[rows]
+        out = np.empty(rows.size, dtype=object)
+        out[:] = [self._decode(row) for row in rows.ravel()]
+        return out.reshape(rows.shape)
+
+    def __iter__(self):
+        return (self._decode(row) for row in range(len(self)))
+
+    def to_numpy(self):
+        return self[np.arange(len(self))]
+
+
+def _encode_strings(values):
+    encoded = [None if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value))
+               else str(value).encode('utf-8') for value in values]
+    lengths = np.array([len(value) if value is not None else 0 for value in encoded], dtype=np.int64)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    missing = np.array([value is None for value in encoded], dtype=bool)
+    blob = np.frombuffer(b''.join(value for value in encoded if value is not None), dtype=np.uint8)
+    return blob, offsets, missing
+
+
+def publish(store, shared_dir):
+    """
+    Writes the store's current data as a new segment (if not there yet) and points CURRENT at it.
+
+    Parameters:
+        store (FoodStore): Source columns; numeric columns become the nutrient
+            matrix, Health_Label_* columns the label matrix.
+        shared_dir (str): Directory holding the segments.
+
+    Returns:
+        str: Path of the live segment.
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    name = segment_name(store.version)
+    segment = os.path.join(shared_dir, name)
+    if not os.path.isdir(segment):
+        columns = store.manifest['columns']
+        label_columns = [c for c in columns if c.startswith('Health_Label_') and columns[c]['kind'] == 'numeric']
+        nutrient_columns = [c for c in columns if columns[c]['kind'] == 'numeric' and c not in label_columns]
+
+        tmp_dir = tempfile.mkdtemp(prefix='.segment-', dir=shared_dir)
+        try:
+            nutrients = np.empty((store.n_rows, len(nutrient_columns)), dtype=np.float64)
+            for j, column in enumerate(nutrient_columns):
+                nutrients[:, j] = store.column(column)
+            np.nan_to_num(nutrients, copy=False, nan=0.0)
+            np.save(os.path.join(tmp_dir, 'nutrients.npy'), nutrients)
+            labels = np.column_stack([store.column(c) for c in label_columns]) if label_columns \
+                else np.empty((store.n_rows, 0), dtype=np.int64)
+            np.save(os.path.join(tmp_dir, 'labels.npy'), np.ascontiguousarray(labels))
+            blob, offsets, missing = _encode_strings(store.column('food_name'))
+            np.save(os.path.join(tmp_dir, 'names.npy'), blob)
+            np.save(os.path.join(tmp_dir, 'offsets.npy'), offsets)
+            np.save(os.path.join(tmp_dir, 'missing.npy'), missing)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump({
+                    'format_version': SHARED_FORMAT_VERSION,
+                    'data_version': store.version,
+                    'n_rows': store.n_rows,
+                    'nutrient_columns': nutrient_columns,
+                    'label_columns': label_columns,
+                }, f, indent=2)
+            try:
+                os.rename(tmp_dir, segment)
+            except OSError:
+                # Another process published the same version first; theirs is identical
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    pointer_tmp = os.path.join(shared_dir, f".{CURRENT}.{os.getpid()}")
+    with open(pointer_tmp, 'w') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(shared_dir, CURRENT))
+    _prune(shared_dir, name)
+    return segment
+
+
+def _prune(shared_dir, live):
+    """Removes all but the newest KEEP_SEGMENTS segments (mapped files stay valid for their readers)."""
+    others = [entry for entry in os.scandir(shared_dir)
+              if entry.is_dir() and not entry.name.startswith('.') and entry.name != live]
+    others.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in others[KEEP_SEGMENTS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_segment(shared_dir):
+    try:
+        with open(os.path.join(shared_dir, CURRENT)) as f:
+            return os.path.join(shared_dir, f.read().strip())
+    except OSError:
+        return None
+
+
+class SharedFoodMatrix:
+    """
+    Read-only attachment to one segment.
+
+    Attributes:
+        nutrients (np.ndarray): (n, p) memory-mapped, NaN-free nutrient matrix.
+        nutrient_columns (list): Column names of nutrients.
+        labels (dict): Health_Label_* column -> (n,) memory-mapped view.
+        food_names (StringTable): Lazily decoded food names.
+        version (str): Content hash of the source CSV.
+    """
+
+    def __init__(self, segment):
+        self.segment = segment
+        with open(os.path.join(segment, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.version = self.meta['data_version']
+        self.n_rows = self.meta['n_rows']
+        self.nutrient_columns = self.meta['nutrient_columns']
+        self.nutrient_index = {column: j for j, column in enumerate(self.nutrient_columns)}
+        self.nutrients = np.asarray(np.load(os.path.join(segment, 'nutrients.npy'), mmap_mode='r'))
+        label_matrix = np.asarray(np.load(os.path.join(segment, 'labels.npy'), mmap_mode='r'))
+        self.labels = {column: label_matrix[:, j] for j, column in enumerate(self.meta['label_columns'])}
+        self.food_names = StringTable(*(np.asarray(np.load(os.path.join(segment, name + '.npy'), mmap_mode='r'))
+                                        for name in ('names', 'offsets', 'missing')))
+
+    def __len__(self):
+        return self.n_rows
+
+    def frame(self, columns):
+        """DataFrame view of the requested columns; numeric columns are not copied."""
+        data = {}
+        for column in columns:
+            if column == 'food_name':
+                data[column] = self.food_names.to_numpy()
+            elif column in self.nutrient_index:
+                data[column] = self.nutrients[:, self.nutrient_index[column]]
+            elif column in self.labels:
+                data[column] = self.labels[column]
+        return pd.DataFrame(data, copy=False)
+
+
+def attach_shared(csv_path, shared_dir=None, store=None):
+    """
+    Attaches to the segment for the current contents of csv_path, publishing it first if needed.
+    """
+    store = store or open_store(csv_path)
+    shared_dir = shared_dir or default_shared_dir(csv_path)
+    segment = current_segment(shared_dir)
+    if segment is None or os.path.basename(segment) != segment_name(store.version) or not os.path.isdir(segment):
+        segment = publish(store, shared_dir)
+    return SharedFoodMatrix(segment)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the shared read-only food matrix for a food table.")
+    parser.add_argument('csv_path', nargs='?', default='Labeled_Data.csv')
+    parser.add_argument('--shared-dir', default=None, help="Segment directory, e.g. under /dev/shm")
+    args = parser.parse_args()
+
+    shared = attach_shared(args.csv_path, args.shared_dir)
+    print(f"{shared.segment}: {shared.n_rows} foods x {len(shared.nutrient_columns)} nutrients, "
+          f"{len(shared.labels)} label columns")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Nearest-neighbour "healthier alternative" index.
+
+For each condition a KD-tree is built over the same weighted, min-max scaled
+nutrient space the labeling pipeline clusters in (df_selected_scaled_* in the
+notebook). Given foods a user already eats, `alternatives` returns their k
+nearest neighbours that score higher for the condition. The trees are built
+once per data version and saved next to the labeled data
+(Labeled_Data.similarity.pkl).
+
+Usage:
+    python similarity.py Labeled_Data.csv high_bp "Masala dosa"
+"""
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+from labeling import condition_pipelines, weight_features
+from preprocessing import convert_units
+from scoring import FoodScorer
+
+SIMILARITY_VERSION = 2
+
+
+def default_similarity_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.similarity.pkl'
+
+
+def scaled_features(df, condition):
+    """Weighted, collinear-dropped, min-max scaled features for one condition (mg units)."""
+    weighted = weight_features(convert_units(df), condition).to_numpy(dtype=np.float64)
+    low = weighted.min(axis=0)
+    span = weighted.max(axis=0) - low
+    return (weighted - low) / np.where(span == 0, 1.0, span)
+
+
+class SimilarityIndex:
+    """
+    Per-condition KD-trees plus the condition scores used to pick healthier neighbours.
+
+    Parameters:
+        df (pd.DataFrame): Labeled foods in the original units.
+        conditions (list): Conditions to index, default all of condition_pipelines.
+    """
+
+    def __init__(self, df, conditions=None, leaf_size=40):
+        from sklearn.neighbors import KDTree
+
+        self.conditions = list(conditions or condition_pipelines)
+        self.food_names = df['food_name'].to_numpy()
+        # Names are not unique in every catalogue, so a name maps to all of its rows
+        self.name_rows = {}
+        for row, name in enumerate(self.food_names):
+            self.name_rows.setdefault(name, []).append(row)
+        scorer = FoodScorer(df)
+        self.scores = {condition: scorer.scores(condition) for condition in self.conditions}
+        self.trees = {
+            condition: KDTree(scaled_features(df, condition), leaf_size=leaf_size)
+            for condition in self.conditions
+        }
+
+    def __len__(self):
+        return len(self.food_names)
+
+    def rows_for(self, food_names):
+        """
+        Rows of the named foods.
+
+        Raises:
+            ValueError: For an unknown name, or a name shared by several foods (query those by row).
+        """
+        rows = []
+        for name in food_names:
+            found = self.name_rows.get(name)
+            if found is None:
+                raise ValueError(f"Unknown food {name!r}")
+            if len(found) > 1:
+                raise ValueError(f"{len(found)} foods are named {name!r} (rows {found}); pass rows instead")
+            rows.append(found[0])
+        return np.array(rows, dtype=np.intp)
+
+    def label(self, row):
+        """Display name of a row; shared names get the row number appended."""
+        name = self.food_names[row]
+        return name if len(self.name_rows[name]) == 1 else f"{name} (#{row})"
+
+    def neighbours(self, condition, rows, k=5, healthier=True):
+        """
+        Returns (neighbour rows, distances) for a batch of query rows, both (len(rows), k).
+
+        With healthier=True only neighbours scoring strictly higher than the query
+        are kept; missing slots are padded with -1 / inf.
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        tree = self.trees[condition]
+        scores = self.scores[condition]
+        data = np.asarray(tree.data)
+        n = len(self)
+        out_rows = np.full((len(rows), k), -1, dtype=np.intp)
+        out_dist = np.full((len(rows), k), np.inf)
+        pending = np.arange(len(rows))
+        fetch = min(n, 4 * k + 1)
+
+        while len(pending):
+            dist, idx = tree.query(data[rows[pending]], k=fetch)
+            unresolved = []
+            for i, query in enumerate(pending):
+                keep = idx[i] != rows[query]
+                if healthier:
+                    keep &= scores[idx[i]] > scores[rows[query]]
+                found = idx[i][keep][:k]
+                if len(found) < k and fetch < n:
+                    unresolved.append(query)
+                    continue
+                out_rows[query, :len(found)] = found
+                out_dist[query, :len(found)] = dist[i][keep][:k]
+            pending = np.array(unresolved, dtype=np.intp)
+            fetch = min(n, fetch * 4)
+        return out_rows, out_dist
+
+    def alternatives(self, condition, food_names=(), k=5, healthier=True, rows=None):
+        """
+        Looks up the k most similar (healthier) foods for each named food.
+
+        Parameters:
+            food_names (list): Foods to query by name (see rows_for).
+            rows (array-like): Foods to query by row instead, e.g. when names repeat.
+
+        Returns:
+            pd.DataFrame: query_food, food_name, distance, score, score_gain.
+        """
+        rows = self.rows_for(food_names) if rows is None else np.asarray(rows, dtype=np.intp)
+        if len(rows) and (rows.min() < 0 or rows.max() >= len(self)):
+            raise ValueError(f"Rows must be between 0 and {len(self) - 1}")
+        neighbour_rows, distances = self.neighbours(condition, rows, k, healthier)
+        scores = self.scores[condition]
+        records = []
+        for query, found, dist in zip(rows, neighbour_rows, distances):
+            for row, distance in zip(found, dist):
+                if row < 0:
+                    continue
+                records.append({
+                    'query_food': self.food_names[query],
+                    'food_name': self.food_names[row],
+                    'distance': distance,
+                    'score': scores[row],
+                    'score_gain': scores[row] - scores[query],
+                })
+        return pd.DataFrame(records, columns=['query_food', 'food_name', 'distance', 'score', 'score_gain'])
+
+
+def save_similarity_index(path, index, data_version):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': SIMILARITY_VERSION, 'data_version': data_version, 'index': index}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_similarity_index(csv_path, store=None):
+    """Returns the saved index for csv_path, rebuilding it when the data has changed."""
+    store = store or open_store(csv_path)
+    path = default_similarity_path(csv_path)
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == SIMILARITY_VERSION and saved.get('data_version') == store.version:
+            return saved['index']
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    index = SimilarityIndex(store.frame())
+    save_similarity_index(path, index, store.version)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find similar foods that score better for a condition.")
+    parser.add_argument('csv_path')
+    parser.add_argument('condition', choices=list(condition_pipelines))
+    parser.add_argument('foods', nargs='+')
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    index = load_similarity_index(args.csv_path)
+    try:
+        alternatives = index.alternatives(args.condition, args.foods, args.k)
+    except ValueError as e:
+        parser.error(str(e))
+    print(alternatives.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
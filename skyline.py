@@ -0,0 +1,183 @@
+"""
+Vectorized skyline (Pareto front) queries over per-condition food scores.
+
+A food dominates another if it scores at least as well for every selected
+condition and strictly better for one. The skyline is the set of foods no
+other food dominates; peeling it off repeatedly gives Pareto layers (rank 1 =
+skyline, rank 2 = skyline of the rest, ...).
+
+skyline() avoids the O(n^2) pairwise test:
+    1. The few foods with the highest score sum cannot be dominated by
+       anything with a lower sum, and on typical data they dominate most of the
+       catalogue. One vectorized pass per pivot discards those rows, shrinking
+       the candidate set as it goes (and stopping early when a pivot barely
+       helps, as with anti-correlated scores).
+    2. The survivors are processed in descending score-sum order in blocks
+       (sort-filter-skyline). A block is compared only against the skyline found so
+       far and against itself, never against rows that were already discarded.
+
+When only the best few rows are wanted (limit, pareto_top_k), a growing
+prefix of the rows by score is searched instead, which is exact because a
+row's dominators always rank above it. A top-10 over a million foods then
+touches a few thousand rows after one argpartition.
+"""
+import numpy as np
+
+DEFAULT_PIVOTS = 16
+DEFAULT_BLOCK_SIZE = 512
+MIN_PIVOT_GAIN = 0.05
+
+
+def dominates(a, b):
+    """Boolean (len(a), len(b)) matrix: a[i] dominates b[j]. Scores are maximized."""
+    # One column at a time: reducing over a short trailing axis is several times slower
+    ge = np.ones((len(a), len(b)), dtype=bool)
+    gt = np.zeros((len(a), len(b)), dtype=bool)
+    for j in range(a.shape[1]):
+        column_a, column_b = a[:, j, None], b[None, :, j]
+        ge &= column_a >= column_b
+        gt |= column_a > column_b
+    return ge & gt
+
+
+def _sort_filter(points, order, candidates, limit, block_size):
+    """Sort-filter-skyline over candidates; stops once limit skyline rows are found."""
+    # Rows are only dominated by rows earlier in this order, so a row that survives is final
+    candidates = candidates[np.lexsort((candidates, -order[candidates]))]
+    front_rows, front, found = [], np.empty((0, points.shape[1])), 0
+    for start in range(0, len(candidates), block_size):
+        rows = candidates[start:start + block_size]
+        block = points[rows]
+        if len(front):
+            keep = ~dominates(front, block).any(axis=0)
+            rows, block = rows[keep], block[keep]
+        keep = ~dominates(block, block).any(axis=0)
+        rows, block = rows[keep], block[keep]
+        front_rows.append(rows)
+        front = np.concatenate([front, block])
+        found += len(rows)
+        if limit is not None and found >= limit:
+            break
+    rows = np.concatenate(front_rows) if front_rows else np.empty(0, dtype=np.intp)
+    return rows if limit is None else rows[:limit]
+
+
+def skyline(points, order=None, limit=None, n_pivots=DEFAULT_PIVOTS, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Positions of the non-dominated rows of points, best first.
+
+    Parameters:
+        points (np.ndarray): (n, k) scores, larger is better in every column.
+        order (np.ndarray): Per-row score that strictly increases with dominance
+            (if a dominates b, order[a] > order[b]), e.g. blend_scores(points);
+            default the row sum. The skyline is returned in descending order.
+        limit (int): Stop after this many skyline rows; they are the best by order.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n == 0 or limit == 0:
+        return np.empty(0, dtype=np.intp)
+    order = points.sum(axis=1) if order is None else np.asarray(order, dtype=np.float64)
+
+    if limit is not None:
+        # Everything that can dominate a row ranks above it, so a prefix of the order is self-contained
+        size = max(64 * limit, block_size)
+        while size < n:
+            rows = _sort_filter(points, order, np.argpartition(-order, size - 1)[:size], limit, block_size)
+            if len(rows) >= limit:
+                return rows
+            size *= 4
+
+    candidates = np.arange(n)
+    n_pivots = min(n_pivots, n)
+    pivots = np.argpartition(-order, n_pivots - 1)[:n_pivots] if n_pivots < n else candidates
+    for pivot in points[pivots[np.argsort(-order[pivots], kind='stable')]]:
+        dominated = dominates(pivot[None, :], points[candidates])[0]
+        candidates = candidates[~dominated]
+        if dominated.sum() < MIN_PIVOT_GAIN * len(dominated):
+            # Anti-correlated scores: further pivots would cost a full pass each for little gain
+            break
+    return _sort_filter(points, order, candidates, limit, block_size)
+
+
+def blend_scores(points, weights=None):
+    """
+    Weighted mean of the columns after min-max scaling each to [0, 1], so
+    conditions with larger raw score ranges do not dominate the blend.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return np.empty(0)
+    # Per column and folded into one product: axis-0 reductions and a scaled copy cost more than the ranking
+    low = np.array([points[:, j].min() for j in range(points.shape[1])])
+    high = np.array([points[:, j].max() for j in range(points.shape[1])])
+    span = np.where(high > low, high - low, 1.0)
+    weights = np.ones(points.shape[1]) if weights is None else np.asarray(weights, dtype=np.float64)
+    scale = weights / weights.sum() / span
+    return points @ scale - low @ scale
+
+
+def _peel(points, blend, candidates, top_n):
+    """Pareto layers of candidates until top_n rows are found; every layer but the last is complete."""
+    remaining = candidates
+    layers = []
+    needed = top_n
+    while len(remaining) and needed > 0:
+        layer = remaining[skyline(points[remaining], blend[remaining], limit=needed)]
+        layers.append(layer)
+        needed -= len(layer)
+        if needed > 0:
+            remaining = np.setdiff1d(remaining, layer, assume_unique=True)
+    return layers
+
+
+def _all_dominated(points, rows, front):
+    """Whether every one of rows is dominated by some row of front."""
+    for pivot in points[front]:
+        rows = rows[~dominates(pivot[None, :], points[rows])[0]]
+        if not len(rows):
+            return True
+    return not len(rows)
+
+
+def pareto_top_k(points, top_n, weights=None, blend=None):
+    """
+    The top_n rows by Pareto rank, best rank first and blend_scores(points,
+    weights) descending within a rank. Layers are peeled only until top_n rows
+    are found, and the last layer needed stops as soon as it has filled top_n.
+
+    Layers are peeled inside a growing prefix of the rows by blend: a row's
+    dominators all have a higher blend, so ranks inside the prefix are exact,
+    and the prefix is large enough once every row outside it is dominated by
+    the last complete layer (so ranks no better than the last layer taken).
+
+    Parameters:
+        blend (np.ndarray): blend_scores(points, weights) if the caller already has it.
+
+    Returns:
+        tuple: (row positions, their Pareto rank starting at 1)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n == 0 or top_n <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    blend = blend_scores(points, weights) if blend is None else blend
+
+    size = max(64 * top_n, DEFAULT_BLOCK_SIZE)
+    while True:
+        if size >= n:
+            layers = _peel(points, blend, np.arange(n), top_n)
+            break
+        prefix = np.argpartition(-blend, size - 1)[:size]
+        layers = _peel(points, blend, prefix, top_n)
+        if len(layers) == 1:
+            # Rank-1 rows outside the prefix have a lower blend than every row taken
+            break
+        outside = np.ones(n, dtype=bool)
+        outside[prefix] = False
+        if _all_dominated(points, np.flatnonzero(outside), layers[-2]):
+            break
+        size *= 4
+    rows = np.concatenate(layers)
+    ranks = np.concatenate([np.full(len(layer), rank) for rank, layer in enumerate(layers, start=1)])
+    return rows, ranks
@@ -1,19 +1,60 @@
 
 import streamlit as st
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
-# Load data
-df = pd.read_csv("Labeled_Data.csv")
+from filters import FilterIndex, Predicate, parse_filters
+from food_store import FoodStore, open_store
+from instrumentation import begin_rerun, end_rerun, fragment_span, span, streamlit_session_id
+from result_cache import ResultCache
+from models import healthy_clusters
+from scoring import FoodScorer, condition_weights, healthy_cluster_mask, label_map, scoring_columns
+from shared_matrix import attach_shared
+from meal_plan import MealPlanner, meal_plan_columns
+from page_graph import validate
+from similarity import load_similarity_index
 
-# Disease-condition mapping
-condition_weights = {
-    'diabetes': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.15, 'carb_g': -0.12, 'fat_g': -0.08},
-    'obesity': {'fibre_g': 0.15, 'protein_g': 0.12, 'freesugar_g': -0.12, 'fat_g': -0.10, 'carb_g': -0.08},
-    'high_bp': {'sodium_mg': -0.18, 'potassium_mg': 0.12, 'magnesium_mg': 0.08, 'calcium_mg': 0.08},
-    'low_bp': {'sodium_mg': 0.15, 'iron_mg': 0.10, 'protein_g': 0.08, 'fibre_g': -0.05}
-}
+
+# Attach to the read-only food matrix shared by all server processes, once per data version
+@st.cache_resource(max_entries=2)
+def load_scorer(csv_path, store_dir, data_version):
+    with span('build.scorer'):
+        shared = attach_shared(csv_path, store=FoodStore(store_dir))
+        return FoodScorer.from_matrix(shared.nutrients, shared.nutrient_columns, shared.food_names)
+
+
+# Health_Label_* columns of the shared matrix and the models' healthy clusters, once per data version
+@st.cache_resource(max_entries=2)
+def load_health_labels(csv_path, store_dir, data_version):
+    with span('build.health_labels'):
+        return attach_shared(csv_path, store=FoodStore(store_dir)).labels, healthy_clusters()
+
+
+# Sorted nutrient columns and Health_Label_* bitmaps for the nutrient limits, once per data version
+@st.cache_resource(max_entries=2)
+def load_filter_index(csv_path, store_dir, data_version):
+    with span('build.filter_index'):
+        shared = attach_shared(csv_path, store=FoodStore(store_dir))
+        return FilterIndex(shared.nutrients, shared.nutrient_columns, shared.labels, columns=scoring_columns()[1:])
+
+
+# Ranked frame, CSV bytes and chart data per (condition, top_n), shared by all sessions
+@st.cache_resource
+def load_result_cache():
+    return ResultCache(max_entries=64)
+
+
+# Meal-plan matrices (target nutrients, scores, cluster labels, healthy clusters) once per data version
+@st.cache_resource(max_entries=2)
+def load_meal_planner(store_dir, data_version):
+    with span('build.meal_planner'):
+        return MealPlanner(FoodStore(store_dir).frame(meal_plan_columns()), healthy_clusters=healthy_clusters())
+
+
+# Nearest-neighbour index for healthier alternatives, shared across sessions
+@st.cache_resource(max_entries=2)
+def load_similarity(csv_path, store_dir, data_version):
+    with span('build.similarity'):
+        return load_similarity_index(csv_path, FoodStore(store_dir))
 
 condition_avoid = {
     'diabetes': ["Sugary drinks", "White bread", "Pastries", "Fried foods"],
@@ -33,61 +74,147 @@ nutrient_info = {
     'iron_mg': "Essential for blood production."
 }
 
-def recommend_top_foods(df, condition, top_n=10):
-    weights = condition_weights[condition]
-    df_filtered = df.copy().fillna(0)
-    df_filtered['score'] = sum(df_filtered[nutrient] * weight for nutrient, weight in weights.items() if nutrient in df_filtered.columns)
-    top_foods = df_filtered.sort_values(by='score', ascending=False).head(top_n)
-    return top_foods[['food_name', 'score'] + list(weights.keys())]
+# Partial reruns: widgets inside a fragment rerun only that fragment (page_graph.py)
+page_problems = validate()
+if page_problems:
+    raise RuntimeError("Invalid page dependency graph: " + "; ".join(page_problems))
+
+
+@st.fragment
+def alternatives_section(condition_key, store_dir, data_version):
+    with fragment_span('section.alternatives'):
+        st.subheader("🔁 Find Healthier Alternatives")
+        similarity = load_similarity("Labeled_Data.csv", store_dir, data_version)
+        # Picked by row, so foods sharing a name stay distinct
+        current_rows = st.multiselect("Foods you already eat", np.argsort(similarity.food_names, kind='stable').tolist(),
+                                      format_func=similarity.label, key='current_foods')
+        if current_rows:
+            alternatives_df = similarity.alternatives(condition_key, rows=current_rows, k=5)
+            if alternatives_df.empty:
+                st.info("These foods already score best among similar foods for your condition.")
+            else:
+                st.dataframe(alternatives_df, use_container_width=True)
+
+
+@st.fragment
+def meal_plan_section(condition_key, store_dir, data_version):
+    with fragment_span('section.meal_plan'):
+        st.subheader("🍽️ Daily Meal Plan")
+        # Age and gender only set the daily targets, so they live in this fragment
+        age = st.slider("Select Age", 10, 90, 30, key='age')
+        gender = st.radio("Select Gender", ["Male", "Female"], key='gender', horizontal=True)
+        if st.checkbox("Build a daily meal plan for my age and gender", key='meal_plan'):
+            planner = load_meal_planner(store_dir, data_version)
+            meal_plan = planner.plan(age, gender, condition_key)
+            st.dataframe(meal_plan.foods[['food_name', 'grams', 'score']], use_container_width=True)
+            st.dataframe(meal_plan.totals.set_index('nutrient').round(1), use_container_width=True)
+            st.caption(f"Plan computed in {meal_plan.seconds * 1000:.0f} ms")
+
 
 # UI layout
 st.set_page_config(page_title="Smart Food Recommender", layout="wide")
+begin_rerun(streamlit_session_id())
+with span('data.open_store'):
+    store = open_store("Labeled_Data.csv")
+with span('data.load_scorer'):
+    scorer = load_scorer("Labeled_Data.csv", store.store_dir, store.version)
 st.title("🥗 Smart Health-Based Food Recommendation System")
 
-# Input: Age, Gender, Condition
-age = st.slider("Select Age", 10, 90, 30)
-gender = st.radio("Select Gender", ["Male", "Female"])
-condition = st.selectbox("Select Health Condition", ["Diabetes", "Obesity", "High_BP", "Low_BP"])
+# Input: Conditions (age and gender are asked for in the meal plan, the only section using them)
+conditions = st.multiselect("Select Health Conditions", ["Diabetes", "Obesity", "High_BP", "Low_BP"],
+                            default=["Diabetes"], key='conditions')
+# Several conditions: foods in every condition's healthy cluster, ranked by Pareto layer or by a blended score
+combine = st.radio("Combine conditions by", ["Pareto", "Blend"], key='combine', horizontal=True,
+                   help="Pareto lists foods no other food beats on every condition first; "
+                        "Blend ranks by the average of the scaled condition scores.") if len(conditions) > 1 else None
+# Hard limits: only foods meeting all of them are ranked
+limits = st.text_input("Nutrient limits", key='nutrient_filters',
+                       placeholder="e.g. sodium_mg < 120, fibre_g >= 5, Health_Label_HighBP == healthy")
+healthy_only = st.checkbox("Only foods in the condition's healthy cluster", key='healthy_only') \
+    if len(conditions) == 1 else False
 
 # Once selected, show results
-if condition:
-    condition_key = condition.lower()
-    st.success(f"🎯 Based on your input (Age: {age}, Gender: {gender}, Condition: {condition}), here are your top food recommendations:")
-
-    top_foods_df = recommend_top_foods(df, condition_key)
+if conditions:
+    condition_keys = [condition.lower() for condition in conditions]
+    # Alternatives and the meal plan are per condition; they follow the first selected one
+    condition_key = condition_keys[0]
+    label = "Condition" if len(conditions) == 1 else "Conditions"
+    st.success(f"🎯 Based on your input ({label}: {', '.join(conditions)}), here are your top food recommendations:")
+
+    with span('compute.filter_foods'):
+        labels, healthy = load_health_labels("Labeled_Data.csv", store.store_dir, store.version)
+        try:
+            predicates = parse_filters(limits, healthy)
+            if healthy_only:
+                predicates += (Predicate(label_map[condition_key], '==', healthy[label_map[condition_key]]),)
+            rows = load_filter_index("Labeled_Data.csv", store.store_dir, store.version).rows(predicates) \
+                if predicates else None
+        except ValueError as exc:
+            st.error(f"Nutrient limits ignored: {exc}")
+            predicates, rows = (), None
+
+    with span('compute.recommend_top_foods'):
+        if len(condition_keys) == 1:
+            result = load_result_cache().recommendation(scorer, condition_key, store.version, top_n=10,
+                                                        rows=rows, filters=predicates)
+        else:
+            mask = healthy_cluster_mask(labels, condition_keys, healthy)
+            clusters = tuple((column, healthy[column]) for column in sorted(labels)) if mask is not None else None
+            if rows is not None:
+                allowed = np.zeros(len(scorer), dtype=bool)
+                allowed[rows] = True
+                mask = allowed if mask is None else mask & allowed
+            result = load_result_cache().combined_recommendation(scorer, condition_keys, store.version, top_n=10,
+                                                                 mode=combine.lower(), mask=mask,
+                                                                 healthy_clusters=clusters, filters=predicates)
+        top_foods_df = result.frame
 
     # Section 1: Recommended Foods
-    st.subheader("🍱 Top 10 Healthy Food Recommendations")
-    st.dataframe(top_foods_df[['food_name', 'score']], use_container_width=True)
+    with span('section.recommended_foods'):
+        st.subheader("🍱 Top 10 Healthy Food Recommendations")
+        if top_foods_df.empty:
+            st.warning("No foods meet all of your nutrient limits.")
+        score_columns = [col for col in top_foods_df.columns if col.startswith('score') or col == 'pareto_rank']
+        st.dataframe(top_foods_df[['food_name'] + score_columns], use_container_width=True)
 
     # Section 2: Macronutrient Comparison
-    st.subheader("📉 Macronutrient Comparison")
-    nutrients = [col for col in ['carb_g', 'protein_g', 'fat_g'] if col in top_foods_df.columns]
-    compare_df = top_foods_df.set_index('food_name')[nutrients]
-    st.bar_chart(compare_df)
+    with span('section.macronutrients'):
+        st.subheader("📉 Macronutrient Comparison")
+        if not result.chart.empty:
+            st.bar_chart(result.chart)
 
     # Section 3: Nutrient Tips
-    st.subheader("🧠 Key Nutrient Benefits")
-    for nutrient in list(condition_weights[condition_key].keys())[:3]:
-        if nutrient in nutrient_info:
-            st.markdown(f"**{nutrient}**: {nutrient_info[nutrient]}")
+    with span('section.nutrient_tips'):
+        st.subheader("🧠 Key Nutrient Benefits")
+        tips = dict.fromkeys(nutrient for key in condition_keys for nutrient in list(condition_weights[key])[:3])
+        for nutrient in tips:
+            if nutrient in nutrient_info:
+                st.markdown(f"**{nutrient}**: {nutrient_info[nutrient]}")
 
     # Section 4: Foods to Avoid
-    st.subheader("📛 Foods to Avoid")
-    avoid_list = condition_avoid.get(condition_key, [])
-    st.markdown("Avoid consuming:")
-    st.markdown("- " + "
-- ".join(avoid_list))
+    with span('section.foods_to_avoid'):
+        st.subheader("📛 Foods to Avoid")
+        avoid_list = list(dict.fromkeys(food for key in condition_keys for food in condition_avoid.get(key, [])))
+        st.markdown("Avoid consuming:")
+        st.markdown("- " + "\n- ".join(avoid_list))
 
     # Section 5: Download CSV
-    st.subheader("📥 Export Your Recommendations")
-    csv = top_foods_df.to_csv(index=False).encode("utf-8")
-    st.download_button("Download Recommendations as CSV", data=csv, file_name="recommended_foods.csv", mime="text/csv")
+    with span('section.download'):
+        st.subheader("📥 Export Your Recommendations")
+        st.download_button("Download Recommendations as CSV", data=result.csv, file_name="recommended_foods.csv", mime="text/csv")
 
     # Section 6: Explore Full Nutrients
-    st.subheader("📋 Explore Nutrients in Recommended Foods")
-    with st.expander("Click to Expand Full Nutrient Table"):
-        st.dataframe(top_foods_df, use_container_width=True)
+    with span('section.full_table'):
+        st.subheader("📋 Explore Nutrients in Recommended Foods")
+        with st.expander("Click to Expand Full Nutrient Table"):
+            st.dataframe(top_foods_df, use_container_width=True)
+
+    # Section 7: Healthier Alternatives
+    alternatives_section(condition_key, store.store_dir, store.version)
+
+    # Section 8: Daily Meal Plan (uses age and gender for the daily targets)
+    meal_plan_section(condition_key, store.store_dir, store.version)
 
 st.markdown("---")
 st.caption("Built using Streamlit • Personalized food guidance with tips 💡")
+end_rerun()
@@ -0,0 +1,272 @@
+"""
+Parallel hyperparameter sweep for the labeling pipeline.
+
+For every condition, evaluates a grid of (clusters c, fuzzifier m, PCA
+components) in a process pool and scores each point with the fuzzy partition
+coefficient and a sampled silhouette. Clearly poor points are pruned before the
+expensive silhouette:
+
+    - a near-empty cluster (smallest cluster below --min-cluster-fraction),
+    - a near-uniform partition (FPC normalized to [0, 1] below --min-partition),
+    - a silhouette whose upper confidence bound on a small probe sample is
+      below --min-silhouette.
+
+Finished points (pruned ones included) are cached in <source>.sweep.json,
+keyed by the data version and every setting that affects the score, so a rerun
+with a wider grid only computes the new points. The best point per condition
+(highest silhouette, then FPC) is used to relabel the data with labeling.py;
+its settings, scores and healthy cluster are stored in the model artifacts.
+With --conditions only those conditions are relabeled and the other
+Health_Label_* columns of the output are kept.
+
+Usage:
+    python sweep.py DataCleaned.csv -o Labeled_Data.csv --c 2 3 4 5 6 --m 1.5 2 2.5 --components 2 3 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from cluster_metrics import fuzzy_partition_coefficient, sampled_silhouette
+from fcm import cmeans, memberships
+from food_store import file_sha256
+from labeling import condition_pipelines, project_features, run_pipeline
+from models import DEFAULT_MODELS_DIR
+from preprocessing import preprocess, read_food_table
+
+SWEEP_VERSION = 1
+DEFAULT_C = [2, 3, 4, 5, 6]
+DEFAULT_M = [1.5, 2.0, 2.5]
+DEFAULT_COMPONENTS = [2, 3, 4]
+
+# Early-stopping thresholds
+DEFAULT_MIN_CLUSTER_FRACTION = 0.02
+DEFAULT_MIN_PARTITION = 0.1
+DEFAULT_MIN_SILHOUETTE = 0.0
+DEFAULT_PROBE_SIZE = 200
+
+
+def default_cache_path(source):
+    return os.path.splitext(source)[0] + '.sweep.json'
+
+
+def point_key(condition, c, m, n_components):
+    return f"{condition}|c={c}|m={m:g}|k={n_components}"
+
+
+def sweep_fingerprint(data_version, condition, settings):
+    """Everything besides the grid coordinates that a cached score depends on."""
+    pipeline = condition_pipelines[condition]
+    return json.dumps({
+        'sweep_version': SWEEP_VERSION,
+        'data_version': data_version,
+        'weights': pipeline['weights'],
+        'drop_columns': pipeline['drop_columns'],
+        **settings,
+    }, sort_keys=True)
+
+
+def read_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache(path, cache):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def evaluate_point(data, c, m, seed=0, n_init=1, sample_size=2000, probe_size=DEFAULT_PROBE_SIZE,
+                   min_cluster_fraction=DEFAULT_MIN_CLUSTER_FRACTION, min_partition=DEFAULT_MIN_PARTITION,
+                   min_silhouette=DEFAULT_MIN_SILHOUETTE):
+    """
+    Fits fuzzy c-means on PCA coordinates and scores it, stopping early on a clearly poor partition.
+
+    Returns:
+        dict: status ('ok' or 'pruned'), reason, fpc, normalized partition,
+        smallest cluster fraction, silhouette (mean, low, high; NaN when pruned first), seconds.
+    """
+    start = time.perf_counter()
+    result = cmeans(data, c=c, m=m, error=0.005, maxiter=1000, seed=seed, n_init=n_init)
+    labels = np.argmax(memberships(data, result.centers, m), axis=0)
+    fpc = fuzzy_partition_coefficient(result.u)
+    point = {
+        'status': 'ok',
+        'reason': '',
+        'fpc': fpc,
+        'partition': (fpc - 1 / c) / (1 - 1 / c),
+        'min_cluster_fraction': float(np.bincount(labels, minlength=c).min() / len(labels)),
+        'silhouette': float('nan'),
+        'silhouette_low': float('nan'),
+        'silhouette_high': float('nan'),
+        'converged': bool(result.converged),
+    }
+    if point['min_cluster_fraction'] < min_cluster_fraction:
+        point.update(status='pruned', reason='near-empty cluster')
+    elif point['partition'] < min_partition:
+        point.update(status='pruned', reason='near-uniform memberships')
+    else:
+        try:
+            estimate = None
+            if probe_size and probe_size < sample_size and probe_size < len(data):
+                estimate = sampled_silhouette(data, labels, probe_size, seed)
+                if estimate.high < min_silhouette:
+                    point.update(status='pruned', reason='low silhouette on probe sample')
+            if point['status'] == 'ok':
+                estimate = sampled_silhouette(data, labels, sample_size, seed)
+            point.update(silhouette=estimate.mean, silhouette_low=estimate.low, silhouette_high=estimate.high)
+        except ValueError:
+            point.update(status='pruned', reason='silhouette undefined')
+    point['seconds'] = time.perf_counter() - start
+    return point
+
+
+# Worker-side PCA coordinates, keyed by (condition, n_components)
+_worker_state = {}
+
+
+def _init_worker(projections):
+    _worker_state['projections'] = projections
+
+
+def _evaluate(key, condition, c, m, n_components, settings):
+    data = _worker_state['projections'][(condition, n_components)]
+    return key, evaluate_point(data, c, m, **settings)
+
+
+def choose(points):
+    """Best scored point per condition: highest silhouette, then highest FPC."""
+    best = {}
+    for point in points:
+        if point['status'] != 'ok' or np.isnan(point['silhouette']):
+            continue
+        rank = (point['silhouette'], point['fpc'])
+        condition = point['condition']
+        if condition not in best or rank > (best[condition]['silhouette'], best[condition]['fpc']):
+            best[condition] = point
+    return best
+
+
+def run_sweep(source, c_values=DEFAULT_C, m_values=DEFAULT_M, components=DEFAULT_COMPONENTS, conditions=None,
+              workers=None, seed=0, n_init=1, sample_size=2000, cache_path=None, compact=True, **thresholds):
+    """
+    Evaluates every (condition, c, m, n_components) grid point, reusing cached ones.
+
+    Parameters:
+        source (str): DataCleaned.csv-style table, preprocessed as labeling.py does.
+        workers (int): Worker processes (default: CPU count).
+        cache_path (str): Cache file (default: <source>.sweep.json); '' disables caching.
+        thresholds: Early-stopping settings passed to evaluate_point.
+
+    Returns:
+        tuple: (list of point dicts with condition, c, m, n_components and cached flag,
+        {condition: chosen point})
+    """
+    conditions = conditions or list(condition_pipelines)
+    cache_path = default_cache_path(source) if cache_path is None else cache_path
+    cache = read_cache(cache_path) if cache_path else {}
+    data_version = file_sha256(source)
+    settings = {'seed': seed, 'n_init': n_init, 'sample_size': sample_size, **thresholds}
+
+    grid = [(condition, c, float(m), k) for condition in conditions for c in c_values for m in m_values
+            for k in components]
+    fingerprints = {condition: sweep_fingerprint(data_version, condition, {**settings, 'compact': compact})
+                    for condition in conditions}
+    points, todo = {}, []
+    for condition, c, m, k in grid:
+        key = point_key(condition, c, m, k)
+        entry = cache.get(key)
+        if entry is not None and entry.get('fingerprint') == fingerprints[condition]:
+            points[key] = {**entry['point'], 'cached': True}
+        else:
+            todo.append((key, condition, c, m, k))
+
+    if todo:
+        df, _ = preprocess(read_food_table(source, compact))
+        projections = {}
+        for condition, k in sorted({(condition, k) for _, condition, _, _, k in todo}):
+            projections[(condition, k)] = project_features(df, condition, k)[-1]
+        tasks = {key: (condition, c, m, k) for key, condition, c, m, k in todo}
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(projections,)) as pool:
+            futures = [pool.submit(_evaluate, key, condition, c, m, k, settings)
+                       for key, condition, c, m, k in todo]
+            for future in as_completed(futures):
+                key, point = future.result()
+                condition, c, m, k = tasks[key]
+                point = {'condition': condition, 'c': c, 'm': m, 'n_components': k, **point}
+                points[key] = {**point, 'cached': False}
+                if cache_path:
+                    # Saved as each point finishes, so an interrupted sweep resumes where it stopped
+                    cache[key] = {'fingerprint': fingerprints[condition], 'point': point}
+                    write_cache(cache_path, cache)
+
+    ordered = [points[point_key(*point)] for point in grid]
+    return ordered, choose(ordered)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep clusters, fuzzifier and PCA components per condition, "
+                                                 "then relabel with the best settings.")
+    parser.add_argument('source', nargs='?', default='DataCleaned.csv')
+    parser.add_argument('-o', '--output', default='Labeled_Data.csv')
+    parser.add_argument('--c', type=int, nargs='+', default=DEFAULT_C, help="Cluster counts")
+    parser.add_argument('--m', type=float, nargs='+', default=DEFAULT_M, help="Fuzzifiers (> 1)")
+    parser.add_argument('--components', type=int, nargs='+', default=DEFAULT_COMPONENTS, help="PCA components")
+    parser.add_argument('--conditions', nargs='+', choices=list(condition_pipelines), default=None)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--n-init', type=int, default=1, help="Random clustering restarts per grid point")
+    parser.add_argument('--sample-size', type=int, default=2000, help="Rows sampled for the silhouette")
+    parser.add_argument('--min-cluster-fraction', type=float, default=DEFAULT_MIN_CLUSTER_FRACTION)
+    parser.add_argument('--min-partition', type=float, default=DEFAULT_MIN_PARTITION,
+                        help="Prune when (FPC - 1/c) / (1 - 1/c) is below this")
+    parser.add_argument('--min-silhouette', type=float, default=DEFAULT_MIN_SILHOUETTE,
+                        help="Prune when the probe silhouette's upper bound is below this")
+    parser.add_argument('--probe-size', type=int, default=DEFAULT_PROBE_SIZE)
+    parser.add_argument('--cache', default=None, help="Grid cache file (default: <source>.sweep.json, '' = off)")
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR)
+    parser.add_argument('--dry-run', action='store_true', help="Only report the best settings; do not relabel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    points, chosen = run_sweep(args.source, args.c, args.m, args.components, args.conditions, args.workers,
+                               args.seed, args.n_init, args.sample_size, args.cache,
+                               probe_size=args.probe_size, min_cluster_fraction=args.min_cluster_fraction,
+                               min_partition=args.min_partition, min_silhouette=args.min_silhouette)
+    print(f"{'condition':<10} {'c':>2} {'m':>4} {'k':>2} {'fpc':>6} {'silhouette':>10}  status")
+    for point in points:
+        status = point['status'] + (f" ({point['reason']})" if point['reason'] else '') + \
+            (' [cached]' if point['cached'] else '')
+        print(f"{point['condition']:<10} {point['c']:>2} {point['m']:>4g} {point['n_components']:>2} "
+              f"{point['fpc']:>6.3f} {point['silhouette']:>10.4f}  {status}")
+    computed = sum(not point['cached'] for point in points)
+    print(f"{len(points)} points, {computed} computed, {len(points) - computed} cached, "
+          f"{time.perf_counter() - start:.1f} s")
+
+    configs = {}
+    for condition, point in chosen.items():
+        print(f"{condition}: c={point['c']} m={point['m']:g} n_components={point['n_components']} "
+              f"silhouette={point['silhouette']:.4f} fpc={point['fpc']:.3f}")
+        configs[condition] = {name: point[name] for name in ('c', 'm', 'n_components', 'fpc', 'silhouette')}
+    missing = [condition for condition in (args.conditions or condition_pipelines) if condition not in chosen]
+    if missing:
+        print(f"No grid point survived for {', '.join(missing)}; keeping the default settings")
+    if args.dry_run:
+        return
+
+    run_pipeline(args.source, args.output, args.workers, args.conditions, args.seed, args.n_init,
+                 args.models_dir, configs=configs)
+    print(f"Wrote {args.output} and the models in {args.models_dir}/")
+
+
+if __name__ == '__main__':
+    main()
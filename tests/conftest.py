@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to the Streamlit apps
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SOURCE = os.path.join(ROOT, 'DataCleaned.csv')
+
+
+@pytest.fixture(scope='session')
+def trained(tmp_path_factory):
+    """Labeled.csv and models/ from one full labeling run over DataCleaned.csv (do not modify)."""
+    from labeling import run_pipeline
+
+    directory = tmp_path_factory.mktemp('labeled')
+    output, models_dir = str(directory / 'Labeled.csv'), str(directory / 'models')
+    run_pipeline(SOURCE, output, workers=1, models_dir=models_dir)
+    return output, models_dir
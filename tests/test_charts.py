@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from charts import ChartCache, chart_size, cluster_distribution_spec, pca_scatter_png
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def test_cluster_distribution_spec():
+    spec = cluster_distribution_spec(np.array([2, 0, 2, 2, 1]), 'Health_Label_Diabetes')
+    assert spec['data']['values'] == [{'cluster': '0', 'foods': 1}, {'cluster': '1', 'foods': 1},
+                                      {'cluster': '2', 'foods': 3}]
+    assert spec['encoding']['x']['title'] == 'Health_Label_Diabetes'
+    assert chart_size(spec) > 0
+
+
+def test_pca_scatter_png():
+    pytest.importorskip('matplotlib')
+    rng = np.random.default_rng(0)
+    png = pca_scatter_png(rng.normal(size=(50, 3)), rng.integers(0, 3, 50), figsize=(2, 2), dpi=40)
+    assert png.startswith(PNG_SIGNATURE)
+    assert chart_size(png) == len(png)
+
+
+def test_chart_cache_is_bounded_by_bytes():
+    cache = ChartCache(max_bytes=1_000)
+    builds = []
+
+    def chart(name, size):
+        def build():
+            builds.append(name)
+            return b'x' * size
+        return build
+
+    for name in 'abc':
+        cache.get_or_build(name, 'v1', chart(name, 400))
+    # Three 400-byte charts do not fit in 1000 bytes: the least recently used one is dropped
+    assert cache.entries.nbytes == 800
+    cache.get_or_build('b', 'v1', chart('b', 400))
+    cache.get_or_build('a', 'v1', chart('a', 400))
+    assert builds == ['a', 'b', 'c', 'a']
+    # A chart larger than the whole cache is served but not kept
+    assert len(cache.get_or_build('huge', 'v1', chart('huge', 5_000))) == 5_000
+    assert cache.entries.nbytes <= 1_000 and cache.entries.get('huge') is None
+
+
+def test_chart_cache_drops_charts_of_old_data():
+    cache = ChartCache()
+    spec = cache.get_or_build(('distribution', 'diabetes'), 'v1',
+                              lambda: cluster_distribution_spec([0, 1], 'Health_Label_Diabetes'))
+    assert cache.get_or_build(('distribution', 'diabetes'), 'v1', lambda: None) is spec
+    assert cache.get_or_build(('distribution', 'diabetes'), 'v2', lambda: {'new': True}) == {'new': True}
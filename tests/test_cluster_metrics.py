@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.metrics import silhouette_samples, silhouette_score
+
+from cluster_metrics import fuzzy_partition_coefficient, sampled_silhouette, silhouette_values
+
+
+@pytest.fixture(scope='module')
+def blobs():
+    rng = np.random.default_rng(7)
+    centers = np.array([[0.0, 0.0, 0.0], [4.0, 0.0, 1.0], [0.0, 5.0, -2.0]])
+    labels = rng.integers(0, 3, size=1_500)
+    data = centers[labels] + rng.normal(scale=1.5, size=(len(labels), 3))
+    return data, labels
+
+
+@pytest.mark.parametrize('chunk_size, block_size, n_jobs', [(1024, 8192, 1), (97, 130, 4), (1, 1500, 2)])
+def test_tiled_silhouette_matches_sklearn(blobs, chunk_size, block_size, n_jobs):
+    data, labels = blobs
+    values = silhouette_values(data, labels, chunk_size=chunk_size, block_size=block_size, n_jobs=n_jobs)
+    np.testing.assert_allclose(values, silhouette_samples(data, labels), atol=1e-9)
+
+
+def test_singleton_cluster_scores_zero_like_sklearn(blobs):
+    data, labels = blobs
+    labels = labels.copy()
+    labels[0] = 3
+    np.testing.assert_allclose(silhouette_values(data, labels), silhouette_samples(data, labels), atol=1e-9)
+
+
+def test_sampled_silhouette(blobs):
+    data, labels = blobs
+    exact = silhouette_score(data, labels)
+    full = sampled_silhouette(data, labels, sample_size=None)
+    assert full.mean == pytest.approx(exact) and full.n_sampled == len(data)
+    estimate = sampled_silhouette(data, labels, sample_size=400, seed=1)
+    assert estimate.n_sampled == 400 and estimate.low <= exact <= estimate.high
+
+
+def test_silhouette_needs_two_clusters(blobs):
+    data, _ = blobs
+    with pytest.raises(ValueError):
+        silhouette_values(data, np.zeros(len(data), dtype=int))
+
+
+def test_fuzzy_partition_coefficient_bounds():
+    assert fuzzy_partition_coefficient(np.eye(3)) == pytest.approx(1.0)
+    assert fuzzy_partition_coefficient(np.full((4, 10), 0.25)) == pytest.approx(0.25)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from filters import FilterIndex, Predicate, _compare, parse_filters
+
+NUTRIENTS = ['energy_kcal', 'sodium_mg', 'fibre_g']
+LABELS = ['Health_Label_Diabetes', 'Health_Label_HighBP']
+
+
+@pytest.fixture(scope='module')
+def table():
+    rng = np.random.default_rng(5)
+    n = 1_003  # Not a multiple of 8, so the last bitmap byte is partial
+    matrix = np.column_stack([
+        rng.uniform(0, 500, n),
+        rng.integers(0, 50, n) * 10.0,  # Repeated values for == and the <=/< edges
+        np.where(rng.random(n) < 0.2, 0.0, rng.exponential(4, n)),
+    ])
+    labels = {column: rng.integers(0, 3, n) for column in LABELS}
+    return matrix, labels
+
+
+def mask_rows(matrix, labels, predicates):
+    mask = np.ones(len(matrix), dtype=bool)
+    for column, op, value in predicates:
+        values = labels[column] if column in labels else matrix[:, NUTRIENTS.index(column)]
+        mask &= _compare[op](values, value)
+    return np.flatnonzero(mask)
+
+
+def random_predicate(rng, matrix):
+    if rng.random() < 0.3:
+        return Predicate(LABELS[rng.integers(len(LABELS))], ['==', '!='][rng.integers(2)], int(rng.integers(0, 4)))
+    j = rng.integers(len(NUTRIENTS))
+    value = matrix[rng.integers(len(matrix)), j] if rng.random() < 0.5 else rng.uniform(0, 500)
+    return Predicate(NUTRIENTS[j], ['<', '<=', '>', '>=', '=='][rng.integers(5)], float(value))
+
+
+def test_rows_match_boolean_mask(table):
+    matrix, labels = table
+    index = FilterIndex(matrix, NUTRIENTS, labels)
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        predicates = tuple(random_predicate(rng, matrix) for _ in range(rng.integers(1, 5)))
+        np.testing.assert_array_equal(index.rows(predicates), mask_rows(matrix, labels, predicates),
+                                      err_msg=str(predicates))
+        for predicate in predicates:
+            assert index.count(predicate) == len(mask_rows(matrix, labels, [predicate]))
+
+
+def test_rows_without_predicates(table):
+    matrix, labels = table
+    np.testing.assert_array_equal(FilterIndex(matrix, NUTRIENTS, labels).rows(()), np.arange(len(matrix)))
+
+
+def test_parsed_filters(table):
+    matrix, labels = table
+    index = FilterIndex(matrix, NUTRIENTS, labels)
+    predicates = parse_filters('sodium_mg < 120, fibre_g >= 5\nHealth_Label_HighBP == healthy',
+                               {'Health_Label_HighBP': 2})
+    assert predicates[-1] == Predicate('Health_Label_HighBP', '==', 2)
+    np.testing.assert_array_equal(index.rows(predicates), mask_rows(matrix, labels, predicates))
+
+
+@pytest.mark.parametrize('text', ['protein_g > 1', 'Health_Label_HighBP < 1', 'sodium_mg != 10'])
+def test_unsupported_predicates(table, text):
+    matrix, labels = table
+    index = FilterIndex(matrix, NUTRIENTS, labels)
+    with pytest.raises(ValueError):
+        index.rows(parse_filters(text))
+
+
+@pytest.mark.parametrize('text', ['sodium_mg == healthy', 'Health_Label_Obesity == healthy',
+                                  'Health_Label_HighBP == 1.5', 'fibre_g > lots'])
+def test_unparseable_filters(text):
+    with pytest.raises(ValueError):
+        parse_filters(text, {'Health_Label_HighBP': 2})
+
+
+def test_label_values_are_cluster_numbers(table):
+    matrix, labels = table
+    index = FilterIndex(matrix, NUTRIENTS, labels)
+    assert parse_filters('Health_Label_HighBP == 1.0') == (Predicate('Health_Label_HighBP', '==', 1),)
+    with pytest.raises(ValueError):
+        index.rows((Predicate('Health_Label_HighBP', '==', 1.5),))
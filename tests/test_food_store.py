@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from food_store import CURRENT, KEEP_VERSIONS, FoodStore, is_fresh, open_store
+
+
+def write_table(path, n_rows, offset=0):
+    pd.DataFrame({
+        'food_name': [f"food {i}" for i in range(offset, offset + n_rows)],
+        'energy_kcal': np.arange(offset, offset + n_rows, dtype=np.float64),
+    }).to_csv(path, index=False)
+
+
+def test_open_store_round_trip(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    write_table(csv_path, 5)
+    store = open_store(csv_path)
+    assert is_fresh(csv_path, str(tmp_path / 'foods.store'))
+    assert list(store.column('food_name')) == [f"food {i}" for i in range(5)]
+    np.testing.assert_array_equal(store.column('energy_kcal'), np.arange(5))
+
+
+def test_relabel_keeps_old_views_readable(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    write_table(csv_path, 5)
+    old = open_store(csv_path)
+    write_table(csv_path, 7, offset=10)
+    new = open_store(csv_path)
+
+    assert new.store_dir != old.store_dir
+    assert new.n_rows == 7 and new.version != old.version
+    # The previous version stays on disk for processes that still hold it
+    assert list(old.column('food_name')) == [f"food {i}" for i in range(5)]
+    assert FoodStore(old.store_dir).version == old.version
+
+
+def test_concurrent_stale_opens_convert_once(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    store_dir = str(tmp_path / 'foods.store')
+    write_table(csv_path, 5)
+    open_store(csv_path)
+    write_table(csv_path, 50)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        stores = list(pool.map(lambda _: open_store(csv_path), range(8)))
+    assert [store.n_rows for store in stores] == [50] * 8
+    # One process converted; the others waited for the lock and reused its version
+    assert len({store.store_dir for store in stores}) == 1
+    assert os.path.exists(os.path.join(store_dir, CURRENT))
+    assert is_fresh(csv_path, store_dir)
+
+
+def test_views_outlive_pruned_versions(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    write_table(csv_path, 5)
+    old = open_store(csv_path)
+    for offset in range(1, KEEP_VERSIONS + 2):
+        write_table(csv_path, 5 + offset, offset=10 * offset)
+        open_store(csv_path)
+    assert not os.path.exists(old.store_dir)
+    # Columns the old view had not read yet are still served from the files it opened
+    assert list(old.column('food_name')) == [f"food {i}" for i in range(5)]
+    np.testing.assert_array_equal(old.frame()['energy_kcal'], np.arange(5))
+    assert len([entry for entry in os.listdir(tmp_path / 'foods.store') if entry.startswith('v')]) == KEEP_VERSIONS
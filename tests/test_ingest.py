@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SOURCE
+from ingest import QuantileSketch, stream_preprocess
+from preprocessing import convert_units, preprocess
+
+
+@pytest.fixture(scope='module')
+def expected():
+    # The notebook's in-memory cleaning, with the id columns kept as the stream does
+    _, rows = preprocess(pd.read_csv(SOURCE))
+    return convert_units(rows).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('chunksize', [37, 100_000])
+def test_stream_matches_preprocess(tmp_path, expected, chunksize):
+    output = str(tmp_path / 'Cleaned.csv')
+    result = stream_preprocess(SOURCE, output, chunksize=chunksize)
+    cleaned = pd.read_csv(output)
+    assert result.rows_read == len(pd.read_csv(SOURCE)) and result.rows_kept == len(expected)
+    pd.testing.assert_frame_equal(cleaned, expected, check_exact=False, rtol=1e-12)
+
+
+def test_sharded_sources_match_one_table(tmp_path, expected):
+    source = pd.read_csv(SOURCE)
+    shards = []
+    for i, part in enumerate(np.array_split(np.arange(len(source)), 3)):
+        shards.append(str(tmp_path / f'shard{i}.csv'))
+        source.iloc[part].to_csv(shards[-1], index=False)
+    output = str(tmp_path / 'Cleaned.csv')
+    stream_preprocess(shards, output, chunksize=50)
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected, check_exact=False, rtol=1e-12)
+
+
+def test_sketch_exact_until_full_then_close():
+    values = np.random.default_rng(0).lognormal(size=50_000)
+    small = QuantileSketch(k=1000).update(values[:800])
+    assert small.exact
+    np.testing.assert_allclose(small.quantile([0.25, 0.75]), np.quantile(values[:800], [0.25, 0.75]))
+
+    sketch = QuantileSketch(k=1000)
+    for batch in np.array_split(values, 17):
+        sketch.update(batch)
+    assert not sketch.exact
+    ranks = np.searchsorted(np.sort(values), sketch.quantile([0.25, 0.5, 0.75])) / len(values)
+    np.testing.assert_allclose(ranks, [0.25, 0.5, 0.75], atol=0.02)
@@ -0,0 +1,133 @@
+import json
+import re
+import time
+
+import pytest
+
+import instrumentation
+from instrumentation import Histogram, Metrics
+
+SAMPLE = re.compile(r'^(\w+)(\{[^}]*\})? (-?[0-9.e+-]+)$')
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    return Metrics(str(tmp_path / 'metrics.jsonl'), str(tmp_path / 'profiles'))
+
+
+def test_nested_spans(metrics):
+    metrics.begin_rerun('session-a')
+    with metrics.span('outer'):
+        with metrics.span('inner'):
+            time.sleep(0.01)
+    record = metrics.end_rerun()
+    # Spans are recorded as they finish: inner first, and outer includes it
+    assert [span['name'] for span in record['spans']] == ['inner', 'outer']
+    inner, outer = (span['seconds'] for span in record['spans'])
+    assert 0.01 <= inner <= outer <= record['seconds']
+    assert metrics.spans['streamlit_app', 'outer'].count == metrics.spans['streamlit_app', 'inner'].count == 1
+
+
+def test_end_rerun_records(metrics):
+    assert metrics.end_rerun() is None
+    for _ in range(2):
+        metrics.begin_rerun('session-a', app='cluster_app')
+        with metrics.span('section.table'):
+            pass
+        record = metrics.end_rerun()
+    assert record['app'] == 'cluster_app' and record['session'] == 'session-a'
+    assert record['rerun'] == 2 and record['status'] == 'ok'
+    assert {'ts', 'seconds', 'rss_bytes', 'rss_delta_bytes', 'spans'} <= set(record)
+
+    # A rerun that never reached end_rerun is closed as interrupted by the next one
+    metrics.begin_rerun('session-b')
+    metrics.begin_rerun('session-b')
+    metrics.end_rerun(status='fragment')
+    assert metrics.interrupted == 1
+    assert metrics.reruns['streamlit_app', 'interrupted'].count == 1
+    assert metrics.reruns['streamlit_app', 'fragment'].count == 1
+
+    with open(metrics.log_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['status'] for line in lines] == ['ok', 'ok', 'interrupted', 'fragment']
+    assert lines[1] == json.loads(json.dumps(record))
+
+
+def test_log_rolls_over(tmp_path):
+    metrics = Metrics(str(tmp_path / 'metrics.jsonl'), log_max_bytes=2_000)
+    for i in range(50):
+        metrics.record_startup('streamlit_app', f'phase{i}', 0.5)
+    assert (tmp_path / 'metrics.jsonl.1').exists()
+    assert 0 < (tmp_path / 'metrics.jsonl').stat().st_size <= 2_000
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metrics.jsonl', 'metrics.jsonl.1']
+
+
+def test_prometheus_text(metrics):
+    metrics.begin_rerun('session-a')
+    with metrics.span('data.load'):
+        pass
+    metrics.end_rerun()
+    metrics.record_startup('cluster_app', 'imports', 1.25)
+    text = metrics.prometheus_text()
+    assert text.endswith('\n')
+
+    declared = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            declared.setdefault(line.split()[2], set()).add('help')
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split()
+            assert kind in ('histogram', 'counter', 'gauge')
+            declared.setdefault(name, set()).add(kind)
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            samples.append((match.group(1), match.group(2) or '', float(match.group(3))))
+    for name, kinds in declared.items():
+        assert 'help' in kinds and len(kinds) == 2, name
+    for name, _, _ in samples:
+        base = re.sub(r'_(bucket|sum|count)$', '', name)
+        assert name in declared or base in declared, name
+
+    buckets = [value for name, labels, value in samples
+               if name == 'food_app_span_seconds_bucket' and 'span="data.load"' in labels]
+    assert buckets == sorted(buckets) and buckets[-1] == 1
+    assert ('food_app_startup_seconds', '{app="cluster_app",phase="imports"}', 1.25) in samples
+    assert ('food_app_session_reruns_total', '{app="streamlit_app",session="session-a"}', 1) in samples
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2] and histogram.count == 3 and histogram.sum == pytest.approx(5.55)
+
+
+def test_log_and_endpoint_are_opt_in(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    for name in ('FOOD_APP_INSTRUMENT', 'FOOD_APP_METRICS_LOG', 'FOOD_APP_METRICS_PORT'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(instrumentation, '_metrics', None)
+    metrics = instrumentation.get_metrics()
+    assert metrics.log_path is None and metrics.server is None
+    instrumentation.begin_rerun('local')
+    with instrumentation.fragment_span('section.summary'):
+        pass
+    assert instrumentation.end_rerun()['spans'][0]['name'] == 'section.summary'
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.setenv('FOOD_APP_INSTRUMENT', '0')
+    monkeypatch.setattr(instrumentation, '_metrics', None)
+    instrumentation.begin_rerun('local')
+    assert instrumentation.end_rerun() is None
+
+
+def test_rss_without_proc_or_resource(monkeypatch):
+    def no_sysconf(name):
+        raise ValueError(name)
+
+    # As on Windows: no /proc page size and no resource module
+    monkeypatch.setattr(instrumentation, 'resource', None)
+    monkeypatch.setattr(instrumentation.os, 'sysconf', no_sysconf)
+    assert instrumentation.process_rss_bytes() == 0
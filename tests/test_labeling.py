@@ -0,0 +1,115 @@
+import os
+
+import pandas as pd
+import pytest
+
+from labeling import condition_pipelines, merge_existing_labels, run_incremental, run_pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, 'DataCleaned.csv')
+LABEL_COLUMNS = [config['label_column'] for config in condition_pipelines.values()]
+
+
+@pytest.fixture
+def labeled(tmp_path):
+    output = str(tmp_path / 'Labeled.csv')
+    run_pipeline(SOURCE, output, workers=1, models_dir=str(tmp_path / 'models'))
+    return output
+
+
+def test_full_run_writes_every_label(labeled):
+    assert list(pd.read_csv(labeled).columns[-len(LABEL_COLUMNS):]) == LABEL_COLUMNS
+
+
+def test_partial_relabel_keeps_other_labels(labeled, tmp_path):
+    before = pd.read_csv(labeled)
+    run_pipeline(SOURCE, labeled, workers=1, conditions=['high_bp'], seed=1, models_dir=str(tmp_path / 'models'))
+    after = pd.read_csv(labeled)
+    assert list(after.columns) == list(before.columns)
+    kept = [column for column in LABEL_COLUMNS if column != 'Health_Label_HighBP']
+    pd.testing.assert_frame_equal(after[kept], before[kept])
+
+
+def test_partial_incremental_relabel_keeps_other_labels(labeled, tmp_path):
+    before = pd.read_csv(labeled)
+    run_incremental(SOURCE, labeled, str(tmp_path / 'cache'), conditions=['obesity', 'low_bp'],
+                    models_dir=str(tmp_path / 'models'))
+    after = pd.read_csv(labeled)
+    assert list(after.columns) == list(before.columns)
+    kept = ['Health_Label_Diabetes', 'Health_Label_HighBP']
+    pd.testing.assert_frame_equal(after[kept], before[kept])
+
+
+def test_partial_relabel_refuses_different_foods(labeled):
+    relabeled = pd.read_csv(labeled).iloc[1:].drop(columns=LABEL_COLUMNS[1:])
+    with pytest.raises(ValueError, match='different foods'):
+        merge_existing_labels(relabeled, labeled, LABEL_COLUMNS[:1])
+
+
+@pytest.fixture(scope='module')
+def preprocessed():
+    from preprocessing import preprocess, read_food_table
+    return preprocess(read_food_table(SOURCE))[0]
+
+
+def test_warm_start_from_saved_model_converges_faster(preprocessed):
+    from fcm import cmeans
+    from labeling import label_condition, project_features
+
+    model = label_condition(preprocessed, 'diabetes')[2]
+    # A small data change: a few foods removed
+    changed = preprocessed.iloc[5:]
+    _, scaler, _, pca, coords = project_features(changed, 'diabetes', model.pca_components.shape[0])
+    init_centers = model.transfer_centers(scaler.min_, scaler.scale_, pca.mean_, pca.components_)
+    cold = cmeans(coords, c=3, m=model.m, error=0.005, maxiter=1000, seed=0)
+    warm = cmeans(coords, c=3, m=model.m, error=0.005, maxiter=1000, init_centers=init_centers)
+    assert warm.n_iter < cold.n_iter
+    assert abs(warm.objective - cold.objective) <= 1e-3 * cold.objective
+
+
+def test_warm_start_keeps_labels_on_unchanged_data(preprocessed):
+    from labeling import label_condition
+
+    labels, _, model = label_condition(preprocessed, 'high_bp')
+    warm_labels, _, warm_model = label_condition(preprocessed, 'high_bp', warm_start=model)
+    assert (warm_labels == labels).all()
+    assert warm_model.healthy_cluster == model.healthy_cluster
+
+
+def test_warm_starts_need_matching_settings(labeled, tmp_path):
+    from labeling import load_warm_starts
+
+    models_dir = str(tmp_path / 'models')
+    assert set(load_warm_starts(models_dir, list(condition_pipelines))) == set(condition_pipelines)
+    assert 'obesity' not in load_warm_starts(models_dir, ['obesity'], {'obesity': {'c': 4}})
+    assert load_warm_starts(str(tmp_path / 'missing'), ['obesity']) == {}
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_compact_run_writes_full_precision_nutrients(tmp_path, incremental):
+    # Values float32 cannot hold exactly
+    source = pd.read_csv(SOURCE)
+    source['energy_kcal'] += 0.123456789
+    source_path, output = str(tmp_path / 'Source.csv'), str(tmp_path / 'Labeled.csv')
+    source.to_csv(source_path, index=False)
+    if incremental:
+        run_incremental(source_path, output, str(tmp_path / 'cache'), models_dir=str(tmp_path / 'models'))
+    else:
+        run_pipeline(source_path, output, workers=1, models_dir=str(tmp_path / 'models'))
+    written = pd.read_csv(output)
+    source = pd.read_csv(source_path)
+    rows = source.set_index('food_code').loc[written['food_code']].reset_index()
+    pd.testing.assert_frame_equal(written[list(source.columns)], rows[list(source.columns)],
+                                  check_exact=False, rtol=1e-12)
+
+
+def test_cache_dir_rejects_workers(tmp_path, monkeypatch, capsys):
+    from labeling import main
+
+    monkeypatch.setattr('sys.argv', ['labeling.py', SOURCE, '-o', str(tmp_path / 'Labeled.csv'),
+                                     '--cache-dir', str(tmp_path / 'cache'), '--workers', '2'])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert '--workers cannot be combined with --cache-dir' in capsys.readouterr().err
+    assert not (tmp_path / 'Labeled.csv').exists()
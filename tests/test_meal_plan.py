@@ -0,0 +1,37 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_catalogue
+from meal_plan import MealPlanner, target_nutrients
+from scoring import label_map
+
+
+@pytest.fixture(scope='module')
+def foods():
+    df = make_catalogue(600, seed=5)
+    for nutrient in target_nutrients:
+        if nutrient not in df:
+            df[nutrient] = np.random.default_rng(len(nutrient)).lognormal(1.0, 1.0, len(df))
+    for j, column in enumerate(label_map.values()):
+        df[column] = (np.arange(len(df)) + j) % 3
+    return df
+
+
+def test_candidates_come_from_the_models_healthy_cluster(foods):
+    healthy = defaultdict(lambda: 0, {'Health_Label_Diabetes': 2})
+    planner = MealPlanner(foods, healthy_clusters=healthy)
+    rows = planner.candidates('diabetes', n_candidates=50)
+    assert len(rows) == 50
+    assert (foods['Health_Label_Diabetes'].to_numpy()[rows] == 2).all()
+    # An explicit label still overrides the recorded cluster
+    rows = planner.candidates('diabetes', n_candidates=50, healthy_cluster_label=1)
+    assert (foods['Health_Label_Diabetes'].to_numpy()[rows] == 1).all()
+
+
+def test_plan_uses_the_recorded_healthy_cluster(foods):
+    planner = MealPlanner(foods, healthy_clusters=defaultdict(lambda: 0, {'Health_Label_HighBP': 1}))
+    plan = planner.plan(35, 'Female', 'high_bp')
+    chosen = foods.set_index('food_name').loc[plan.foods['food_name'], 'Health_Label_HighBP']
+    assert len(plan.foods) and (chosen == 1).all()
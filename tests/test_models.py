@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from conftest import SOURCE
+from labeling import condition_pipelines
+from models import ConditionModel, healthy_clusters, load_models, predict_labels
+from preprocessing import read_food_table
+
+
+def test_predict_labels_reproduces_training_labels(trained):
+    labeled, models_dir = pd.read_csv(trained[0]), trained[1]
+    # The same rows, parsed as the pipeline parsed them
+    source = read_food_table(SOURCE)
+    rows = source.set_index('food_code').loc[labeled['food_code']].reset_index()
+    predicted = predict_labels(rows, load_models(models_dir))
+    for config in condition_pipelines.values():
+        np.testing.assert_array_equal(predicted[config['label_column']].to_numpy(),
+                                      labeled[config['label_column']].to_numpy())
+
+
+def test_memberships_sum_to_one(trained):
+    labeled, models_dir = pd.read_csv(trained[0]), trained[1]
+    predicted = predict_labels(labeled.head(20), load_models(models_dir), with_memberships=True)
+    u = predicted[[f"Health_Label_Obesity_u{cluster}" for cluster in range(3)]].to_numpy()
+    np.testing.assert_allclose(u.sum(axis=1), 1.0)
+    np.testing.assert_array_equal(u.argmax(axis=1), predicted['Health_Label_Obesity'].to_numpy())
+
+
+def test_saved_model_round_trip(trained, tmp_path):
+    _, models_dir = trained
+    model = load_models(models_dir, ['low_bp'])['low_bp']
+    path = str(tmp_path / 'low_bp.npz')
+    model.save(path)
+    loaded = ConditionModel.load(path)
+    np.testing.assert_array_equal(loaded.centers, model.centers)
+    assert loaded.healthy_cluster == model.healthy_cluster and loaded.config == model.config
+    assert healthy_clusters(models_dir)['Health_Label_LowBP'] == model.healthy_cluster
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import ROOT
+from page_graph import rerun_targets, sections, validate, widgets
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+
+@pytest.fixture
+def app(trained, tmp_path, monkeypatch):
+    """The recommender page running on a copy of the labeled data, without metrics output."""
+    output, models_dir = trained
+    shutil.copy(output, tmp_path / 'Labeled_Data.csv')
+    shutil.copytree(models_dir, tmp_path / 'models')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('FOOD_APP_INSTRUMENT', '0')
+    return AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py'), default_timeout=60).run()
+
+
+def test_graph_is_valid():
+    assert validate() == []
+
+
+@pytest.mark.parametrize('widget, targets', [
+    ('age', ['meal_plan']),
+    ('gender', ['meal_plan']),
+    ('current_foods', ['alternatives']),
+    ('meal_plan', ['meal_plan']),
+    ('conditions', 'app'),
+    ('nutrient_filters', 'app'),
+])
+def test_rerun_targets(widget, targets):
+    assert rerun_targets(widget) == targets
+
+
+def test_validate_rejects_stale_sections():
+    broken = {**sections, 'summary': (None, {'conditions', 'age'})}
+    assert validate(widgets, broken) == ["section 'summary' reads 'age', which only reruns fragment 'meal_plan'"]
+    assert validate({**widgets, 'unused': None}, sections) == ["widget 'unused' is not read by any section"]
+
+
+def test_page_renders_declared_widgets(app):
+    assert not app.exception
+    rendered = {widget.key for kind in ('multiselect', 'radio', 'text_input', 'checkbox', 'slider')
+                for widget in getattr(app, kind)}
+    # combine only appears with several conditions
+    assert set(widgets) - {'combine'} <= rendered
+    assert app.dataframe[0].value['food_name'].size == 10
+
+
+def test_meal_plan_uses_age_and_gender(app):
+    app.slider(key='age').set_value(60)
+    app.radio(key='gender').set_value('Female')
+    app.checkbox(key='meal_plan').check().run()
+    assert not app.exception
+    captions = [caption.value for caption in app.caption]
+    assert any(caption.startswith('Plan computed in') for caption in captions)
+
+
+def test_several_conditions_and_limits(app):
+    app.multiselect(key='conditions').set_value(['Diabetes', 'High_BP']).run()
+    app.text_input(key='nutrient_filters').input('sodium_mg < 200, Health_Label_HighBP == healthy').run()
+    assert not app.exception
+    assert not app.error
+    assert 'pareto_rank' in app.dataframe[0].value
+
+
+def test_alternatives(app):
+    app.multiselect(key='current_foods').set_value([0, 1]).run()
+    assert not app.exception
+    frames = [frame.value for frame in app.dataframe if 'query_food' in frame.value]
+    assert app.info or len(frames) == 1
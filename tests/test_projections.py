@@ -0,0 +1,73 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import projections
+from food_store import open_store
+from projections import (compute_projections, default_projections_path, load_projections, read_projections,
+                         save_projections)
+from scoring import cluster_condition_weights, label_map
+
+
+@pytest.fixture
+def csv_path(trained, tmp_path):
+    path = str(tmp_path / 'Labeled.csv')
+    shutil.copy(trained[0], path)
+    return path
+
+
+def test_compute_projections(trained):
+    from sklearn.metrics import silhouette_score
+
+    df = pd.read_csv(trained[0])
+    result = compute_projections(df)
+    assert set(result) == set(cluster_condition_weights)
+    for condition, projection in result.items():
+        assert projection['coords'].shape == (len(df), 3) and projection['coords'].dtype == np.float32
+        # Below the sample size the silhouette is exact
+        expected = silhouette_score(projection['coords'], df[label_map[condition]])
+        assert projection['silhouette'] == pytest.approx(expected, abs=1e-4)
+
+
+def test_saved_projections_are_reused(csv_path, monkeypatch):
+    first = load_projections(csv_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recomputed")
+
+    monkeypatch.setattr(projections, 'compute_projections', fail)
+    again = load_projections(csv_path)
+    for condition in first:
+        np.testing.assert_array_equal(again[condition]['coords'], first[condition]['coords'])
+        assert again[condition]['silhouette'] == first[condition]['silhouette']
+
+
+def test_new_data_recomputes(csv_path):
+    before = load_projections(csv_path)
+    df = pd.read_csv(csv_path)
+    df['Health_Label_Diabetes'] = np.arange(len(df)) % 2
+    df.to_csv(csv_path, index=False)
+    after = load_projections(csv_path)
+    assert after['diabetes']['silhouette'] != before['diabetes']['silhouette']
+    assert read_projections(default_projections_path(csv_path), open_store(csv_path).version) is not None
+
+
+def test_stale_or_broken_files_are_ignored(csv_path, tmp_path, monkeypatch):
+    store = open_store(csv_path)
+    path = default_projections_path(csv_path)
+    result = load_projections(csv_path, store)
+    other_weights = {**cluster_condition_weights, 'diabetes': {'fibre_g': 1.0, 'protein_g': 1.0, 'fat_g': -1.0}}
+    assert read_projections(path, 'another data version') is None
+    assert read_projections(path, store.version, other_weights) is None
+
+    save_projections(path, result, store.version)
+    monkeypatch.setattr(projections, 'PROJECTIONS_VERSION', projections.PROJECTIONS_VERSION + 1)
+    assert read_projections(path, store.version) is None
+    monkeypatch.undo()
+
+    with open(path, 'wb') as f:
+        f.write(b'not an npz file')
+    assert read_projections(path, store.version) is None
+    assert read_projections(str(tmp_path / 'missing.npz'), store.version) is None
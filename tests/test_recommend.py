@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_catalogue
+from recommend import parse_conditions, recommend_batch, run_batch
+from scoring import FoodScorer
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return FoodScorer(make_catalogue(500, seed=2))
+
+
+def test_single_condition_matches_scorer(scorer):
+    profiles = pd.DataFrame({'user_id': [1, 2], 'conditions': ['Diabetes', 'high_bp']})
+    result = recommend_batch(profiles, top_n=5, scorer=scorer)
+    for user_id, condition in [(1, 'diabetes'), (2, 'high_bp')]:
+        rows = result[result['user_id'] == user_id]
+        expected = scorer.recommend(condition, 5)
+        assert list(rows['food_name']) == list(expected['food_name'])
+        np.testing.assert_allclose(rows['score'], expected['score'])
+        assert list(rows['rank']) == [1, 2, 3, 4, 5] and (rows['error'] == '').all()
+
+
+def test_bad_profiles_are_reported_not_fatal(scorer):
+    profiles = pd.DataFrame({'user_id': [1, 2, 3, 4], 'conditions': ['diabetes', 'gout', np.nan, 'obesity;low_bp']})
+    result = recommend_batch(profiles, top_n=3, scorer=scorer)
+    assert list(result['user_id']) == [1, 1, 1, 2, 3, 4, 4, 4]
+    errors = result.groupby('user_id')['error'].first()
+    assert errors[1] == '' and errors[4] == ''
+    assert errors[2].startswith("unknown condition 'gout'")
+    assert errors[3] == 'no conditions'
+    failed = result[result['error'] != '']
+    assert failed['rank'].isna().all() and failed['food_name'].isna().all() and failed['score'].isna().all()
+
+
+def test_run_batch_counts_rejected_profiles(scorer, tmp_path, monkeypatch):
+    import recommend
+
+    monkeypatch.setattr(recommend, 'load_scorer', lambda csv_path: scorer)
+    profiles_path, output_path = str(tmp_path / 'profiles.csv'), str(tmp_path / 'out.csv')
+    pd.DataFrame({'user_id': range(5), 'conditions': ['diabetes', '', 'x', 'high_bp', 'low_bp']}).to_csv(
+        profiles_path, index=False)
+    n_profiles, n_rejected, _ = run_batch(profiles_path, output_path, top_n=2, chunk_size=2)
+    assert (n_profiles, n_rejected) == (5, 2)
+    assert len(pd.read_csv(output_path)) == 3 * 2 + 2
+
+
+def test_parse_conditions():
+    assert parse_conditions('Diabetes; High_BP') == ('diabetes', 'high_bp')
+    assert parse_conditions(' ; ') == () and parse_conditions(None) == ()
@@ -0,0 +1,95 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_catalogue
+from result_cache import LRUCache, ResultCache
+from scoring import FoodScorer
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1) and cache.hit_rate == 0.75
+
+
+def test_lru_byte_bound():
+    cache = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.put('a', b'xxxx')
+    cache.put('b', b'yyyy')
+    cache.put('c', b'zzzz')
+    # 12 bytes would exceed the bound: the oldest entry goes
+    assert cache.get('a') is None and len(cache) == 2 and cache.nbytes == 8
+    # Replacing a value accounts for its new size
+    cache.put('b', b'y')
+    assert cache.nbytes == 5
+    # A value larger than the whole bound is not cached and evicts nothing
+    cache.put('big', b'x' * 11)
+    assert cache.get('big') is None and len(cache) == 2 and cache.nbytes == 5
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_result_cache_is_invalidated_by_a_new_data_version():
+    cache = ResultCache(max_entries=8)
+    builds = []
+
+    def build(value):
+        builds.append(value)
+        return value
+
+    assert cache.get_or_build('key', 'v1', lambda: build('one')) == 'one'
+    assert cache.get_or_build('key', 'v1', lambda: build('again')) == 'one'
+    assert cache.get_or_build('key', 'v2', lambda: build('two')) == 'two'
+    assert cache.get_or_build('key', 'v2', lambda: build('again')) == 'two'
+    assert builds == ['one', 'two']
+    assert len(cache.entries) == 1
+
+
+def test_result_built_for_an_old_version_is_not_kept():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build():
+        started.set()
+        release.wait(5)
+        return 'old'
+
+    thread = threading.Thread(target=cache.get_or_build, args=('key', 'v1', slow_build))
+    thread.start()
+    started.wait(5)
+    cache.get_or_build('other', 'v2', lambda: 'new')
+    release.set()
+    thread.join()
+    assert cache.get_or_build('key', 'v2', lambda: 'rebuilt') == 'rebuilt'
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return FoodScorer(make_catalogue(500, seed=1))
+
+
+def test_recommendation_views(scorer):
+    cache = ResultCache()
+    result = cache.recommendation(scorer, 'diabetes', 'v1', top_n=5)
+    pd.testing.assert_frame_equal(result.frame, scorer.recommend('diabetes', 5))
+    assert result.csv == result.frame.to_csv(index=False).encode('utf-8')
+    assert list(result.chart.index) == list(result.frame['food_name'])
+    assert cache.recommendation(scorer, 'diabetes', 'v1', top_n=5) is result
+    # Different filters are different entries
+    filtered = cache.recommendation(scorer, 'diabetes', 'v1', top_n=5, rows=[0, 1, 2], filters=('rows 0-2',))
+    assert filtered is not result and set(filtered.frame.index) <= {0, 1, 2}
+
+
+def test_combined_recommendation(scorer):
+    cache = ResultCache()
+    result = cache.combined_recommendation(scorer, ['diabetes', 'high_bp'], 'v1', top_n=5)
+    pd.testing.assert_frame_equal(result.frame, scorer.recommend_multi(['diabetes', 'high_bp'], 5))
+    assert cache.combined_recommendation(scorer, ['diabetes', 'high_bp'], 'v1', top_n=5) is result
+    assert cache.combined_recommendation(scorer, ['diabetes', 'high_bp'], 'v1', top_n=5, mode='blend') is not result
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_scoring import legacy_recommend_top_foods
+from benchmarks.synthetic import make_catalogue
+from scoring import FoodScorer, condition_weights
+
+
+@pytest.fixture(scope='module')
+def catalogue():
+    df = make_catalogue(2_000, seed=3)
+    # Missing values are scored as 0, as in the original fillna(0)
+    df.loc[::7, 'fibre_g'] = np.nan
+    df.loc[::11, 'sodium_mg'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('condition', list(condition_weights))
+@pytest.mark.parametrize('top_n', [1, 10, 2_500])
+def test_recommend_matches_legacy(catalogue, condition, top_n):
+    expected = legacy_recommend_top_foods(catalogue, condition, top_n)
+    got = FoodScorer(catalogue).recommend(condition, top_n)
+    pd.testing.assert_frame_equal(got, expected, check_exact=False)
+
+
+def test_from_matrix_matches_frame(catalogue):
+    scorer = FoodScorer(catalogue)
+    shared = FoodScorer.from_matrix(scorer.matrix, scorer.nutrients, scorer.food_names)
+    for condition in condition_weights:
+        np.testing.assert_allclose(shared.scores(condition), scorer.scores(condition))
+        assert list(shared.recommend(condition, 10).index) == list(scorer.recommend(condition, 10).index)
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from search import SearchIndex, normalize
+
+NAMES = ['Masala dosa', 'Dosa', 'Plain dosa', 'Rava dosa masala', 'Dosa batter', 'Crème brûlée',
+         'Paneer tikka', 'Palak paneer', 'Idli']
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex(NAMES)
+
+
+def names(index, query, k=10):
+    matches = index.lookup(query, k)
+    return list(index.food_names[matches.rows]), list(matches.kinds)
+
+
+def test_name_matches_rank_before_word_matches(index):
+    found, kinds = names(index, 'dosa')
+    # Shorter names first within each kind
+    assert found == ['Dosa', 'Dosa batter', 'Plain dosa', 'Masala dosa', 'Rava dosa masala']
+    assert kinds == ['name', 'name', 'word', 'word', 'word']
+
+
+def test_every_query_word_must_match(index):
+    found, kinds = names(index, 'masala do', k=2)
+    assert found == ['Masala dosa', 'Rava dosa masala']
+    assert kinds == ['name', 'word']
+    # Fewer than k exact matches: the rest are typo-tolerant
+    found, kinds = names(index, 'masala do')
+    assert found[:2] == ['Masala dosa', 'Rava dosa masala']
+    assert set(kinds[2:]) == {'fuzzy'}
+
+
+def test_k_limits_the_matches(index):
+    assert names(index, 'dosa', k=2) == (['Dosa', 'Dosa batter'], ['name', 'name'])
+
+
+def test_typos_fall_back_to_similar_words(index):
+    found, kinds = names(index, 'masla dosa')
+    assert found[0] == 'Masala dosa' and set(kinds) == {'fuzzy'}
+    matches = index.lookup('paner', 3)
+    assert set(index.food_names[matches.rows]) == {'Paneer tikka', 'Palak paneer'}
+    assert np.all(matches.similarity >= 0.5) and np.all(matches.similarity < 1)
+
+
+def test_prefix_matches_are_not_repeated_as_fuzzy(index):
+    matches = index.lookup('dosa', 10)
+    assert len(set(matches.rows)) == len(matches.rows)
+
+
+@pytest.mark.parametrize('query', ['creme brulee', 'CRÈME', 'brûl'])
+def test_accents_are_ignored(index, query):
+    assert names(index, query) == (['Crème brûlée'], ['name' if query.lower().startswith('cr') else 'word'])
+
+
+def test_normalize():
+    assert normalize('Crème Brûlée') == 'creme brulee'
+    assert normalize('IDLI') == 'idli'
+
+
+@pytest.mark.parametrize('query, k', [('', 10), ('   ', 10), ('!?', 10), ('dosa', 0), ('dosa', -1)])
+def test_empty_lookups(index, query, k):
+    matches = index.lookup(query, k)
+    assert len(matches.rows) == len(matches.kinds) == len(matches.similarity) == 0
+
+
+def test_prefix_range_guards_long_words(index):
+    longest = max(len(term) for term in index.terms)
+    assert index.prefix_range('') == (0, 0)
+    assert index.prefix_range('d' * (longest + 1)) == (0, 0)
+    assert index.prefix_range('paneer' + 'x' * longest) == (0, 0)
+    lo, hi = index.prefix_range('dos')
+    assert list(index.terms[lo:hi]) == ['dosa']
+    assert len(index.lookup('x' * 500).rows) == 0
+
+
+def test_search_adds_labels(index):
+    labels = {'Health_Label_Diabetes': np.arange(len(NAMES))}
+    frame = index.search('idli', labels=labels)
+    assert list(frame['food_name']) == ['Idli']
+    assert frame['Health_Label_Diabetes'].tolist() == [NAMES.index('Idli')]
+
+
+def test_cluster_view_search(trained, tmp_path, monkeypatch):
+    AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+    output, models_dir = trained
+    shutil.copy(output, tmp_path / 'Labeled_Data.csv')
+    shutil.copytree(models_dir, tmp_path / 'models')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('FOOD_APP_INSTRUMENT', '0')
+    monkeypatch.setenv('FOOD_APP_WARMUP', '0')
+    app = AppTest.from_file(os.path.join(ROOT, 'cluster_app.py'), default_timeout=120).run()
+    assert not app.exception
+    app.text_input(key='food_search_query').input('paner').run()
+    assert not app.exception
+    matches = [frame.value for frame in app.dataframe if 'match' in frame.value]
+    assert len(matches) == 1 and matches[0]['food_name'].str.contains('aneer').any()
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+
+from models import healthy_clusters
+from scoring import label_map
+from service import RecommendationService, ServiceApp
+
+
+@pytest.fixture(scope='module')
+def service(trained):
+    output, models_dir = trained
+    return RecommendationService(output, models_dir)
+
+
+def cluster_of(service, condition, foods):
+    return {int(service.labels[condition][service.name_to_row[food['food_name']]]) for food in foods}
+
+
+@pytest.mark.parametrize('condition', list(label_map))
+def test_healthy_only_uses_the_models_healthy_cluster(service, trained, condition):
+    healthy = healthy_clusters(trained[1])[label_map[condition]]
+    foods = service.recommend(condition, 20, healthy_only=True)['foods']
+    assert cluster_of(service, condition, foods) == {healthy}
+
+
+def test_cluster_parameter_overrides(service):
+    other = (service.healthy_clusters[label_map['obesity']] + 1) % 3
+    foods = service.recommend('obesity', 10, healthy_only=True, cluster=other)['foods']
+    assert cluster_of(service, 'obesity', foods) == {other}
+
+
+def test_recommend_endpoint_defaults_to_the_healthy_cluster(service):
+    app = ServiceApp(service, workers=1)
+    status, body = asyncio.run(app.dispatch('GET', '/recommend?condition=high_bp&top_n=5&healthy_only=1', b''))
+    assert status == 200
+    healthy = service.healthy_clusters[label_map['high_bp']]
+    assert cluster_of(service, 'high_bp', json.loads(body)['foods']) == {healthy}
+    status, _ = asyncio.run(app.dispatch('GET', '/recommend?condition=high_bp&healthy_only=1&cluster=x', b''))
+    assert status == 400
+
+
+def test_similar_endpoint(service):
+    app = ServiceApp(service, workers=1)
+    food = service.scorer.food_names[0]
+    status, body = asyncio.run(app.dispatch('GET', f'/similar?condition=diabetes&food={food}&k=3', b''))
+    assert status == 200 and json.loads(body)['food'] == food
+    status, body = asyncio.run(app.dispatch('GET', '/similar?condition=diabetes&food=No+such+food', b''))
+    assert status == 400 and 'Unknown food' in json.loads(body)['error']
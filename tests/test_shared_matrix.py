@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from food_store import open_store
+from shared_matrix import CURRENT, KEEP_SEGMENTS, attach_shared, current_segment, segment_name
+
+
+def write_table(path, n_rows, offset=0):
+    pd.DataFrame({
+        'food_name': [f"food {i}" if i % 5 else None for i in range(offset, offset + n_rows)],
+        'energy_kcal': np.arange(offset, offset + n_rows, dtype=np.float64),
+        'sodium_mg': [np.nan if i % 3 == 0 else i * 10.0 for i in range(n_rows)],
+        'Health_Label_Diabetes': np.arange(n_rows) % 3,
+    }).to_csv(path, index=False)
+
+
+def segments(shared_dir):
+    return sorted(entry for entry in os.listdir(shared_dir) if not entry.startswith('.') and entry != CURRENT)
+
+
+def test_attach_matches_the_store(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    write_table(csv_path, 12)
+    shared = attach_shared(csv_path)
+    store = open_store(csv_path)
+
+    assert shared.version == store.version and len(shared) == 12
+    assert shared.nutrient_columns == ['energy_kcal', 'sodium_mg']
+    np.testing.assert_array_equal(shared.nutrients[:, 1], np.nan_to_num(store.column('sodium_mg'), nan=0.0))
+    np.testing.assert_array_equal(shared.labels['Health_Label_Diabetes'], np.arange(12) % 3)
+    assert list(shared.food_names) == list(store.column('food_name'))
+    assert shared.food_names[0] is None and shared.food_names[1] == 'food 1'
+    assert list(shared.food_names[[1, 2]]) == ['food 1', 'food 2']
+    frame = shared.frame(['food_name', 'energy_kcal', 'Health_Label_Diabetes'])
+    assert list(frame.columns) == ['food_name', 'energy_kcal', 'Health_Label_Diabetes']
+    assert not shared.nutrients.flags.writeable
+
+
+def test_new_data_flips_current_and_prunes(tmp_path):
+    csv_path = str(tmp_path / 'foods.csv')
+    shared_dir = str(tmp_path / 'foods.shared')
+    write_table(csv_path, 5)
+    first = attach_shared(csv_path)
+    # The same data reuses the live segment
+    assert attach_shared(csv_path).segment == first.segment
+
+    attached = [first]
+    for offset in range(1, KEEP_SEGMENTS + 2):
+        write_table(csv_path, 5 + offset, offset=100 * offset)
+        attached.append(attach_shared(csv_path))
+        assert current_segment(shared_dir) == attached[-1].segment
+        assert os.path.basename(attached[-1].segment) == segment_name(attached[-1].version)
+
+    assert len(segments(shared_dir)) == KEEP_SEGMENTS
+    assert not os.path.exists(first.segment)
+    # Processes still attached to a pruned segment keep a valid view
+    assert len(first) == 5
+    np.testing.assert_array_equal(first.nutrients[:, 0], np.arange(5))
+    assert list(first.food_names)[1:] == [f"food {i}" for i in range(1, 5)]
@@ -0,0 +1,94 @@
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from food_store import open_store
+from similarity import (SimilarityIndex, default_similarity_path, load_similarity_index, save_similarity_index,
+                        scaled_features)
+
+CONDITIONS = ['diabetes', 'high_bp']
+
+
+@pytest.fixture(scope='module')
+def foods(trained):
+    return pd.read_csv(trained[0])
+
+
+@pytest.fixture(scope='module')
+def index(foods):
+    return SimilarityIndex(foods, CONDITIONS)
+
+
+def brute_force(foods, index, condition, row, healthier):
+    features = scaled_features(foods, condition)
+    distances = np.sqrt(((features - features[row]) ** 2).sum(axis=1))
+    keep = np.arange(len(foods)) != row
+    if healthier:
+        keep &= index.scores[condition] > index.scores[condition][row]
+    return distances, np.flatnonzero(keep)
+
+
+@pytest.mark.parametrize('condition', CONDITIONS)
+@pytest.mark.parametrize('healthier', [True, False])
+@pytest.mark.parametrize('k', [1, 5, 40])
+def test_neighbours_match_brute_force(foods, index, condition, healthier, k):
+    # Queries across the score range; the best foods need the widening loop or have no healthier neighbour
+    order = np.argsort(index.scores[condition])
+    rows = order[np.linspace(0, len(order) - 1, 25).astype(int)]
+    got_rows, got_distances = index.neighbours(condition, rows, k, healthier)
+    for row, found, found_distances in zip(rows, got_rows, got_distances):
+        distances, allowed = brute_force(foods, index, condition, row, healthier)
+        expected = np.sort(distances[allowed])[:k]
+        n_found = len(expected)
+        np.testing.assert_allclose(found_distances[:n_found], expected, atol=1e-12)
+        assert np.all(found[n_found:] == -1) and np.all(np.isinf(found_distances[n_found:]))
+        # Rows may differ only among equally distant foods
+        assert set(found[:n_found]) <= set(allowed)
+        np.testing.assert_allclose(distances[found[:n_found]], found_distances[:n_found], atol=1e-12)
+
+
+def test_alternatives_are_healthier(foods, index):
+    name = foods['food_name'].iloc[0]
+    alternatives = index.alternatives('diabetes', [name], k=5)
+    assert set(alternatives['query_food']) <= {name}
+    assert (alternatives['score_gain'] > 0).all()
+    assert alternatives['distance'].is_monotonic_increasing
+
+
+def test_unknown_food(index):
+    with pytest.raises(ValueError, match='Unknown food'):
+        index.alternatives('diabetes', ['No such food'])
+
+
+def test_duplicate_names_are_queried_by_row(foods):
+    doubled = pd.concat([foods, foods.iloc[[3]]], ignore_index=True)
+    doubled.loc[len(foods), 'sodium_mg'] += 50
+    index = SimilarityIndex(doubled, CONDITIONS)
+    name = doubled['food_name'].iloc[3]
+    with pytest.raises(ValueError, match='pass rows'):
+        index.rows_for([name])
+    assert index.label(3) == f"{name} (#3)" and index.label(0) == doubled['food_name'].iloc[0]
+    for row in (3, len(foods)):
+        expected, _ = index.neighbours('high_bp', [row], 5, healthier=False)
+        got = index.alternatives('high_bp', rows=[row], k=5, healthier=False)
+        assert list(got['food_name']) == list(doubled['food_name'].to_numpy()[expected[0]])
+    with pytest.raises(ValueError):
+        index.alternatives('high_bp', rows=[len(doubled)])
+
+
+def test_saved_index_is_rebuilt_for_new_data_or_version(trained, tmp_path):
+    csv_path = str(tmp_path / 'Labeled.csv')
+    shutil.copy(trained[0], csv_path)
+    store = open_store(csv_path)
+    path = default_similarity_path(csv_path)
+    built = load_similarity_index(csv_path, store)
+    assert load_similarity_index(csv_path, store).food_names.tolist() == built.food_names.tolist()
+
+    save_similarity_index(path, 'stale', 'another data version')
+    assert isinstance(load_similarity_index(csv_path, store), SimilarityIndex)
+    with open(path, 'wb') as f:
+        pickle.dump({'version': 1, 'data_version': store.version, 'index': 'old layout'}, f)
+    assert isinstance(load_similarity_index(csv_path, store), SimilarityIndex)
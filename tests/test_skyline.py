@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from skyline import blend_scores, dominates, pareto_top_k
+
+
+def peel_layers(points):
+    """Pareto rank of every row by brute-force peeling over the full dominance matrix."""
+    dominated_by = dominates(points, points)
+    ranks = np.zeros(len(points), dtype=np.intp)
+    remaining = np.arange(len(points))
+    rank = 0
+    while len(remaining):
+        rank += 1
+        front = ~dominated_by[np.ix_(remaining, remaining)].any(axis=0)
+        ranks[remaining[front]] = rank
+        remaining = remaining[~front]
+    return ranks
+
+
+def make_points(kind, n, k, seed):
+    rng = np.random.default_rng(seed)
+    if kind == 'correlated':
+        return rng.normal(size=(n, 1)) + 0.3 * rng.normal(size=(n, k))
+    if kind == 'anticorrelated':
+        points = rng.dirichlet(np.ones(k), size=n)
+        return points + 0.01 * rng.normal(size=(n, k))
+    # Few distinct values: duplicate rows and ties in the blend
+    return rng.integers(0, 4, size=(n, k)).astype(np.float64)
+
+
+@pytest.mark.parametrize('kind', ['correlated', 'anticorrelated', 'ties'])
+@pytest.mark.parametrize('k', [2, 4])
+@pytest.mark.parametrize('top_n', [1, 10, 300])
+def test_pareto_top_k_matches_brute_force(kind, k, top_n):
+    points = make_points(kind, 2_000, k, seed=k)
+    weights = np.arange(1, k + 1)
+    blend = blend_scores(points, weights)
+    ranks = peel_layers(points)
+    rows = np.arange(len(points))
+    expected = np.lexsort((rows, -blend, ranks))[:top_n]
+
+    got_rows, got_ranks = pareto_top_k(points, top_n, weights)
+    np.testing.assert_array_equal(got_ranks, ranks[expected])
+    # Rows tied on rank and blend may come in either order
+    np.testing.assert_array_equal(blend[got_rows], blend[expected])
+    np.testing.assert_array_equal(ranks[got_rows], got_ranks)
+
+
+def test_pareto_top_k_empty():
+    rows, ranks = pareto_top_k(np.empty((0, 3)), 5)
+    assert len(rows) == 0 and len(ranks) == 0
+    rows, ranks = pareto_top_k(np.ones((4, 2)), 0)
+    assert len(rows) == 0 and len(ranks) == 0
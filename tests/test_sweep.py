@@ -0,0 +1,32 @@
+import shutil
+import sys
+
+import pandas as pd
+
+from conftest import SOURCE
+from labeling import condition_pipelines
+from models import load_models
+
+
+def test_sweep_relabel_of_some_conditions_keeps_the_others(trained, tmp_path, monkeypatch):
+    import sweep
+
+    output, models_dir = str(tmp_path / 'Labeled.csv'), str(tmp_path / 'models')
+    shutil.copy(trained[0], output)
+    shutil.copytree(trained[1], models_dir)
+    before = pd.read_csv(output)
+
+    monkeypatch.setattr(sys, 'argv', ['sweep.py', SOURCE, '-o', output, '--conditions', 'high_bp', '--c', '2', '3',
+                                      '--m', '2', '--components', '3', '--workers', '1', '--cache', '',
+                                      '--models-dir', models_dir])
+    sweep.main()
+
+    after = pd.read_csv(output)
+    assert list(after.columns) == list(before.columns)
+    kept = [config['label_column'] for condition, config in condition_pipelines.items() if condition != 'high_bp']
+    pd.testing.assert_frame_equal(after[kept], before[kept])
+
+    model = load_models(models_dir, ['high_bp'])['high_bp']
+    assert model.config['c'] in (2, 3) and 'silhouette' in model.config
+    assert model.healthy_cluster in range(model.config['c'])
+    assert set(after['Health_Label_HighBP']) <= set(range(model.config['c']))
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import pytest
+
+import warmup
+from projections import default_projections_path
+from search import default_search_path
+from shared_matrix import default_shared_dir
+from warmup import Warmup, artifact_steps
+
+
+def test_steps_run_in_order_and_failures_do_not_stop_later_steps(monkeypatch):
+    startups = []
+    monkeypatch.setattr(warmup, 'record_startup', lambda app, phase, seconds: startups.append((app, phase)))
+    ran = []
+
+    def fail():
+        raise RuntimeError("broken step")
+
+    steps = [('first', lambda: ran.append('first')), ('broken', fail), ('last', lambda: ran.append('last'))]
+    job = Warmup(steps, app='cluster_app').start()
+    assert job.wait(10)
+    assert ran == ['first', 'last']
+    assert list(job.timings) == ['first', 'broken', 'last'] and job.progress == (3, 3)
+    assert job.errors == {'broken': "RuntimeError('broken step')"}
+    assert job.seconds >= sum(job.timings.values())
+    assert startups == [('cluster_app', 'warmup')]
+
+
+def test_progress_before_start():
+    job = Warmup([('only', lambda: None)])
+    assert job.progress == (0, 1) and not job.wait(0)
+
+
+@pytest.fixture
+def csv_path(trained, tmp_path):
+    path = str(tmp_path / 'Labeled_Data.csv')
+    shutil.copy(trained[0], path)
+    return path
+
+
+def test_artifact_steps_build_every_artifact(csv_path):
+    job = Warmup(artifact_steps(csv_path)).run()
+    assert job.errors == {}
+    assert list(job.timings) == ['store', 'shared_matrix', 'projections', 'search_index', 'charting_imports']
+    for path in (default_shared_dir(csv_path), default_projections_path(csv_path), default_search_path(csv_path)):
+        assert os.path.exists(path), path
+
+
+@pytest.mark.parametrize('budget, fails', [('600', False), ('0', True)])
+def test_cli_budget(csv_path, monkeypatch, capsys, budget, fails):
+    monkeypatch.setattr('sys.argv', ['warmup.py', csv_path, '--budget', budget])
+    if fails:
+        with pytest.raises(SystemExit) as exit_info:
+            warmup.main()
+        assert exit_info.value.code == 1
+    else:
+        warmup.main()
+    assert f"(budget {budget} s)" in capsys.readouterr().out